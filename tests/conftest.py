@@ -0,0 +1,53 @@
+import csv
+import json
+import pytest
+from tracker import database, trends
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Empty database migrated to the current schema; DB_NAME points at it for the test"""
+    path = str(tmp_path / "snap_match_history.db")
+    monkeypatch.setattr(database, "DB_NAME", path)
+    monkeypatch.setattr(trends, "DB_NAME", path)
+    database.clear_intern_caches() # Ids interned for another test's database
+    database.init_db()
+    yield path
+    database.clear_intern_caches()
+
+@pytest.fixture
+def record_match(db):
+    """record_match_result with the fields the stats read; events are interim event dicts,
+    extra keyword arguments go into match_data"""
+    def record(game_id, deck_cards=("Ant", "Hawkeye", "Sentinel"), result="win", cubes=2, events=(), **match_data):
+        match_data = {
+            'game_id': game_id,
+            'deck_name_from_gamestate': "Test Deck",
+            'deck_card_ids_from_gamestate': list(deck_cards),
+            'opponent_player_name': "Rival",
+            'result': result,
+            'cubes_changed': cubes,
+            'turns_taken': 6,
+            'locations_at_end': ["Atlantis", "Xandar", "Asgard"],
+            'opponent_revealed_cards_at_end': ["Hulk", "Iron Man"],
+            **match_data,
+        }
+        assert database.record_match_result(match_data, {}, {game_id: list(events)})
+    return record
+
+@pytest.fixture
+def import_matches(db, tmp_path):
+    """Import (game_id, 'YYYY-MM-DD HH:MM:SS', deck_name, opponent, result, cubes) matches through the CSV import"""
+    def import_rows(matches):
+        path = str(tmp_path / "matches.csv")
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Game ID', 'Timestamp', 'Deck Name', 'Opponent', 'Result', 'Cubes', 'Turns',
+                             'Location 1', 'Location 2', 'Location 3', 'Your Snap Turn', 'Opponent Snap Turn',
+                             'Final Snap State', 'Opponent Revealed Cards', 'Your Deck Cards', 'Season', 'Rank', 'Notes'])
+            for game_id, timestamp, deck_name, opponent, result, cubes in matches:
+                writer.writerow([game_id, timestamp, deck_name, opponent, result, cubes, 6,
+                                 'Atlantis', 'Xandar', 'Asgard', 0, 0, 'None',
+                                 '[]', json.dumps([deck_name]), '2025-05', 'Gold', ''])
+        ok, message = database.import_match_history_from_csv(path)
+        assert ok, message
+    return import_rows
@@ -0,0 +1,45 @@
+import threading
+import time
+from tracker.database import BackgroundQueryExecutor
+
+LONG_QUERY = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT COUNT(*) FROM (SELECT i FROM n LIMIT 1000000000)"
+
+def _poll_until_idle(executor):
+    deadline = time.monotonic() + 10
+    while executor.has_pending():
+        assert time.monotonic() < deadline, "executor never finished"
+        executor.poll_results()
+        time.sleep(0.01)
+
+def test_newer_submission_interrupts_running_sql(db):
+    executor = BackgroundQueryExecutor()
+    started = threading.Event()
+    delivered, errors = [], []
+    def long_running(conn):
+        started.set()
+        return conn.execute(LONG_QUERY).fetchone()
+    executor.submit("history", long_running, delivered.append, errors.append)
+    assert started.wait(5)
+    begun = time.monotonic()
+    executor.submit("history", lambda conn: conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0], delivered.append, errors.append)
+    _poll_until_idle(executor)
+    # The interrupted query's error is superseded too, so neither callback sees it
+    assert delivered == [0] and errors == []
+    assert time.monotonic() - begun < 5
+
+def test_channels_do_not_supersede_each_other(db, record_match):
+    record_match("game-1")
+    executor = BackgroundQueryExecutor()
+    delivered = []
+    count = "SELECT COUNT(*) FROM matches"
+    executor.submit("history", lambda conn: ("history", conn.execute(count).fetchone()[0]), delivered.append)
+    executor.submit("cards", lambda conn: ("cards", conn.execute(count).fetchone()[0]), delivered.append)
+    _poll_until_idle(executor)
+    assert sorted(delivered) == [("cards", 1), ("history", 1)]
+
+def test_errors_reach_on_error(db):
+    executor = BackgroundQueryExecutor()
+    delivered, errors = [], []
+    executor.submit("history", lambda conn: conn.execute("SELECT * FROM no_such_table").fetchall(), delivered.append, errors.append)
+    _poll_until_idle(executor)
+    assert delivered == [] and "no_such_table" in str(errors[0])
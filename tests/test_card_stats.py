@@ -0,0 +1,88 @@
+import random
+import sqlite3
+from collections import defaultdict
+from tracker import database
+
+CARDS = ["Ant", "Hawkeye", "Sentinel", "Hulk", "Iron Man", "Vision", "Kitty Pryde"]
+
+def _record_random_matches(record_match, count, seed=7):
+    rng = random.Random(seed)
+    decks = [tuple(rng.sample(CARDS, 4)) for _ in range(3)]
+    for i in range(count):
+        deck = rng.choice(decks)
+        drawn = rng.sample(deck, rng.randint(0, 4))
+        played = drawn[:rng.randint(0, len(drawn))]
+        events = [{'type': 'drawn', 'player': 'opponent', 'card': rng.choice(CARDS), 'turn': 1}]
+        if drawn:
+            events.append({'type': 'drawn', 'player': 'local', 'card': drawn[0], 'turn': 1}) # Also reconciled below
+        record_match(
+            f"game-{i}", deck_cards=deck, result=rng.choice(["win", "loss", "tie"]), cubes=rng.choice([-8, -2, -1, 1, 2, 4]),
+            events=events,
+            # A generated card outside the deck is drawn and played too
+            card_def_ids_drawn_at_end=drawn + ["Rock"], card_def_ids_played_at_end=played + ["Rock"],
+        )
+
+def _reference_card_stats(conn):
+    """The card stats cache recomputed one match at a time in Python"""
+    stats = defaultdict(lambda: defaultdict(int))
+    matches = conn.execute("SELECT game_id, deck_id, COALESCE(season, ''), result, COALESCE(cubes_changed, 0) FROM matches WHERE deck_id IS NOT NULL").fetchall()
+    for game_id, deck_id, season, result, cubes in matches:
+        deck = {row[0] for row in conn.execute("SELECT card_id FROM deck_cards WHERE deck_id = ?", (deck_id,))}
+        events = conn.execute("""
+            SELECT e.card_id, e.event_type_code FROM match_events e
+            WHERE e.game_id = ? AND e.player_code = ?
+        """, (game_id, database.PLAYER_CODES['local'])).fetchall()
+        drawn = {card for card, _ in events}
+        played = {card for card, code in events if code == database.EVENT_TYPE_CODES['played']}
+        win = int(result == 'win')
+        for card in deck:
+            row = stats[(card, deck_id, season)]
+            for prefix, hit in (('', True), ('drawn_', card in drawn), ('played_', card in played)):
+                if hit:
+                    row[prefix + 'games'] += 1
+                    row[prefix + 'wins'] += win
+                    row[prefix + 'cubes'] += cubes
+    return {key: tuple(row[col] for col in database.CARD_ROLLUP_STAT_COLUMNS) for key, row in stats.items()}
+
+def _as_dict(rows):
+    return {tuple(row[:3]): tuple(row[3:]) for row in rows}
+
+def test_card_stats_rows_match_a_per_match_reference(db, record_match):
+    _record_random_matches(record_match, 40)
+    conn = sqlite3.connect(db)
+    assert _as_dict(database._card_stats_rows(conn.cursor())) == _reference_card_stats(conn)
+    conn.close()
+
+def test_card_stats_rows_honour_the_match_filter(db, record_match):
+    _record_random_matches(record_match, 20)
+    conn = sqlite3.connect(db)
+    rows = database._card_stats_rows(conn.cursor(), "AND m.result = ?", ("win",))
+    conn.execute("DELETE FROM matches WHERE result != 'win'")
+    assert _as_dict(rows) == _reference_card_stats(conn)
+    conn.rollback()
+    conn.close()
+
+def test_card_stats_rows_without_matches(db):
+    conn = sqlite3.connect(db)
+    assert database._card_stats_rows(conn.cursor()) == []
+    conn.close()
+
+def test_incremental_card_cache_matches_a_rebuild_after_deletes(db, record_match):
+    _record_random_matches(record_match, 30)
+    database.delete_matches([f"game-{i}" for i in range(0, 30, 3)])
+    assert set(database.check_rollups().values()) == {0}
+
+    conn = sqlite3.connect(db)
+    cached = conn.execute(f"SELECT * FROM {database.CARD_ROLLUP_TABLE}").fetchall()
+    reference = _reference_card_stats(conn)
+    conn.close()
+    assert _as_dict(cached) == reference
+
+def test_calculate_card_performance_splits_drawn_and_not_drawn(db, record_match):
+    record_match("g1", deck_cards=["Ant", "Hulk"], result="win", cubes=4, card_def_ids_drawn_at_end=["Ant"], card_def_ids_played_at_end=["Ant"])
+    record_match("g2", deck_cards=["Ant", "Hulk"], result="loss", cubes=-2, card_def_ids_drawn_at_end=["Hulk"])
+    performance = database.calculate_card_performance({"Test Deck"})
+    assert performance["Ant"]["played_games"] == 1 and performance["Ant"]["played_cubes"] == 4
+    assert (performance["Ant"]["not_drawn_games"], performance["Ant"]["not_drawn_cubes"]) == (1, -2)
+    assert (performance["Hulk"]["drawn_games"], performance["Hulk"]["played_games"]) == (1, 0)
+    assert performance["Hulk"]["not_played_wins"] == 1
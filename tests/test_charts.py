@@ -0,0 +1,64 @@
+import threading
+import time
+import numpy as np
+from tracker.charts import build_hit_map, ChartRenderer
+
+def test_hit_map_indexes_regions_with_rows_flipped():
+    hit_map, texts = build_hit_map([(1, 0, 3, 2, "bar")], 5, 4)
+    assert texts == [None, "bar"]
+    # Display y 0..2 is the bottom two image rows
+    expected = np.zeros((4, 5), dtype=np.int32)
+    expected[2:4, 1:3] = 1
+    assert hit_map.dtype == np.int32
+    assert (hit_map == expected).all()
+
+def test_hit_map_rounds_fractional_edges_outwards():
+    hit_map, _ = build_hit_map([(1.6, 0.4, 2.2, 1.5, "point")], 4, 4)
+    assert np.argwhere(hit_map).tolist() == [[2, 1], [2, 2], [3, 1], [3, 2]]
+
+def test_later_regions_win_overlaps():
+    hit_map, texts = build_hit_map([(0, 0, 4, 4, "axes"), (1, 1, 3, 3, "marker")], 4, 4)
+    assert texts[hit_map[0, 0]] == "axes"
+    assert texts[hit_map[1, 1]] == "marker" and texts[hit_map[2, 2]] == "marker"
+    assert (hit_map[1:3, 1:3] == 2).all()
+
+def test_hit_map_clips_to_the_canvas_and_skips_empty_regions():
+    hit_map, texts = build_hit_map([(-5, -5, 2, 2, "corner"), (10, 10, 12, 12, "outside"), (2, 2, 2, 3, "empty")], 4, 4)
+    assert texts == [None, "corner"]
+    assert np.argwhere(hit_map).tolist() == [[2, 0], [2, 1], [3, 0], [3, 1]]
+
+def test_no_regions():
+    hit_map, texts = build_hit_map([], 3, 2)
+    assert texts == [None] and hit_map.shape == (2, 3) and not hit_map.any()
+
+def _poll_until_idle(renderer):
+    deadline = time.monotonic() + 5
+    while renderer.has_pending():
+        assert time.monotonic() < deadline, "renderer never finished"
+        renderer.poll_results()
+        time.sleep(0.01)
+
+def test_renderer_delivers_only_the_latest_job_per_canvas():
+    renderer = ChartRenderer()
+    started, release = threading.Event(), threading.Event()
+    delivered = []
+    def blocked():
+        started.set()
+        release.wait(5)
+        return "first"
+    renderer.submit("trends", blocked, delivered.append)
+    assert started.wait(5)
+    # Queued behind the running job: the middle one is skipped, the running one dropped when it finishes
+    renderer.submit("trends", lambda: "second", delivered.append)
+    renderer.submit("trends", lambda: "third", delivered.append)
+    renderer.submit("cards", lambda: "cards", delivered.append)
+    release.set()
+    _poll_until_idle(renderer)
+    assert delivered == ["third", "cards"]
+
+def test_renderer_hands_errors_to_on_error():
+    renderer = ChartRenderer()
+    results, errors = [], []
+    renderer.submit("trends", lambda: 1 / 0, results.append, errors.append)
+    _poll_until_idle(renderer)
+    assert results == [] and isinstance(errors[0], ZeroDivisionError)
@@ -0,0 +1,69 @@
+import math
+import numpy as np
+import pytest
+from tracker import confidence
+
+def test_wilson_interval_matches_the_closed_form():
+    low, high = confidence.wilson_interval([8, 0, 5], [10, 4, 5], level=0.95)
+    assert low[0] == pytest.approx(0.4902, abs=1e-4)
+    assert high[0] == pytest.approx(0.9433, abs=1e-4)
+    assert low[1] == pytest.approx(0.0, abs=1e-12) # No wins: the bound sits at 0
+    assert high[2] == pytest.approx(1.0) # All wins
+    assert (low < high).all()
+
+def test_wilson_interval_is_nan_without_games():
+    low, high = confidence.wilson_interval([0, 3], [0, 6])
+    assert math.isnan(low[0]) and math.isnan(high[0])
+    assert low[1] < 0.5 < high[1]
+
+def test_wilson_interval_narrows_with_more_games():
+    low, high = confidence.wilson_interval([5, 50, 500], [10, 100, 1000])
+    assert list(np.diff(high - low) < 0) == [True, True]
+
+def test_shrunk_win_rate_blends_towards_the_pooled_rate():
+    # Pooled rate 12/20 = 0.6; 10 prior games
+    rates = confidence.shrunk_win_rate([2, 10], [2, 18], prior_games=10)
+    assert rates[0] == pytest.approx((2 + 6) / 12)
+    assert rates[1] == pytest.approx((10 + 6) / 28)
+    assert confidence.shrunk_win_rate([0], [0], prior_rate=0.5)[0] == pytest.approx(0.5)
+
+def test_group_index_maps_keys_to_rows():
+    rows = ["Atlantis", 7, "Xandar"]
+    assert confidence.group_index(["Xandar", "7", "Missing", "Atlantis"], rows).tolist() == [2, 1, -1, 0]
+    assert confidence.group_index(["Xandar"], []).tolist() == [-1]
+    assert confidence.group_index([], rows).tolist() == []
+
+def test_bootstrap_interval_brackets_each_group_mean():
+    rng = np.random.default_rng(1)
+    values = np.r_[rng.normal(2, 3, 400), rng.normal(-1, 1, 50), [5.0]]
+    groups = np.r_[np.zeros(400, dtype=int), np.ones(50, dtype=int), [2]]
+    low, high = confidence.bootstrap_mean_interval(values, groups, 4, level=0.95)
+    for group in (0, 1):
+        sample = values[groups == group]
+        assert low[group] < sample.mean() < high[group]
+        # Close to the normal approximation of the standard error
+        expected_width = 2 * 1.96 * sample.std(ddof=1) / math.sqrt(len(sample))
+        assert high[group] - low[group] == pytest.approx(expected_width, rel=0.15)
+    # One value, and no values: no interval
+    assert np.isnan([low[2], high[2], low[3], high[3]]).all()
+
+def test_bootstrap_interval_is_deterministic_and_chunk_independent(monkeypatch):
+    values = np.arange(30, dtype=float) % 7 - 3
+    groups = np.arange(30) % 3
+    first = confidence.bootstrap_mean_interval(values, groups, 3)
+    monkeypatch.setattr(confidence, "BOOTSTRAP_CHUNK_ELEMENTS", 50) # Many small chunks
+    second = confidence.bootstrap_mean_interval(values, groups, 3)
+    np.testing.assert_array_equal(first, second)
+
+def test_bootstrap_ignores_samples_outside_the_groups():
+    low, high = confidence.bootstrap_mean_interval([1, 1, 99, 99], [0, 0, -1, 5], 1)
+    assert (low[0], high[0]) == (1, 1)
+
+def test_confidence_columns_line_up_with_rows():
+    columns = confidence.confidence_columns(
+        ["Rival", "Other"], [3, 0], [4, 0],
+        ["Rival", "Rival", "Rival", "Rival", "Stranger"], [2, 4, -1, 2, 8])
+    assert set(columns) == {'adj_win_pct', 'win_pct_low', 'win_pct_high', 'avg_cubes_low', 'avg_cubes_high'}
+    assert columns['win_pct_low'][0] < 75 < columns['win_pct_high'][0]
+    assert columns['avg_cubes_low'][0] <= 1.75 <= columns['avg_cubes_high'][0]
+    assert np.isnan(columns['avg_cubes_low'][1])
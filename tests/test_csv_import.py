@@ -0,0 +1,92 @@
+import csv
+import sqlite3
+from tracker import database
+
+def test_export_import_round_trip_keeps_opponent_cards(db, record_match, tmp_path, monkeypatch):
+    record_match("game-1", card_def_ids_drawn_at_end=["Ant"])
+    exported = str(tmp_path / "export.csv")
+    assert database.export_match_history_to_csv(exported) == 1
+
+    # Re-import into a second, empty database
+    monkeypatch.setattr(database, "DB_NAME", str(tmp_path / "imported.db"))
+    database.clear_intern_caches()
+    database.init_db()
+    ok, message = database.import_match_history_from_csv(exported)
+    assert ok, message
+
+    conn = sqlite3.connect(database.DB_NAME)
+    opp_cards = conn.execute("""
+        SELECT cd.def_id FROM match_opp_cards oc JOIN card_defs cd ON cd.id = oc.card_id
+        WHERE oc.game_id = 'game-1' ORDER BY cd.def_id
+    """).fetchall()
+    season = conn.execute("SELECT season FROM matches WHERE game_id = 'game-1'").fetchone()[0]
+    has_search = database.match_search_available(conn.cursor())
+    conn.close()
+    assert opp_cards == [("Hulk",), ("Iron Man",)]
+    assert season == "Unknown"
+    if has_search: # SQLite built with FTS5
+        assert database.search_match_ids("Hulk") == ["game-1"]
+
+def test_import_skips_existing_matches(db, record_match, tmp_path):
+    record_match("game-1")
+    exported = str(tmp_path / "export.csv")
+    database.export_match_history_to_csv(exported)
+    with open(exported, newline='', encoding='utf-8') as f:
+        assert len(list(csv.reader(f))) == 2 # Header and the match
+
+    ok, message = database.import_match_history_from_csv(exported)
+    assert ok and "Imported 0 matches" in message
+
+CSV_HEADER = [
+    'Game ID', 'Timestamp', 'Deck Name', 'Opponent', 'Result', 'Cubes',
+    'Turns', 'Location 1', 'Location 2', 'Location 3',
+    'Your Snap Turn', 'Opponent Snap Turn', 'Final Snap State',
+    'Opponent Revealed Cards', 'Your Deck Cards', 'Season', 'Rank', 'Notes'
+]
+
+def _csv_row(game_id, timestamp, deck_name, deck_cards, opponent, result, cubes, cubes_text=None):
+    return [game_id, timestamp, deck_name, opponent, result, cubes_text or str(cubes), '6',
+            'Atlantis', 'Xandar', 'Asgard', '3', '0', 'None',
+            '["Hulk"]', json_list(deck_cards), '2025-05', 'Gold', '']
+
+def json_list(values):
+    return '[' + ', '.join(f'"{value}"' for value in values) + ']'
+
+def _write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(rows)
+
+def test_multi_row_import_commits_with_consistent_rollups(db, tmp_path):
+    path = str(tmp_path / "history.csv")
+    _write_csv(path, [
+        _csv_row("g1", "2025-05-01 10:00:00", "Ramp", ["Ant", "Hulk"], "Rival", "win", 4),
+        _csv_row("g2", "2025-05-01 11:00:00", "Ramp", ["Ant", "Hulk"], "Other", "loss", -2),
+        _csv_row("g3", "2025-05-02 12:00:00", "Move", ["Vision", "Kitty Pryde"], "Rival", "win", 8),
+    ])
+    ok, message = database.import_match_history_from_csv(path)
+    assert ok, message
+    assert "Imported 3 matches" in message
+
+    conn = sqlite3.connect(database.DB_NAME)
+    decks = conn.execute("SELECT deck_name FROM decks ORDER BY deck_name").fetchall()
+    games, net_cubes = conn.execute("SELECT SUM(games), SUM(net_cubes) FROM rollup_deck_season").fetchone()
+    conn.close()
+    assert decks == [("Move",), ("Ramp",)]
+    assert (games, net_cubes) == (3, 10)
+    assert set(database.check_rollups().values()) == {0}
+
+def test_failed_import_rolls_back_decks_and_matches(db, tmp_path):
+    path = str(tmp_path / "history.csv")
+    _write_csv(path, [
+        _csv_row("g1", "2025-05-01 10:00:00", "Ramp", ["Ant", "Hulk"], "Rival", "win", 4),
+        _csv_row("g2", "2025-05-01 11:00:00", "Move", ["Vision"], "Rival", "win", 0, cubes_text="lots"),
+    ])
+    ok, _ = database.import_match_history_from_csv(path)
+    assert not ok
+
+    conn = sqlite3.connect(database.DB_NAME)
+    counts = [conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("matches", "decks", "rollup_deck_season")]
+    conn.close()
+    assert counts == [0, 0, 0]
@@ -0,0 +1,58 @@
+import sqlite3
+import pytest
+from tracker import database
+from tracker.database import HISTORY_SORT_KEY_SQL
+from tracker.ui import SnapTrackerApp
+
+PAGE_SIZE = 3
+
+def _model(key_sql, descending, where_sql="", params=()):
+    """The model apply_history_filter builds, without the search join"""
+    direction = "DESC" if descending else "ASC"
+    return {
+        'from_where_sql': f"FROM matches m LEFT JOIN decks d ON m.deck_id = d.id WHERE 1=1 {where_sql}",
+        'params': tuple(params),
+        'order_sql': f"ORDER BY {key_sql} {direction}, m.game_id {direction}",
+        'after_sql': f"AND ({key_sql}, m.game_id) {'<' if descending else '>'} (?, ?)",
+    }
+
+def _page_through(conn, key_sql, model):
+    """Every page as the history tab loads them: the first, then each after the last loaded key"""
+    keys = conn.execute(f"SELECT {key_sql}, m.game_id {model['from_where_sql']} {model['order_sql']}", model['params']).fetchall()
+    rows = conn.execute(SnapTrackerApp._history_page_sql(None, model, False), model['params'] + (PAGE_SIZE,)).fetchall()
+    while len(rows) < len(keys):
+        page = conn.execute(SnapTrackerApp._history_page_sql(None, model, True),
+                            model['params'] + tuple(keys[len(rows) - 1]) + (PAGE_SIZE,)).fetchall()
+        assert page, "paging stopped before the last match"
+        rows += page
+    return keys, rows
+
+@pytest.fixture
+def history(import_matches):
+    # Few distinct values per column, so every sort key has ties that span page boundaries
+    import_matches([
+        (f"g{i:02}", f"2025-03-{1 + i % 4:02} 12:00:00", ("Ramp", "Move", "Zoo")[i % 3],
+         ("Rival", "Other")[i % 2], ("win", "loss", "tie")[i % 3], (4, -2, 0, 8)[i % 4])
+        for i in range(14)
+    ])
+    conn = sqlite3.connect(database.DB_NAME)
+    # Unknown cubes and deck sort as the repo's COALESCE fallbacks
+    conn.execute("UPDATE matches SET cubes_changed = NULL WHERE game_id = 'g05'")
+    conn.execute("UPDATE matches SET deck_id = NULL WHERE game_id = 'g07'")
+    conn.commit()
+    yield conn
+    conn.close()
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("column", sorted(HISTORY_SORT_KEY_SQL))
+def test_pages_concatenate_to_the_full_order(history, column, descending):
+    key_sql = HISTORY_SORT_KEY_SQL[column]
+    keys, rows = _page_through(history, key_sql, _model(key_sql, descending))
+    assert [row[9] for row in rows] == [game_id for _, game_id in keys]
+    assert len(rows) == 14
+
+def test_paging_keeps_the_filter(history):
+    key_sql = HISTORY_SORT_KEY_SQL["Cubes"]
+    keys, rows = _page_through(history, key_sql, _model(key_sql, True, "AND m.result = ?", ("win",)))
+    assert [row[9] for row in rows] == [game_id for _, game_id in keys]
+    assert {row[3] for row in rows} == {"win"} and len(rows) == 5
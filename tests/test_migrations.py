@@ -0,0 +1,99 @@
+import json
+import sqlite3
+import pytest
+from tracker import database
+
+# Tables as an early release created them: before notes, season, rank and the deck tags existed
+LEGACY_SCHEMA = """
+    CREATE TABLE decks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, deck_name TEXT, card_ids_json TEXT, deck_hash TEXT UNIQUE,
+        first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+    CREATE TABLE matches (
+        game_id TEXT PRIMARY KEY, timestamp_ended TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        local_player_name TEXT, opponent_player_name TEXT, deck_id INTEGER, result TEXT,
+        cubes_changed INTEGER, turns_taken INTEGER, loc_1_def_id TEXT, loc_2_def_id TEXT, loc_3_def_id TEXT,
+        snap_turn_player INTEGER, snap_turn_opponent INTEGER, final_snap_state TEXT, opp_revealed_cards_json TEXT);
+    CREATE TABLE match_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, game_id TEXT, turn INTEGER, event_type TEXT, player_type TEXT,
+        card_def_id TEXT, location_index INTEGER, source_zone TEXT, target_zone TEXT, details_json TEXT);
+"""
+
+@pytest.fixture
+def legacy_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    monkeypatch.setattr(database, "DB_NAME", path)
+    database.clear_intern_caches()
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.execute("INSERT INTO decks (id, deck_name, card_ids_json, deck_hash) VALUES (1, 'Ramp', ?, 'hash-1')",
+                 (json.dumps(["Ant", "Hulk", "Hulk"]),))
+    conn.executemany("""
+        INSERT INTO matches (game_id, timestamp_ended, opponent_player_name, deck_id, result, cubes_changed, turns_taken,
+                             loc_1_def_id, loc_2_def_id, loc_3_def_id, snap_turn_player, snap_turn_opponent, opp_revealed_cards_json)
+        VALUES (?, ?, 'Rival', 1, ?, ?, 6, 'Atlantis', 'Xandar', 'Asgard', ?, 0, ?)
+    """, [
+        ("g1", "2025-03-01 12:00:00", "win", 4, 3, json.dumps(["Iron Man"])),
+        ("g2", "2025-03-02 12:00:00", "loss", -2, 0, "not json"),
+    ])
+    events = [
+        ("g1", 1, "drawn", "local", "Ant", None, "Deck", "Hand", json.dumps({"energy_spent": 0})),
+        ("g1", 1, "drawn", "local", "Ant", None, "Deck", "Hand", json.dumps({"energy_spent": 0})), # Duplicate
+        ("g1", 2, "played", "local", "Ant", 1, "Hand", "Board-1", json.dumps({"source": "reconciliation_end_game"})),
+        ("g2", 3, "drawn", "local", "Hulk", None, "Deck", "Hand", None),
+    ]
+    conn.executemany("""
+        INSERT INTO match_events (game_id, turn, event_type, player_type, card_def_id, location_index, source_zone, target_zone, details_json)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, events)
+    conn.commit()
+    conn.close()
+    yield path
+    database.clear_intern_caches()
+
+def test_legacy_database_migrates_to_current_schema(legacy_db):
+    database.init_db()
+
+    conn = sqlite3.connect(legacy_db)
+    assert database.get_schema_version(conn) == len(database.SCHEMA_MIGRATIONS)
+    match_columns = {row[1] for row in conn.execute("PRAGMA table_info(matches)")}
+    assert {"notes", "season", "rank", "ended_at", "local_day"} <= match_columns
+    deck_cards = conn.execute("""
+        SELECT cd.def_id FROM deck_cards dc JOIN card_defs cd ON cd.id = dc.card_id ORDER BY cd.def_id
+    """).fetchall()
+    opp_cards = conn.execute("""
+        SELECT oc.game_id, cd.def_id FROM match_opp_cards oc JOIN card_defs cd ON cd.id = oc.card_id
+    """).fetchall()
+    missing_days = conn.execute("SELECT COUNT(*) FROM matches WHERE ended_at IS NULL OR local_day IS NULL").fetchone()[0]
+    location_rows = conn.execute("SELECT COUNT(*) FROM match_locations").fetchone()[0]
+    conn.close()
+
+    assert deck_cards == [("Ant",), ("Hulk",)]
+    assert opp_cards == [("g1", "Iron Man")] # The unparsable list is skipped
+    assert missing_days == 0
+    assert location_rows == 6
+    assert set(database.check_rollups().values()) == {0}
+
+def test_legacy_events_survive_the_compact_rebuild(legacy_db):
+    database.init_db()
+    assert database.get_match_events("g1") == [
+        (1, "drawn", "local", "Ant", None, "Deck", "Hand", {"energy_spent": 0}),
+        (2, "played", "local", "Ant", 1, "Hand", "Board-1", {"source": "reconciliation_end_game"}),
+    ]
+    assert database.get_match_events("g2") == [(3, "drawn", "local", "Hulk", None, "Deck", "Hand", {})]
+
+def test_migrated_card_stats_match_the_legacy_matches(legacy_db):
+    database.init_db()
+    performance = database.calculate_card_performance()
+    assert performance["Ant"]["total_games_in_deck"] == 2
+    assert (performance["Ant"]["drawn_games"], performance["Ant"]["drawn_wins"]) == (1, 1)
+    assert (performance["Ant"]["played_games"], performance["Ant"]["played_cubes"]) == (1, 4)
+    assert (performance["Hulk"]["drawn_games"], performance["Hulk"]["drawn_cubes"]) == (1, -2)
+
+def test_init_db_on_a_current_database_is_a_no_op(db):
+    conn = sqlite3.connect(db)
+    schema = conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall()
+    conn.close()
+    database.init_db()
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall() == schema
+    conn.close()
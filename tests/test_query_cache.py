@@ -0,0 +1,61 @@
+from tracker import database
+
+def _counting(value):
+    calls = []
+    def compute():
+        calls.append(1)
+        return value
+    return compute, calls
+
+def test_results_are_reused_until_a_write():
+    database.bump_write_generation()
+    compute, calls = _counting("stats")
+    assert database.cached_query("deck", ({"B", "A"}, "All Seasons"), compute) == "stats"
+    # Sets and lists are normalized, so an equal filter in another order hits
+    assert database.cached_query("deck", ({"A", "B"}, "All Seasons"), compute) == "stats"
+    assert database.cached_query("deck", (["A", "B"], "All Seasons"), compute) == "stats"
+    assert len(calls) == 1
+
+    database.bump_write_generation()
+    database.cached_query("deck", ({"A", "B"}, "All Seasons"), compute)
+    assert len(calls) == 2
+
+def test_kinds_and_filters_are_cached_separately():
+    database.bump_write_generation()
+    compute, calls = _counting(1)
+    database.cached_query("deck", ("All Seasons",), compute)
+    database.cached_query("card", ("All Seasons",), compute)
+    database.cached_query("deck", ("2025-05",), compute)
+    assert len(calls) == 3
+
+def test_result_computed_across_a_write_is_not_kept():
+    database.bump_write_generation()
+    def compute_during_write():
+        database.bump_write_generation() # A match is recorded while the query runs
+        return "stale"
+    assert database.cached_query("deck", (), compute_during_write) == "stale"
+    compute, calls = _counting("fresh")
+    assert database.cached_query("deck", (), compute) == "fresh"
+    assert len(calls) == 1
+
+def test_least_recently_used_entries_are_evicted(monkeypatch):
+    database.bump_write_generation()
+    monkeypatch.setattr(database, "QUERY_CACHE_MAX_ENTRIES", 2)
+    compute, calls = _counting(0)
+    database.cached_query("history", ("a",), compute)
+    database.cached_query("history", ("b",), compute)
+    database.cached_query("history", ("a",), compute) # Now most recently used
+    database.cached_query("history", ("c",), compute) # Evicts "b"
+    database.cached_query("history", ("a",), compute)
+    assert len(calls) == 3
+    database.cached_query("history", ("b",), compute)
+    assert len(calls) == 4
+
+def test_recording_a_match_invalidates_cached_stats(db, record_match):
+    def games():
+        return database.cached_query("games", (), lambda: sum(
+            row["total_games_in_deck"] for row in database.calculate_card_performance().values()))
+    record_match("g1", deck_cards=["Ant"])
+    assert games() == 1
+    record_match("g2", deck_cards=["Ant"])
+    assert games() == 2
@@ -0,0 +1,96 @@
+import os
+import numpy as np
+import pytest
+from PIL import Image
+from tracker import thumbnails
+from tracker.thumbnails import build_thumbnail_atlas, ThumbnailAtlas, CardThumbnailCache
+
+class FakePhotoImage:
+    """Tk needs a display; the cache only holds on to what it is given"""
+    def __init__(self, pil_image):
+        self.size = pil_image.size
+
+@pytest.fixture
+def images_dir(tmp_path, monkeypatch):
+    rng = np.random.default_rng(3)
+    for card_id in ("Hulk", "Ant"):
+        Image.fromarray(rng.integers(0, 256, (260, 200, 3), dtype=np.uint8)).save(tmp_path / f"{card_id}.jpg")
+    monkeypatch.setattr(thumbnails, "CARD_IMAGES_DIR", str(tmp_path))
+    monkeypatch.setattr(thumbnails.ImageTk, "PhotoImage", FakePhotoImage)
+    return tmp_path
+
+def _atlas_files(images_dir):
+    return sorted(name for name in os.listdir(images_dir) if name.startswith('thumbnail_atlas_'))
+
+def test_atlas_is_rebuilt_only_when_sources_change(images_dir):
+    assert build_thumbnail_atlas(str(images_dir)) == 2
+    first_data = _atlas_files(images_dir)
+    assert build_thumbnail_atlas(str(images_dir)) is None
+    os.utime(images_dir / "Hulk.jpg", (1, 1))
+    assert build_thumbnail_atlas(str(images_dir)) == 2
+    # The superseded data file is removed
+    assert len(_atlas_files(images_dir)) == 1 and _atlas_files(images_dir) != first_data
+
+def test_atlas_skips_unreadable_images(images_dir):
+    (images_dir / "Broken.jpg").write_bytes(b"not a jpeg")
+    assert build_thumbnail_atlas(str(images_dir)) == 2
+    assert ThumbnailAtlas.load(str(images_dir)).get("Broken", 192, 300, False) is None
+
+def test_atlas_thumbnails_match_resampling_the_source(images_dir):
+    build_thumbnail_atlas(str(images_dir))
+    atlas = ThumbnailAtlas.load(str(images_dir))
+    thumbnail = atlas.get("Hulk", 150, 300, False)
+    # The largest standard width within the box
+    assert (thumbnail.mode, thumbnail.size) == ("RGB", (144, 187))
+    with Image.open(images_dir / "Hulk.jpg") as source:
+        expected = thumbnails._fit(source.convert('RGB'), 144, 260)
+        greyed = thumbnails._fit(thumbnails._greyed(source).convert('L'), 144, 260)
+    assert thumbnail.tobytes() == expected.tobytes()
+    assert atlas.get("Hulk", 150, 300, True).tobytes() == greyed.tobytes()
+
+def test_atlas_declines_boxes_without_a_close_size(images_dir):
+    build_thumbnail_atlas(str(images_dir))
+    atlas = ThumbnailAtlas.load(str(images_dir))
+    assert atlas.get("Hulk", 60, 300, False) is None # Narrower than every standard width
+    assert atlas.get("Hulk", 400, 400, False) is None # More than 4/3 above the largest
+    assert atlas.get("Unknown", 192, 300, False) is None
+
+def test_no_atlas_yet(tmp_path):
+    assert ThumbnailAtlas.load(str(tmp_path)) is None
+
+def test_cache_reuses_thumbnails_within_a_size_bucket(images_dir):
+    cache = CardThumbnailCache()
+    photo = cache.get("Hulk", 150, 300, 'in_deck')
+    assert photo.size == (144, 187) # Decoded from the JPG without an atlas, fit to the 144x296 bucket
+    assert cache.get("Hulk", 151, 303, 'in_deck') is photo
+    assert cache.get("Hulk", 150, 300, 'drawn') is not photo
+    assert cache.get("Missing", 150, 300, 'in_deck') is None
+    assert len(cache.entries) == 2
+
+def test_cache_prefers_the_atlas(images_dir):
+    build_thumbnail_atlas(str(images_dir))
+    cache = CardThumbnailCache(ThumbnailAtlas.load(str(images_dir)))
+    assert cache.load_image("Hulk", 150, 300, 'played').size == (144, 187)
+    assert cache.load_image("Hulk", 60, 300, 'played').mode == 'RGBA' # Too small for the atlas
+
+def test_cache_drops_least_recently_used(images_dir):
+    cache = CardThumbnailCache(max_bytes=2 * 96 * 124 * 4)
+    cache.get("Hulk", 96, 200, 'in_deck')
+    cache.get("Ant", 96, 200, 'in_deck')
+    cache.cached("Hulk", 96, 200, 'in_deck')
+    cache.get("Hulk", 96, 200, 'drawn')
+    assert [key[0] for key in cache.entries] == ["Hulk", "Hulk"]
+    assert cache.total_bytes == sum(size for _, size in cache.entries.values()) <= cache.max_bytes
+
+def test_adding_a_key_twice_keeps_the_byte_count(images_dir):
+    # Two tooltip requests for one card can both finish; the second add must not count its bytes again
+    cache = CardThumbnailCache(max_bytes=2 * 100 * 100 * 4)
+    pil_image = Image.new('RGB', (100, 100))
+    first = cache.add("Hulk", 100, 100, 'in_deck', pil_image)
+    assert cache.add("Hulk", 100, 100, 'in_deck', pil_image) is first
+    assert len(cache.entries) == 1 and cache.total_bytes == 40000
+    cache.add("Ant", 100, 100, 'in_deck', pil_image)
+    cache.add("Hulk", 100, 100, 'in_deck', pil_image) # Refreshes Hulk, so Ant is the one evicted
+    cache.add("Iron Man", 100, 100, 'in_deck', pil_image)
+    assert [key[0] for key in cache.entries] == ["Hulk", "Iron Man"]
+    assert cache.total_bytes == 80000
@@ -0,0 +1,84 @@
+import datetime
+import numpy as np
+import pytest
+from tracker import trends
+from tracker.database import epoch_to_local_day
+
+# Noon timestamps, so local days match the dates in any timezone within +-11h
+MATCHES = [
+    ("g1", "2025-03-02 12:00:00", "Ramp", "Rival", "win", 4),   # Sunday
+    ("g2", "2025-03-03 12:00:00", "Ramp", "Rival", "loss", -2), # Monday
+    ("g3", "2025-03-03 12:20:00", "Move", "Other", "win", 8),
+    ("g4", "2025-03-03 13:30:00", "Ramp", "Other", "tie", 0),   # After a 70 minute pause
+    ("g5", "2025-03-09 12:00:00", "Move", "Rival", "loss", -1), # Sunday
+]
+
+def _dates(trend):
+    return [moment.date().isoformat() for moment in trend['times']]
+
+def test_daily_series_and_summary(import_matches):
+    import_matches(MATCHES)
+    trend = trends.calculate_trends("Day", days=None)
+    assert _dates(trend) == ["2025-03-02", "2025-03-03", "2025-03-09"]
+    assert trend['games'].tolist() == [1, 3, 1]
+    assert trend['win_rates'] == pytest.approx([100.0, 100 / 3, 0.0])
+    assert trend['net_cubes'].tolist() == [4, 6, -1]
+    assert trend['cumulative_cubes'].tolist() == [4, 10, 9]
+    assert trend['summary'] == (5, 2, 9)
+
+def test_weeks_start_on_monday(import_matches):
+    import_matches(MATCHES)
+    trend = trends.calculate_trends("Week", days=None)
+    assert _dates(trend) == ["2025-02-24", "2025-03-03"]
+    assert trend['games'].tolist() == [1, 4]
+    assert trend['net_cubes'].tolist() == [4, 5]
+
+def test_sessions_split_on_long_pauses(import_matches, monkeypatch):
+    import_matches(MATCHES)
+    monkeypatch.setattr(trends, "TREND_SESSION_GAP_MINUTES", 30)
+    trend = trends.calculate_trends("Session", days=None)
+    assert trend['games'].tolist() == [1, 2, 1, 1]
+    assert trend['net_cubes'].tolist() == [4, 6, 0, -1]
+    assert trend['summary'] == (5, 2, 9)
+
+def test_rolling_windows_follow_the_games(import_matches):
+    import_matches([(f"g{i:02}", f"2025-03-{1 + i // 4:02} {10 + i % 4}:00:00", "Ramp", "Rival",
+                     "win" if i % 3 else "loss", i % 5 - 2) for i in range(30)])
+    trend = trends.calculate_trends("10-Game Rolling", days=None)
+    wins = np.array([1 if i % 3 else 0 for i in range(30)])
+    cubes = np.array([i % 5 - 2 for i in range(30)])
+    expected_games = np.minimum(np.arange(1, 31), 10)
+    expected_wins = np.array([wins[max(0, i - 9):i + 1].sum() for i in range(30)])
+    assert trend['games'].tolist() == expected_games.tolist()
+    assert trend['win_rates'] == pytest.approx(expected_wins * 100 / expected_games)
+    assert trend['net_cubes'].tolist() == [cubes[max(0, i - 9):i + 1].sum() for i in range(30)]
+    # The running total follows individual games, not the overlapping windows
+    assert trend['cumulative_cubes'].tolist() == np.cumsum(cubes).tolist()
+    assert trend['summary'] == (30, int(wins.sum()), int(cubes.sum()))
+
+def test_every_granularity_agrees_on_the_summary(import_matches):
+    import_matches(MATCHES)
+    summaries = {name: trends.calculate_trends(name, days=None)['summary'] for name in trends.TREND_GRANULARITIES}
+    assert set(summaries.values()) == {(5, 2, 9)}
+
+def test_deck_opponent_and_day_filters(import_matches, monkeypatch):
+    import_matches(MATCHES)
+    assert trends.calculate_trends("Day", {"Move"}, days=None)['summary'] == (2, 1, 7)
+    assert trends.calculate_trends("Session", opponent_name="Rival", days=None)['summary'] == (3, 1, 1)
+    # "Last 7 days" as of 2025-03-09 keeps the 2nd onwards
+    today = epoch_to_local_day(datetime.datetime(2025, 3, 9, 12).timestamp())
+    monkeypatch.setattr(trends, "current_local_day", lambda: today)
+    assert trends.calculate_trends("Day", days=7)['summary'] == (5, 2, 9)
+    assert trends.calculate_trends("Day", days=6)["summary"] == (4, 1, 5)
+    assert trends.calculate_trends("10-Game Rolling", days=6)['summary'] == (4, 1, 5)
+
+def test_empty_history(db):
+    for name in trends.TREND_GRANULARITIES:
+        trend = trends.calculate_trends(name, days=None)
+        assert trend['times'] == [] and trend['summary'] == (0, 0, 0)
+
+def test_rolling_sum_and_bucket_helpers():
+    assert trends._rolling_sum(np.array([1, 2, 3, 4]), 2).tolist() == [1, 3, 5, 7]
+    starts, games, wins, cubes = trends._bucket(np.array([5, 5, 7, 9, 9]), np.ones(5, dtype=int),
+                                                np.array([1, 0, 1, 1, 1]), np.array([2, -1, 4, 1, 1]))
+    assert (starts.tolist(), games.tolist(), wins.tolist(), cubes.tolist()) == ([0, 2, 3], [2, 1, 2], [1, 1, 2], [1, 4, 2])
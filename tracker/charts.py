@@ -0,0 +1,492 @@
+import queue
+import threading
+import tkinter as tk
+import numpy as np
+from PIL import Image, ImageTk
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.dates import AutoDateLocator, DateFormatter, date2num
+from matplotlib.patches import Patch
+from .config import QUERY_POLL_INTERVAL_MS
+
+# Half-size in pixels of the hover target around each line point
+POINT_HOVER_RADIUS = 4
+
+class Chart:
+    """A figure whose artists are created once and updated in place. tight_layout only runs when the
+    figure size or the labels it lays out around change, and nothing is drawn while the canvas is hidden.
+    On a RasterCanvas, set_data and drawing run on the render thread instead of the Tk thread."""
+    def __init__(self, figure, canvas):
+        self.figure = figure
+        self.canvas = canvas
+        self.axes = [] # Themed by _apply_colors; filled in by subclasses
+        self.colors = None
+        self.layout_key = None
+        self.stale = False # Updated while hidden; drawn when next mapped
+        self.hover_bars = [] # (bar, text) shown by set_data, for hit testing
+        self.hover_points = [] # (line, text per point)
+        if not isinstance(canvas, RasterCanvas): # That one handles mapping and resizing itself
+            widget = canvas.get_tk_widget()
+            widget.bind("<Map>", self._on_map, add="+")
+            widget.bind("<Configure>", self._on_configure, add="+")
+
+    def update(self, colors, *data):
+        """Show new data; arguments are those of the subclass' set_data"""
+        if isinstance(self.canvas, RasterCanvas):
+            # Copy the colors now: the config section may change while the job waits
+            self.canvas.render(self, (dict(colors),) + data)
+        else:
+            self.set_data(colors, *data)
+            self.draw()
+
+    def hover_regions(self, renderer):
+        """(x0, y0, x1, y1, text) in display pixels, origin bottom left, for what set_data last showed"""
+        regions = []
+        for bar, text in self.hover_bars:
+            if bar.get_visible():
+                bbox = bar.get_window_extent(renderer)
+                regions.append((bbox.x0, bbox.y0, bbox.x1, bbox.y1, text))
+        for line, texts in self.hover_points:
+            if line.get_visible() and len(texts):
+                points = line.get_transform().transform(line.get_xydata())
+                regions += [(x - POINT_HOVER_RADIUS, y - POINT_HOVER_RADIUS, x + POINT_HOVER_RADIUS, y + POINT_HOVER_RADIUS, text)
+                            for (x, y), text in zip(points, texts)]
+        return regions
+
+    def set_colors(self, colors):
+        """Re-theme the artists, only if the theme changed since the last update"""
+        colors = dict(colors)
+        if colors != self.colors:
+            self.colors = colors
+            self._apply_colors(colors)
+
+    def _apply_colors(self, colors):
+        bg_color, fg_color = colors['bg_main'], colors['fg_main']
+        self.figure.patch.set_facecolor(bg_color)
+        for ax in self.axes:
+            ax.set_facecolor(bg_color)
+            ax.tick_params(colors=fg_color)
+            ax.xaxis.label.set_color(fg_color)
+            ax.yaxis.label.set_color(fg_color)
+            ax.title.set_color(fg_color)
+            for spine in ax.spines.values():
+                spine.set_color(fg_color)
+
+    def _layout_texts(self):
+        texts = []
+        for ax in self.axes:
+            texts += [ax.get_title(), ax.get_xlabel(), ax.get_ylabel()]
+            texts += [label.get_text() for label in ax.get_yticklabels()]
+        return tuple(texts)
+
+    def _layout(self):
+        layout_key = (tuple(self.figure.get_size_inches()), self._layout_texts())
+        if layout_key != self.layout_key:
+            self.layout_key = layout_key
+            self.figure.tight_layout()
+
+    def draw(self):
+        if not self.canvas.get_tk_widget().winfo_viewable():
+            self.stale = True
+            return
+        self.stale = False
+        self._layout()
+        self.canvas.draw_idle()
+
+    def _on_map(self, event):
+        if self.stale:
+            self.draw()
+
+    def _on_configure(self, event):
+        # The canvas' own <Configure> handler has resized the figure and queued a redraw
+        if self.canvas.get_tk_widget().winfo_viewable():
+            self._layout()
+
+def _bar_slots(ax, slots, height, offset=0.0, **kwargs):
+    """Bars for up to `slots` rows, all hidden until update() gives them values"""
+    bars = ax.barh(np.arange(slots) + offset, np.zeros(slots), height=height, align='center', alpha=0.8, **kwargs)
+    for bar in bars:
+        bar.set_visible(False)
+    return list(bars)
+
+def _fit_xlim(ax, values):
+    """Value axis limits around the bars and zero, like autoscaling would give"""
+    low, high = min(0.0, min(values, default=0.0)), max(0.0, max(values, default=0.0))
+    padding = (high - low) * 0.05 or 1.0
+    ax.set_xlim(low - padding, high + padding)
+
+def _set_row_labels(ax, labels, top_padding=0.0):
+    ax.set_yticks(range(len(labels)))
+    ax.set_yticklabels(labels)
+    ax.set_ylim(-0.5, max(len(labels), 1) - 0.5 + top_padding)
+
+class CardStatsChart(Chart):
+    """Card Stats tab: played/drawn win rates and average cubes of the top cards"""
+    MAX_CARDS = 10
+
+    def __init__(self, figure, canvas):
+        super().__init__(figure, canvas)
+        self.win_ax = figure.add_subplot(211)
+        self.cubes_ax = figure.add_subplot(212)
+        self.axes = [self.win_ax, self.cubes_ax]
+
+        self.played_bars = _bar_slots(self.win_ax, self.MAX_CARDS, 0.4)
+        self.drawn_bars = _bar_slots(self.win_ax, self.MAX_CARDS, 0.4, offset=0.4)
+        self.win_ref_line = self.win_ax.axvline(x=50, linestyle='--', alpha=0.5)
+        self.win_ax.set_xlabel('Win %')
+        self.win_ax.set_title('Card Win Rates')
+        self.win_ax.set_xlim(0, 100)
+
+        self.cube_bars = _bar_slots(self.cubes_ax, self.MAX_CARDS, 0.8)
+        self.cubes_ref_line = self.cubes_ax.axvline(x=0, linestyle='--', alpha=0.5)
+        self.cubes_ax.set_xlabel('Avg. Cubes per Game')
+        self.cubes_ax.set_title('Card Cube Value')
+
+    def _apply_colors(self, colors):
+        super()._apply_colors(colors)
+        for bar in self.played_bars:
+            bar.set_color(colors['win'])
+        for bar in self.drawn_bars:
+            bar.set_color(colors['neutral'])
+        self.win_ref_line.set_color(colors['fg_main'])
+        self.cubes_ref_line.set_color(colors['fg_main'])
+        # Own handles: ones taken from the bars would copy their current color and visibility
+        self.win_ax.legend(handles=[
+            Patch(facecolor=colors['win'], alpha=0.8, label='Played Win %'),
+            Patch(facecolor=colors['neutral'], alpha=0.8, label='Drawn Win %'),
+        ])
+
+    def set_data(self, colors, card_names, played_win_rates, drawn_win_rates, avg_cubes):
+        """Show up to MAX_CARDS rows, listed bottom to top"""
+        self.set_colors(colors)
+        rows = len(card_names)
+        self.hover_bars = []
+        for i in range(self.MAX_CARDS):
+            shown = i < rows
+            for bar, values in ((self.played_bars[i], played_win_rates), (self.drawn_bars[i], drawn_win_rates), (self.cube_bars[i], avg_cubes)):
+                bar.set_visible(shown)
+                if shown:
+                    bar.set_width(values[i])
+            if shown:
+                self.cube_bars[i].set_color(colors['win'] if avg_cubes[i] > 0 else colors['loss'])
+                self.hover_bars += [
+                    (self.played_bars[i], f"{card_names[i]}: {played_win_rates[i]:.1f}% win when played"),
+                    (self.drawn_bars[i], f"{card_names[i]}: {drawn_win_rates[i]:.1f}% win when drawn"),
+                    (self.cube_bars[i], f"{card_names[i]}: {avg_cubes[i]:.2f} cubes per game played"),
+                ]
+
+        _set_row_labels(self.win_ax, card_names, top_padding=0.4)
+        _set_row_labels(self.cubes_ax, card_names)
+        _fit_xlim(self.cubes_ax, avg_cubes)
+
+class LocationChart(Chart):
+    """Locations tab: win rate and net cubes of the most played locations, bar thickness by games"""
+    MAX_LOCATIONS = 15
+
+    def __init__(self, figure, canvas):
+        super().__init__(figure, canvas)
+        self.win_ax = figure.add_subplot(211)
+        self.cubes_ax = figure.add_subplot(212)
+        self.axes = [self.win_ax, self.cubes_ax]
+
+        self.win_bars = _bar_slots(self.win_ax, self.MAX_LOCATIONS, 0.8)
+        self.win_labels = [self.win_ax.text(0, 0, "", va='center', fontsize=8, visible=False) for _ in range(self.MAX_LOCATIONS)]
+        self.win_ref_line = self.win_ax.axvline(x=50, linestyle='--', alpha=0.5)
+        self.win_ax.set_xlabel('Win Rate (%)')
+        self.win_ax.set_title('Location Win Rates')
+        self.win_ax.set_xlim(0, 100)
+
+        self.cube_bars = _bar_slots(self.cubes_ax, self.MAX_LOCATIONS, 0.8)
+        self.cube_labels = [self.cubes_ax.text(0, 0, "", va='center', fontsize=8, visible=False) for _ in range(self.MAX_LOCATIONS)]
+        self.cubes_ref_line = self.cubes_ax.axvline(x=0, linestyle='--', alpha=0.5)
+        self.cubes_ax.set_xlabel('Net Cubes')
+        self.cubes_ax.set_title('Location Cube Value')
+
+    def _apply_colors(self, colors):
+        super()._apply_colors(colors)
+        for bar in self.win_bars:
+            bar.set_color(colors['win'])
+        for label in self.win_labels + self.cube_labels:
+            label.set_color(colors['fg_main'])
+        self.win_ref_line.set_color(colors['fg_main'])
+        self.cubes_ref_line.set_color(colors['fg_main'])
+
+    def set_data(self, colors, location_names, matches, win_rates, net_cubes):
+        """Show up to MAX_LOCATIONS rows, listed bottom to top"""
+        self.set_colors(colors)
+        rows = len(location_names)
+        self.hover_bars = []
+        max_matches = max(matches, default=0) or 1
+        for i in range(self.MAX_LOCATIONS):
+            shown = i < rows
+            for artist in (self.win_bars[i], self.win_labels[i], self.cube_bars[i], self.cube_labels[i]):
+                artist.set_visible(shown)
+            if not shown:
+                continue
+            height = matches[i] / max_matches * 0.8
+            for bar, value in ((self.win_bars[i], win_rates[i]), (self.cube_bars[i], net_cubes[i])):
+                bar.set_y(i - height / 2)
+                bar.set_height(height)
+                bar.set_width(value)
+            self.cube_bars[i].set_color(colors['win'] if net_cubes[i] > 0 else colors['loss'])
+
+            self.win_labels[i].set_position((win_rates[i] + 2, i))
+            self.win_labels[i].set_text(f"{matches[i]} matches")
+            avg_cubes = net_cubes[i] / matches[i] if matches[i] > 0 else 0
+            self.cube_labels[i].set_position((net_cubes[i] + 2 if net_cubes[i] >= 0 else net_cubes[i] - 2, i))
+            self.cube_labels[i].set_horizontalalignment('left' if net_cubes[i] >= 0 else 'right')
+            self.cube_labels[i].set_text(f"Avg: {avg_cubes:.2f}")
+            self.hover_bars += [
+                (self.win_bars[i], f"{location_names[i]}: {win_rates[i]:.1f}% win in {matches[i]} matches"),
+                (self.cube_bars[i], f"{location_names[i]}: {net_cubes[i]} net cubes ({avg_cubes:.2f} per match)"),
+            ]
+
+        _set_row_labels(self.win_ax, location_names)
+        _set_row_labels(self.cubes_ax, location_names)
+        _fit_xlim(self.cubes_ax, net_cubes)
+
+class TrendChart(Chart):
+    """Trends tab: win rate, and per-period plus cumulative net cubes (on a twin axis), over time"""
+    def __init__(self, figure, canvas):
+        super().__init__(figure, canvas)
+        self.win_ax = figure.add_subplot(211)
+        self.cubes_ax = figure.add_subplot(212)
+        self.cumulative_ax = self.cubes_ax.twinx()
+        self.axes = [self.win_ax, self.cubes_ax, self.cumulative_ax]
+
+        self.win_line, = self.win_ax.plot([], [], linestyle='-')
+        self.win_ref_line = self.win_ax.axhline(y=50, linestyle='--', alpha=0.5)
+        self.win_ax.set_ylabel('Win Rate (%)')
+
+        self.cubes_line, = self.cubes_ax.plot([], [], linestyle='-')
+        self.cubes_ref_line = self.cubes_ax.axhline(y=0, linestyle='--', alpha=0.5)
+        self.cubes_ax.set_xlabel('Date')
+        self.cumulative_line, = self.cumulative_ax.plot([], [], linestyle='--', label='Cumulative Cubes')
+        self.cumulative_ax.set_ylabel('Cumulative Cubes')
+
+        # Times are plotted as date numbers, so the date ticks are set up once here
+        for ax in (self.win_ax, self.cubes_ax):
+            ax.xaxis.set_major_locator(AutoDateLocator())
+            ax.xaxis.set_major_formatter(DateFormatter('%m/%d'))
+            ax.tick_params(axis='x', rotation=45)
+
+        self.no_data_labels = [
+            ax.text(0.5, 0.5, "No data for chart", transform=ax.transAxes, horizontalalignment='center', verticalalignment='center', visible=False)
+            for ax in (self.win_ax, self.cubes_ax)
+        ]
+
+    def _apply_colors(self, colors):
+        super()._apply_colors(colors)
+        self.win_line.set_color(colors['win'])
+        self.cubes_line.set_color(colors['neutral'])
+        self.win_ref_line.set_color(colors['fg_main'])
+        self.cubes_ref_line.set_color(colors['fg_main'])
+        for label in self.no_data_labels:
+            label.set_color(colors['fg_main'])
+
+    def set_data(self, colors, trend):
+        """Show a calculate_trends result"""
+        self.set_colors(colors)
+        period_label = {'day': "Daily", 'week': "Weekly", 'session': "Per Session"}.get(trend['kind'], f"Rolling {trend['window']} Games")
+        # Rolling series have a point per game, too dense for markers
+        show_markers = trend['kind'] != 'rolling'
+        times = date2num(trend['times']) if trend['times'] else np.zeros(0)
+        has_data = len(times) > 0
+
+        for line, values, marker in ((self.win_line, trend['win_rates'], 'o'), (self.cubes_line, trend['net_cubes'], 's'), (self.cumulative_line, trend['cumulative_cubes'], '^')):
+            line.set_data(times, values)
+            line.set_marker(marker if show_markers else 'None')
+            line.set_visible(has_data)
+        for label in self.no_data_labels:
+            label.set_visible(not has_data)
+
+        time_format = '%m/%d' if trend['kind'] in ('day', 'week') else '%m/%d %H:%M'
+        time_labels = [moment.strftime(time_format) for moment in trend['times']]
+        self.hover_points = [
+            (self.win_line, [f"{label}: {rate:.1f}% win ({games} games)" for label, rate, games in zip(time_labels, trend['win_rates'], trend['games'])]),
+            (self.cubes_line, [f"{label}: {cubes:+d} cubes" for label, cubes in zip(time_labels, trend['net_cubes'])]),
+            (self.cumulative_line, [f"{label}: {cubes:+d} cubes in total" for label, cubes in zip(time_labels, trend['cumulative_cubes'])]),
+        ]
+
+        self.win_ax.set_title(f'Win Rate Over Time ({period_label})')
+        self.cubes_ax.set_ylabel(f'Net Cubes ({period_label})')
+        self.cubes_ax.set_title(f'Cube Progression ({period_label} & Cumulative)')
+
+        if has_data:
+            # A lone point still gets a day either side
+            padding = (times[-1] - times[0]) * 0.05 or 1.0
+            self.win_ax.set_xlim(times[0] - padding, times[-1] + padding)
+            self.cubes_ax.set_xlim(times[0] - padding, times[-1] + padding)
+            self.win_ax.set_ylim(max(0, trend['win_rates'].min() - 10), min(100, trend['win_rates'].max() + 10))
+            for ax in (self.cubes_ax, self.cumulative_ax):
+                ax.relim()
+                ax.autoscale_view(scalex=False)
+
+            cumulative = trend['cumulative_cubes']
+            cumulative_color = colors['win'] if cumulative[-1] > 0 else colors['loss']
+            self.cumulative_line.set_color(cumulative_color)
+            self.cumulative_ax.yaxis.label.set_color(cumulative_color)
+            self.cumulative_ax.tick_params(axis='y', labelcolor=cumulative_color)
+            self.cumulative_ax.spines['right'].set_color(cumulative_color)
+
+def build_hit_map(regions, width, height):
+    """Rasterize hover regions into a (height, width) array of indexes into the returned texts (0: nothing),
+    so a pointer position is looked up in O(1). Later regions win where they overlap."""
+    hit_map = np.zeros((height, width), dtype=np.int32)
+    texts = [None]
+    for x0, y0, x1, y1, text in regions:
+        # Display y runs bottom up, image rows top down
+        left, right = max(int(x0), 0), min(int(np.ceil(x1)), width)
+        top, bottom = max(height - int(np.ceil(y1)), 0), min(height - int(y0), height)
+        if left < right and top < bottom:
+            hit_map[top:bottom, left:right] = len(texts)
+            texts.append(text)
+    return hit_map, texts
+
+class ChartRenderer:
+    """Renders the charts of every RasterCanvas on one worker thread, so matplotlib only ever draws there.
+    A newer job for the same canvas supersedes a queued one, and poll_results() on the Tk thread hands
+    back only the latest finished image (the same scheme as BackgroundQueryExecutor)."""
+    def __init__(self):
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._latest = {} # channel -> newest ticket
+        self._outstanding = 0
+        self._lock = threading.Lock()
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def submit(self, channel, render, on_result, on_error=None):
+        """Queue render() on the worker; on_result(result) runs later from poll_results()"""
+        with self._lock:
+            ticket = self._latest.get(channel, 0) + 1
+            self._latest[channel] = ticket
+            self._outstanding += 1
+        self._requests.put((channel, ticket, render, on_result, on_error))
+        return ticket
+
+    def has_pending(self):
+        with self._lock:
+            return self._outstanding > 0
+
+    def _is_current(self, channel, ticket):
+        with self._lock:
+            return self._latest.get(channel) == ticket
+
+    def _worker(self):
+        while True:
+            channel, ticket, render, on_result, on_error = self._requests.get()
+            if not self._is_current(channel, ticket):
+                self._results.put((channel, ticket, None, None)) # Superseded before it started
+                continue
+            try:
+                callback, value = on_result, render()
+            except Exception as e:
+                callback, value = on_error, e
+            self._results.put((channel, ticket, callback, value))
+
+    def poll_results(self):
+        """Deliver finished results on the calling (Tk) thread, dropping superseded ones"""
+        while True:
+            try:
+                channel, ticket, callback, value = self._results.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                self._outstanding -= 1
+            if callback and self._is_current(channel, ticket):
+                callback(value)
+
+class RasterCanvas:
+    """Stands in for FigureCanvasTkAgg when charts render off the Tk thread. The figure is drawn with Agg
+    on the ChartRenderer into an RGBA buffer, and the Tk thread only blits the finished image onto a
+    canvas. Hover text is looked up in a hit-test map built alongside the image."""
+    def __init__(self, figure, master, renderer, on_error=None):
+        self.figure = figure
+        self.agg = FigureCanvasAgg(figure)
+        self.renderer = renderer
+        self.on_error = on_error
+        self.widget = tk.Canvas(master, highlightthickness=0, borderwidth=0)
+        self.image_item = self.widget.create_image(0, 0, anchor='nw')
+        self.tip_box = self.widget.create_rectangle(0, 0, 0, 0, fill='#ffffe0', outline='#000000', state='hidden')
+        self.tip_text = self.widget.create_text(0, 0, anchor='nw', fill='#000000', state='hidden')
+        self.photo = None # Keeps the shown PhotoImage alive
+        self.hit_map, self.hit_texts = None, [None]
+        self.job = None # (chart, set_data args) of the latest update; re-rendered on resize
+        self.stale = False
+        self.size = None
+        self.poll_id = None
+        self.widget.bind("<Map>", self._on_map)
+        self.widget.bind("<Configure>", self._on_configure)
+        self.widget.bind("<Motion>", self._on_motion)
+        self.widget.bind("<Leave>", lambda event: self._hide_tip())
+
+    def get_tk_widget(self):
+        return self.widget
+
+    def render(self, chart, data):
+        self.job = (chart, data)
+        self._submit()
+
+    def _submit(self):
+        if self.job is None:
+            return
+        if not self.widget.winfo_viewable():
+            self.stale = True # Rendered when next mapped
+            return
+        self.stale = False
+        width, height = self.widget.winfo_width(), self.widget.winfo_height()
+        if width <= 1 or height <= 1: # Not laid out yet
+            width, height = (self.figure.get_size_inches() * self.figure.dpi).astype(int)
+        chart, data = self.job
+        self.renderer.submit(self, lambda: self._rasterize(chart, data, width, height), self._show, self.on_error)
+        if self.poll_id is None:
+            self.poll_id = self.widget.after(QUERY_POLL_INTERVAL_MS, self._poll)
+
+    def _rasterize(self, chart, data, width, height):
+        # Render thread: nothing here may touch Tk
+        self.figure.set_size_inches(width / self.figure.dpi, height / self.figure.dpi)
+        chart.set_data(*data)
+        chart._layout()
+        self.agg.draw()
+        width, height = self.agg.get_width_height()
+        image = Image.frombuffer("RGBA", (width, height), bytes(self.agg.buffer_rgba()), "raw", "RGBA", 0, 1)
+        hit_map, hit_texts = build_hit_map(chart.hover_regions(self.agg.get_renderer()), width, height)
+        return image, hit_map, hit_texts
+
+    def _show(self, result):
+        image, self.hit_map, self.hit_texts = result
+        self.photo = ImageTk.PhotoImage(image)
+        self.widget.itemconfigure(self.image_item, image=self.photo)
+
+    def _poll(self):
+        self.poll_id = None
+        self.renderer.poll_results()
+        if self.renderer.has_pending():
+            self.poll_id = self.widget.after(QUERY_POLL_INTERVAL_MS, self._poll)
+
+    def _on_map(self, event):
+        if self.stale:
+            self._submit()
+
+    def _on_configure(self, event):
+        if (event.width, event.height) != self.size:
+            self.size = (event.width, event.height)
+            self._submit()
+
+    def _on_motion(self, event):
+        hit = 0
+        if self.hit_map is not None and 0 <= event.y < self.hit_map.shape[0] and 0 <= event.x < self.hit_map.shape[1]:
+            hit = self.hit_map[event.y, event.x]
+        if not hit:
+            self._hide_tip()
+            return
+        self.widget.itemconfigure(self.tip_text, text=self.hit_texts[hit], state='normal')
+        self.widget.coords(self.tip_text, event.x + 12, event.y + 12)
+        x0, y0, x1, y1 = self.widget.bbox(self.tip_text)
+        self.widget.coords(self.tip_box, x0 - 3, y0 - 2, x1 + 3, y1 + 2)
+        self.widget.itemconfigure(self.tip_box, state='normal')
+        self.widget.tag_raise(self.tip_box)
+        self.widget.tag_raise(self.tip_text)
+
+    def _hide_tip(self):
+        self.widget.itemconfigure(self.tip_box, state='hidden')
+        self.widget.itemconfigure(self.tip_text, state='hidden')
@@ -0,0 +1,94 @@
+import numpy as np
+from statistics import NormalDist
+from .config import CONFIDENCE_LEVEL, WIN_RATE_PRIOR_GAMES, BOOTSTRAP_RESAMPLES
+
+# Upper bound on resample x sample draws held in memory at once by the bootstrap
+BOOTSTRAP_CHUNK_ELEMENTS = 1_000_000
+
+def _z_score(level):
+    return NormalDist().inv_cdf(0.5 + level / 2)
+
+def wilson_interval(wins, games, level=CONFIDENCE_LEVEL):
+    """Wilson score interval of wins/games for whole arrays at once. Returns (low, high) as fractions, NaN where games == 0"""
+    wins = np.asarray(wins, dtype=np.float64)
+    games = np.asarray(games, dtype=np.float64)
+    z = _z_score(level)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = wins / games
+        denom = 1 + z * z / games
+        center = (p + z * z / (2 * games)) / denom
+        half = z * np.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denom
+    empty = games <= 0
+    return np.where(empty, np.nan, center - half), np.where(empty, np.nan, center + half)
+
+def shrunk_win_rate(wins, games, prior_rate=None, prior_games=WIN_RATE_PRIOR_GAMES):
+    """Win rate with prior_games pseudo-games at prior_rate blended in (a beta-binomial posterior mean).
+    prior_rate may be a scalar or per-row array; by default it is the pooled rate over all rows."""
+    wins = np.asarray(wins, dtype=np.float64)
+    games = np.asarray(games, dtype=np.float64)
+    if prior_rate is None:
+        total_games = games.sum()
+        prior_rate = wins.sum() / total_games if total_games > 0 else 0.5
+    return (wins + np.asarray(prior_rate, dtype=np.float64) * prior_games) / (games + prior_games)
+
+def group_index(sample_keys, row_keys):
+    """Row position of each sample's key in row_keys, -1 where the key is not a row"""
+    row_keys = np.asarray([str(key) for key in row_keys])
+    sample_keys = np.asarray([str(key) for key in sample_keys])
+    if not len(row_keys) or not len(sample_keys):
+        return np.full(len(sample_keys), -1, dtype=np.int64)
+    order = np.argsort(row_keys)
+    pos = np.minimum(np.searchsorted(row_keys[order], sample_keys), len(row_keys) - 1)
+    return np.where(row_keys[order][pos] == sample_keys, order[pos], -1)
+
+def bootstrap_mean_interval(values, groups, n_groups, level=CONFIDENCE_LEVEL, resamples=BOOTSTRAP_RESAMPLES, seed=0):
+    """Percentile bootstrap interval of the mean of values within each group, all groups resampled together.
+    Returns (low, high) arrays of length n_groups, NaN for groups with fewer than 2 values."""
+    values = np.asarray(values, dtype=np.float64)
+    groups = np.asarray(groups, dtype=np.int64)
+    low, high = np.full(n_groups, np.nan), np.full(n_groups, np.nan)
+    keep = (groups >= 0) & (groups < n_groups)
+    values, groups = values[keep], groups[keep]
+
+    counts = np.bincount(groups, minlength=n_groups)
+    present = np.flatnonzero(counts >= 2)
+    if not len(present):
+        return low, high
+    in_present = counts[groups] >= 2
+    values, groups = values[in_present], groups[in_present]
+
+    # Lay each group's values out contiguously, so one resample is a single row of
+    # draws within [start, start + count) per value, summed per group with reduceat
+    order = np.argsort(groups, kind='stable')
+    values, groups = values[order], groups[order]
+    segment_starts = np.cumsum(counts[present]) - counts[present]
+    sample_starts = segment_starts[np.searchsorted(present, groups)]
+    sample_counts = counts[groups]
+
+    rng = np.random.default_rng(seed) # Fixed seed: the same data always shows the same interval
+    means = np.empty((resamples, len(present)))
+    chunk = max(1, BOOTSTRAP_CHUNK_ELEMENTS // len(values))
+    for first in range(0, resamples, chunk):
+        n = min(chunk, resamples - first)
+        draws = sample_starts + (rng.random((n, len(values))) * sample_counts).astype(np.int64)
+        means[first:first + n] = np.add.reduceat(values[draws], segment_starts, axis=1) / counts[present]
+
+    alpha = (1 - level) / 2
+    low[present], high[present] = np.quantile(means, [alpha, 1 - alpha], axis=0)
+    return low, high
+
+def win_rate_columns(wins, games, prior_rate=None, level=CONFIDENCE_LEVEL):
+    """Adjusted win %, and the Wilson interval bounds in %, for a stats table's rows"""
+    low, high = wilson_interval(wins, games, level)
+    return {
+        'adj_win_pct': shrunk_win_rate(wins, games, prior_rate) * 100,
+        'win_pct_low': low * 100,
+        'win_pct_high': high * 100,
+    }
+
+def confidence_columns(row_keys, wins, games, sample_keys, sample_cubes, level=CONFIDENCE_LEVEL):
+    """win_rate_columns plus bootstrap bounds of average cubes per row, given one (key, cubes) sample per game"""
+    columns = win_rate_columns(wins, games, level=level)
+    columns['avg_cubes_low'], columns['avg_cubes_high'] = bootstrap_mean_interval(
+        sample_cubes, group_index(sample_keys, row_keys), len(row_keys), level)
+    return columns
@@ -33,6 +33,19 @@ DECK_COLLECTION_CACHE = {"data": None, "last_mtime": 0}
 CARD_DATA_FILE = "card_data.json"
 CONFIG_FILE = "tracker_config.ini"
 CARD_IMAGES_DIR = "card_images"
+THUMBNAIL_ATLAS_INDEX = "thumbnail_atlas.json"
+HIDDEN_TAB_REFRESH_DELAY_MS = 3000  # Quiet period before stale hidden tabs refresh in the background
+QUERY_POLL_INTERVAL_MS = 30  # How often finished background queries are picked up while any are pending
+SEARCH_DEBOUNCE_MS = 250  # Typing pause before the history search runs
+CONFIDENCE_LEVEL = 0.95  # Two-sided level of the win rate and average cube intervals in the stats tables
+WIN_RATE_PRIOR_GAMES = 10  # Pseudo-games of the baseline win rate blended into adjusted win rates
+BOOTSTRAP_RESAMPLES = 1000  # Resamples behind the average cube intervals
+HISTORY_PAGE_SIZE = 200  # Match history rows materialized per page as the list is scrolled
+TREND_SESSION_GAP_MINUTES = 30  # A longer pause between games starts a new session in the Trends tab
+LIVE_VIEW_REPORT_TICKS = 200  # Live update ticks between debug reports of how many widgets were updated
+THUMBNAIL_SIZE_BUCKET_PX = 8  # Deck modal card thumbnails are sized down to multiples of this, so small resizes reuse them
+THUMBNAIL_CACHE_MAX_BYTES = 32 * 1024 * 1024  # Decoded pixels kept in the card thumbnail cache before the least recently used are dropped
+THUMBNAIL_ATLAS_SIZES = (96, 144, 192)  # Widths (px) of the prebuilt deck modal and tooltip thumbnails in the atlas
 
 # Default theme colors
 DEFAULT_COLORS = {
@@ -61,7 +74,8 @@ def get_config():
             'check_for_app_updates': 'True',
             'card_name_display': 'True',
             'update_interval': '1500',
-            'max_error_log_entries': '50'
+            'max_error_log_entries': '50',
+            'background_chart_rendering': 'False'
         }
         
     if 'CardDB' not in config:
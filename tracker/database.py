@@ -1,12 +1,11 @@
-import os, sqlite3, json, hashlib, csv, time, traceback
-from collections import Counter
+import os, sqlite3, json, hashlib, csv, time, datetime, traceback, re, threading, queue
+from collections import Counter, defaultdict
+import numpy as np
 from .config import DB_NAME, VERSION
 from .utils import build_id_map, resolve_ref, extract_cards_with_details
 
-def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
+def _migrate_base_schema(cursor):
+    """Create core tables and bring pre-migration databases up to date"""
     # Create tables if they don't exist
     cursor.execute('''CREATE TABLE IF NOT EXISTS decks (
                         id INTEGER PRIMARY KEY AUTOINCREMENT, 
@@ -52,95 +51,1293 @@ def init_db():
                         details_json TEXT, 
                         FOREIGN KEY (game_id) REFERENCES matches(game_id) ON DELETE CASCADE)''')
     
-    # Function to add columns if they don't exist
+    # Function to add columns if they don't exist (databases created by older versions)
     def add_column_if_not_exists(table_name, column_name, column_type):
         cursor.execute(f"PRAGMA table_info({table_name})")
         column_exists = any(col[1] == column_name for col in cursor.fetchall())
         if not column_exists:
             print(f"Adding column {column_name} to table {table_name}...")
-            try:
-                 cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}")
-                 print(f"Successfully added column {column_name}.")
-            except sqlite3.OperationalError as e:
-                 print(f"Could not add column {column_name} to {table_name}: {e}") # Catch specific error if needed
-        # else: # Optional: Print if column already exists
-        #     print(f"Column {column_name} already exists in table {table_name}.")
-
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}")
+            print(f"Successfully added column {column_name}.")
 
     # Add new columns to matches table
-    try:
-        match_cols_to_add = {
-            "loc_1_def_id": "TEXT", 
-            "loc_2_def_id": "TEXT", 
-            "loc_3_def_id": "TEXT", 
-            "snap_turn_player": "INTEGER", 
-            "snap_turn_opponent": "INTEGER", 
-            "final_snap_state": "TEXT", 
-            "opp_revealed_cards_json": "TEXT",
-            "season": "TEXT",
-            "rank": "TEXT",
-            "notes": "TEXT"
-        }
-        for col, typ in match_cols_to_add.items(): 
-            add_column_if_not_exists("matches", col, typ)
-    except sqlite3.Error as e: 
-        print(f"DB Error altering matches table structure: {e}")
+    match_cols_to_add = {
+        "loc_1_def_id": "TEXT", 
+        "loc_2_def_id": "TEXT", 
+        "loc_3_def_id": "TEXT", 
+        "snap_turn_player": "INTEGER", 
+        "snap_turn_opponent": "INTEGER", 
+        "final_snap_state": "TEXT", 
+        "opp_revealed_cards_json": "TEXT",
+        "season": "TEXT",
+        "rank": "TEXT",
+        "notes": "TEXT"
+    }
+    for col, typ in match_cols_to_add.items(): 
+        add_column_if_not_exists("matches", col, typ)
     
     # Add new columns to decks table
-    try:
-        deck_cols_to_add = {
-            "collection_deck_id": "TEXT", 
-            "last_used": "TIMESTAMP",
-            "tags": "TEXT"
-        }
-        for col, typ in deck_cols_to_add.items(): 
-            add_column_if_not_exists("decks", col, typ)
-        
-        # Ensure last_used is populated if the column exists
-        cursor.execute("PRAGMA table_info(decks)")
-        deck_columns = [info[1] for info in cursor.fetchall()]
-        if 'last_used' in deck_columns and 'first_seen' in deck_columns:
-             cursor.execute("UPDATE decks SET last_used = first_seen WHERE last_used IS NULL")
-    except sqlite3.Error as e: 
-        print(f"DB Error altering decks table structure: {e}")
+    deck_cols_to_add = {
+        "collection_deck_id": "TEXT", 
+        "last_used": "TIMESTAMP",
+        "tags": "TEXT"
+    }
+    for col, typ in deck_cols_to_add.items(): 
+        add_column_if_not_exists("decks", col, typ)
+    
+    # Populate last_used for decks recorded before the column existed
+    cursor.execute("UPDATE decks SET last_used = first_seen WHERE last_used IS NULL")
     
     # Create indexes for better performance
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_match_deck_id ON matches (deck_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_match_timestamp ON matches (timestamp_ended)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_match_opponent ON matches (opponent_player_name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_match_result ON matches (result)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_game_id ON match_events (game_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_card_id ON match_events (card_def_id)")
+
+    # --- Handle UNIQUE index creation carefully ---
     try:
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_match_deck_id ON matches (deck_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_match_timestamp ON matches (timestamp_ended)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_match_opponent ON matches (opponent_player_name)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_match_result ON matches (result)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_game_id ON match_events (game_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_card_id ON match_events (card_def_id)")
-
-        # --- Handle UNIQUE index creation carefully ---
+        _create_legacy_unique_events_index(cursor)
+    except sqlite3.IntegrityError:
+        print("-----------------------------------------------------------")
+        print("WARNING: Could not create unique index on 'match_events'.")
+        print("This usually means duplicate events already exist in your database.")
+        print("Duplicates are collapsed when the events table is rebuilt")
+        print("by a later migration.")
+        print("-----------------------------------------------------------")
+        # Do not fail the migration, allow the application to continue starting.
+
+def _create_legacy_unique_events_index(cursor):
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uidx_events_unique 
+        ON match_events(game_id, turn, event_type, player_type, card_def_id, 
+                        location_index, source_zone, target_zone, details_json)
+    """)
+
+def _migrate_deck_cards(cursor):
+    """Add normalized deck_cards table backfilled from decks.card_ids_json"""
+    # The primary key doubles as the deck_id index; card lookups get their own index
+    cursor.execute('''CREATE TABLE IF NOT EXISTS deck_cards (
+                        deck_id INTEGER NOT NULL, 
+                        card_def_id TEXT NOT NULL, 
+                        PRIMARY KEY (deck_id, card_def_id), 
+                        FOREIGN KEY (deck_id) REFERENCES decks(id) ON DELETE CASCADE) WITHOUT ROWID''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_deck_cards_card_id ON deck_cards (card_def_id)")
+    
+    cursor.execute("SELECT id, card_ids_json FROM decks")
+    for deck_id, card_ids_json in cursor.fetchall():
         try:
-            cursor.execute("""
-                CREATE UNIQUE INDEX IF NOT EXISTS uidx_events_unique 
-                ON match_events(game_id, turn, event_type, player_type, card_def_id, 
-                                location_index, source_zone, target_zone, details_json)
+            card_ids = json.loads(card_ids_json) if card_ids_json else []
+        except (json.JSONDecodeError, TypeError):
+            print(f"WARN: Could not parse card_ids_json for deck {deck_id}, skipping: {card_ids_json}")
+            continue
+        cursor.executemany(
+            "INSERT OR IGNORE INTO deck_cards (deck_id, card_def_id) VALUES (?, ?)",
+            [(deck_id, card_id) for card_id in sorted(set(str(cid) for cid in card_ids if cid))]
+        )
+
+def _migrate_match_opp_cards(cursor):
+    """Add normalized match_opp_cards table backfilled from matches.opp_revealed_cards_json"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS match_opp_cards (
+                        game_id TEXT NOT NULL, 
+                        card_def_id TEXT NOT NULL, 
+                        PRIMARY KEY (game_id, card_def_id), 
+                        FOREIGN KEY (game_id) REFERENCES matches(game_id) ON DELETE CASCADE) WITHOUT ROWID''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_match_opp_cards_card_id ON match_opp_cards (card_def_id)")
+    
+    cursor.execute("SELECT game_id, opp_revealed_cards_json FROM matches WHERE opp_revealed_cards_json IS NOT NULL")
+    for game_id, opp_cards_json in cursor.fetchall():
+        try:
+            opp_cards = json.loads(opp_cards_json) if opp_cards_json else []
+        except (json.JSONDecodeError, TypeError):
+            print(f"WARN: Could not parse opp_revealed_cards_json for game {game_id}, skipping: {opp_cards_json}")
+            continue
+        if isinstance(opp_cards, list):
+            cursor.executemany(
+                "INSERT OR IGNORE INTO match_opp_cards (game_id, card_def_id) VALUES (?, ?)",
+                [(game_id, card_id) for card_id in sorted(set(str(cid) for cid in opp_cards if cid))]
+            )
+
+# Fixed codes for the event enums. New values seen at runtime are appended to
+# the event_codes table, so these seeds must never be renumbered.
+EVENT_TYPE_CODES = {'drawn': 1, 'played': 2}
+PLAYER_CODES = {'local': 1, 'opponent': 2}
+ZONE_CODES = {'Deck': 1, 'Hand': 2, 'Board': 3, 'Location': 4, 'Zone': 5}
+EVENT_SOURCE_CODES = {'reconciliation_end_game': 1}
+
+SEED_EVENT_CODES = {
+    'event_type': EVENT_TYPE_CODES,
+    'player': PLAYER_CODES,
+    'zone': ZONE_CODES,
+    'source': EVENT_SOURCE_CODES,
+}
+
+# (kind, name) -> code for event_codes rows already seen by this process
+EVENT_CODE_CACHE = {}
+
+# Zone strings look like 'Deck', 'Location2' or 'Zone48213': a name plus an optional integer ref
+ZONE_PATTERN = re.compile(r'([A-Za-z_]+?)(-?[0-9]+)')
+
+def clear_event_code_cache():
+    """Forget cached event codes (after a reset or a rolled back write)"""
+    EVENT_CODE_CACHE.clear()
+
+def get_event_code(cursor, kind, name):
+    """Look up the small-integer code for an event enum value, allocating one if new"""
+    if name is None:
+        return None
+    name = str(name)
+    key = (kind, name)
+    code = EVENT_CODE_CACHE.get(key)
+    if code is not None:
+        return code
+    
+    cursor.execute("SELECT code FROM event_codes WHERE kind = ? AND name = ?", key)
+    row = cursor.fetchone()
+    if row:
+        code = row[0]
+    else:
+        cursor.execute("SELECT COALESCE(MAX(code), 0) + 1 FROM event_codes WHERE kind = ?", (kind,))
+        code = cursor.fetchone()[0]
+        cursor.execute("INSERT INTO event_codes (kind, code, name) VALUES (?, ?, ?)", (kind, code, name))
+    EVENT_CODE_CACHE[key] = code
+    return code
+
+def load_event_code_names(cursor):
+    """Load the event code dictionary as {(kind, code): name}"""
+    cursor.execute("SELECT kind, code, name FROM event_codes")
+    return {(kind, code): name for kind, code, name in cursor.fetchall()}
+
+def _split_zone(zone):
+    """Split a zone string into (name, integer ref) so that name + str(ref) rebuilds it exactly"""
+    if zone is None:
+        return None, None
+    zone = str(zone)
+    match = ZONE_PATTERN.fullmatch(zone)
+    if match and str(int(match.group(2))) == match.group(2): # Leading zeros would not round-trip
+        return match.group(1), int(match.group(2))
+    return zone, None
+
+def _join_zone(name, ref):
+    if name is None:
+        return None
+    return name if ref is None else f"{name}{ref}"
+
+def _normalize_event_details(details):
+    """Parse event details into a dict, or return the raw text if it is not a JSON object"""
+    if details is None:
+        return {}
+    if isinstance(details, dict):
+        return dict(details)
+    if isinstance(details, str):
+        try:
+            parsed = json.loads(details)
+        except json.JSONDecodeError:
+            return details
+        return parsed if isinstance(parsed, dict) else details
+    return {}
+
+def _encode_event_fields(cursor, game_id, turn, event_type, player_type, card_def_id, location_index, source_zone, target_zone, details):
+    """Encode one event with its card as def_id text (the layout of migration 4), plus dedupe key"""
+    details = _normalize_event_details(details)
+    energy_spent = None
+    source_code = None
+    if isinstance(details, dict):
+        # Pull the common detail keys into typed columns; anything else stays in extra_json
+        if type(details.get('energy_spent')) is int:
+            energy_spent = details.pop('energy_spent')
+        if isinstance(details.get('source'), str):
+            source_code = get_event_code(cursor, 'source', details.pop('source'))
+        extra_json = json.dumps(details, sort_keys=True) if details else None
+    else:
+        extra_json = details # Raw, non-object details text is kept verbatim
+    
+    source_zone_name, source_zone_ref = _split_zone(source_zone)
+    target_zone_name, target_zone_ref = _split_zone(target_zone)
+    
+    row = (
+        game_id, turn,
+        get_event_code(cursor, 'event_type', event_type),
+        get_event_code(cursor, 'player', player_type),
+        card_def_id, location_index,
+        get_event_code(cursor, 'zone', source_zone_name), source_zone_ref,
+        get_event_code(cursor, 'zone', target_zone_name), target_zone_ref,
+        energy_spent, source_code, extra_json
+    )
+    # 64-bit key over every stored column; replaces the wide nine-column unique index
+    # repr() of a tuple of str/int/None is stable and cheaper than json.dumps here
+    digest = hashlib.blake2b(repr(row).encode('utf-8'), digest_size=8).digest()
+    return row + (int.from_bytes(digest, 'big', signed=True),)
+
+def encode_match_event(cursor, game_id, turn, event_type, player_type, card_def_id, location_index, source_zone, target_zone, details):
+    """Encode one event into a compact match_events row (without id)"""
+    row = _encode_event_fields(cursor, game_id, turn, event_type, player_type, card_def_id, location_index, source_zone, target_zone, details)
+    # The dedupe key stays computed over the def_id text, so it does not depend on interned ids
+    return row[:4] + (intern_card_def(cursor, row[4]),) + row[5:]
+
+def decode_match_event(code_names, row):
+    """Decode a compact event row into (turn, event_type, player_type, card_def_id,
+    location_index, source_zone, target_zone, details) with details a dict or raw text"""
+    (turn, event_type_code, player_code, card_def_id, location_index,
+     source_zone_code, source_zone_ref, target_zone_code, target_zone_ref,
+     energy_spent, source_code, extra_json) = row
+    
+    details = {}
+    if energy_spent is not None:
+        details['energy_spent'] = energy_spent
+    if source_code is not None:
+        details['source'] = code_names.get(('source', source_code), source_code)
+    if extra_json is not None:
+        try:
+            extra = json.loads(extra_json)
+        except json.JSONDecodeError:
+            extra = None
+        if isinstance(extra, dict):
+            details.update(extra)
+        else:
+            details = extra_json
+    
+    return (
+        turn,
+        code_names.get(('event_type', event_type_code), event_type_code),
+        code_names.get(('player', player_code), player_code),
+        card_def_id, location_index,
+        _join_zone(code_names.get(('zone', source_zone_code)), source_zone_ref),
+        _join_zone(code_names.get(('zone', target_zone_code)), target_zone_ref),
+        details
+    )
+
+MATCH_EVENT_COLUMNS = """game_id, turn, event_type_code, player_code, card_id, location_index, 
+             source_zone_code, source_zone_ref, target_zone_code, target_zone_ref, 
+             energy_spent, source_code, extra_json, dedupe_key"""
+
+def insert_match_events(cursor, events):
+    """Encode and insert events, skipping duplicates. events are tuples in record_match_event order"""
+    rows = [encode_match_event(cursor, *event) for event in events if event[0]]
+    cursor.executemany(f"""
+        INSERT OR IGNORE INTO match_events ({MATCH_EVENT_COLUMNS}) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+
+def get_match_events(game_id):
+    """Get the decoded events of a match in logged order"""
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+    try:
+        code_names = load_event_code_names(cursor)
+        cursor.execute("""
+            SELECT 
+                e.turn, e.event_type_code, e.player_code, cd.def_id, e.location_index, 
+                e.source_zone_code, e.source_zone_ref, e.target_zone_code, e.target_zone_ref, 
+                e.energy_spent, e.source_code, e.extra_json
+            FROM match_events e
+            LEFT JOIN card_defs cd ON cd.id = e.card_id
+            WHERE e.game_id = ? 
+            ORDER BY e.turn, e.id
+        """, (game_id,))
+        return [decode_match_event(code_names, row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+def remove_redundant_drawn_events():
+    """Keep only the first local 'drawn' event per card per game. Returns rows removed"""
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            DELETE FROM match_events
+            WHERE event_type_code = ? AND player_code = ? AND id NOT IN (
+                SELECT MIN(id)
+                FROM match_events
+                WHERE event_type_code = ? AND player_code = ?
+                GROUP BY game_id, card_id
+            )
+        """, (EVENT_TYPE_CODES['drawn'], PLAYER_CODES['local']) * 2)
+        removed = cursor.rowcount
+        conn.commit()
+        bump_write_generation()
+        return removed
+    finally:
+        conn.close()
+
+def _canonical_legacy_event(row):
+    """Comparable form of a legacy text event, for verifying the compact rebuild"""
+    details = _normalize_event_details(row[8])
+    details = json.dumps(details, sort_keys=True) if isinstance(details, dict) else details
+    return tuple(row[:8]) + (details,)
+
+def _migrate_compact_events(cursor):
+    """Rebuild match_events with integer-coded enums, typed detail columns and a 64-bit dedupe key"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS event_codes (
+                        kind TEXT NOT NULL, 
+                        code INTEGER NOT NULL, 
+                        name TEXT NOT NULL, 
+                        PRIMARY KEY (kind, code), 
+                        UNIQUE (kind, name)) WITHOUT ROWID''')
+    cursor.executemany(
+        "INSERT OR IGNORE INTO event_codes (kind, code, name) VALUES (?, ?, ?)",
+        [(kind, code, name) for kind, codes in SEED_EVENT_CODES.items() for name, code in codes.items()]
+    )
+    
+    cursor.execute('''CREATE TABLE match_events_compact (
+                        id INTEGER PRIMARY KEY, 
+                        game_id TEXT NOT NULL, 
+                        turn INTEGER, 
+                        event_type_code INTEGER, 
+                        player_code INTEGER, 
+                        card_def_id TEXT, 
+                        location_index INTEGER, 
+                        source_zone_code INTEGER, 
+                        source_zone_ref INTEGER, 
+                        target_zone_code INTEGER, 
+                        target_zone_ref INTEGER, 
+                        energy_spent INTEGER, 
+                        source_code INTEGER, 
+                        extra_json TEXT, 
+                        dedupe_key INTEGER NOT NULL, 
+                        FOREIGN KEY (game_id) REFERENCES matches(game_id) ON DELETE CASCADE)''')
+    cursor.execute("CREATE UNIQUE INDEX uidx_events_dedupe ON match_events_compact (dedupe_key)")
+    
+    cursor.execute("""
+        SELECT id, game_id, turn, event_type, player_type, card_def_id, 
+               location_index, source_zone, target_zone, details_json 
+        FROM match_events 
+        ORDER BY id
+    """)
+    legacy_rows = cursor.fetchall()
+    # Keep the original ids so events still list in logged order
+    compact_rows = [(row[0],) + _encode_event_fields(cursor, *row[1:]) for row in legacy_rows]
+    cursor.executemany("""
+        INSERT OR IGNORE INTO match_events_compact (
+            id, game_id, turn, event_type_code, player_code, card_def_id, location_index, 
+            source_zone_code, source_zone_ref, target_zone_code, target_zone_ref, 
+            energy_spent, source_code, extra_json, dedupe_key) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, compact_rows)
+    
+    # Verify the rebuild before dropping anything: every distinct legacy event must decode back exactly
+    code_names = load_event_code_names(cursor)
+    cursor.execute("""
+        SELECT 
+            game_id, turn, event_type_code, player_code, card_def_id, location_index, 
+            source_zone_code, source_zone_ref, target_zone_code, target_zone_ref, 
+            energy_spent, source_code, extra_json
+        FROM match_events_compact
+    """)
+    decoded = set()
+    for row in cursor.fetchall():
+        turn, event_type, player_type, card_def_id, location_index, source_zone, target_zone, details = decode_match_event(code_names, row[1:])
+        details = json.dumps(details, sort_keys=True) if isinstance(details, dict) else details
+        decoded.add((row[0], turn, event_type, player_type, card_def_id, location_index, source_zone, target_zone, details))
+    legacy = {_canonical_legacy_event(row[1:]) for row in legacy_rows}
+    if decoded != legacy:
+        raise sqlite3.DatabaseError(f"Compact event rebuild is not lossless ({len(legacy ^ decoded)} mismatched events)")
+    if len(compact_rows) != len(decoded):
+        print(f"Collapsed {len(compact_rows) - len(decoded)} exact duplicate events while rebuilding match_events")
+    
+    cursor.execute("DROP TABLE match_events")
+    cursor.execute("ALTER TABLE match_events_compact RENAME TO match_events")
+    cursor.execute("CREATE INDEX idx_events_game_id ON match_events (game_id)")
+    cursor.execute("CREATE INDEX idx_events_card_id ON match_events (card_def_id)")
+
+# Read-query results keyed by (query kind, normalized filter tuple). Every write path bumps
+# WRITE_GENERATION, which drops them all, so flipping between filters costs nothing until
+# the next recorded, deleted, imported or edited match.
+WRITE_GENERATION = 0
+QUERY_CACHE = {}
+QUERY_CACHE_LOCK = threading.Lock()
+QUERY_CACHE_MAX_ENTRIES = 128 # Free-text searches make the key space open-ended
+QUERY_PROGRESS_CHECK_OPS = 10000 # SQLite VM steps between superseded checks on worker queries
+
+def bump_write_generation():
+    """Invalidate every cached query result after a database write"""
+    global WRITE_GENERATION
+    with QUERY_CACHE_LOCK:
+        WRITE_GENERATION += 1
+        QUERY_CACHE.clear()
+
+def _normalize_filter_value(value):
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value, key=str))
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+def cached_query(kind, filters, compute):
+    """Return compute() for (kind, filters), reusing the result until the next database write.
+    Callers must treat the returned value as read-only"""
+    key = (kind, tuple(_normalize_filter_value(value) for value in filters))
+    with QUERY_CACHE_LOCK:
+        generation = WRITE_GENERATION
+        if key in QUERY_CACHE:
+            result = QUERY_CACHE.pop(key)
+            QUERY_CACHE[key] = result # Re-insert as most recently used
+            return result
+    
+    result = compute()
+    with QUERY_CACHE_LOCK:
+        # A write that landed while computing may not be reflected; don't keep it
+        if generation == WRITE_GENERATION:
+            QUERY_CACHE[key] = result
+            while len(QUERY_CACHE) > QUERY_CACHE_MAX_ENTRIES:
+                QUERY_CACHE.pop(next(iter(QUERY_CACHE)))
+    return result
+
+class BackgroundQueryExecutor:
+    """Runs read queries for the stats tabs on a worker thread.
+    Work is submitted per channel (usually one per tab). A newer submission supersedes the
+    older one: queued work is skipped, running SQL is cancelled with Connection.interrupt(),
+    and only the latest result is handed back by poll_results() on the UI thread."""
+    
+    def __init__(self):
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._latest = {} # channel -> newest ticket
+        self._running = None # (channel, ticket, connection) of the job executing now
+        self._outstanding = 0
+        self._lock = threading.Lock()
+        threading.Thread(target=self._worker, daemon=True).start()
+    
+    def submit(self, channel, compute, on_result, on_error=None):
+        """Queue compute(conn) on the worker; on_result(result) runs later from poll_results()"""
+        with self._lock:
+            ticket = self._latest.get(channel, 0) + 1
+            self._latest[channel] = ticket
+            self._outstanding += 1
+            if self._running and self._running[0] == channel:
+                self._running[2].interrupt()
+        self._requests.put((channel, ticket, compute, on_result, on_error))
+        return ticket
+    
+    def has_pending(self):
+        with self._lock:
+            return self._outstanding > 0
+    
+    def _is_current(self, channel, ticket):
+        with self._lock:
+            return self._latest.get(channel) == ticket
+    
+    def _worker(self):
+        while True:
+            channel, ticket, compute, on_result, on_error = self._requests.get()
+            if not self._is_current(channel, ticket):
+                self._results.put((channel, ticket, None, None)) # Superseded before it started
+                continue
+            
+            # A connection per job, so nothing holds the database file open between queries
+            conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+            # interrupt() is lost on a job superseded before its SQL starts, so statements also check the ticket
+            conn.set_progress_handler(lambda: not self._is_current(channel, ticket), QUERY_PROGRESS_CHECK_OPS)
+            with self._lock:
+                self._running = (channel, ticket, conn)
+            try:
+                callback, value = on_result, compute(conn)
+            except Exception as e:
+                callback, value = on_error, e # Includes "interrupted" for superseded jobs
+            finally:
+                with self._lock:
+                    self._running = None
+                conn.close()
+            self._results.put((channel, ticket, callback, value))
+    
+    def poll_results(self):
+        """Deliver finished results on the calling (UI) thread, dropping superseded ones"""
+        while True:
+            try:
+                channel, ticket, callback, value = self._results.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                self._outstanding -= 1
+            if callback and self._is_current(channel, ticket):
+                callback(value)
+
+# Process-wide bidirectional intern map for card_defs: def_id <-> integer id.
+# Shared by every connection in the process, so updates happen under the lock.
+CARD_DEF_IDS = {}
+CARD_DEF_NAMES = {}
+CARD_DEF_LOCK = threading.Lock()
+
+def clear_intern_caches():
+    """Forget cached card_defs ids and event codes (after a reset or a rolled back write)"""
+    with CARD_DEF_LOCK:
+        CARD_DEF_IDS.clear()
+        CARD_DEF_NAMES.clear()
+    clear_event_code_cache()
+
+def intern_card_def(cursor, def_id, kind='card'):
+    """Get the integer card_defs id for a card or location def_id, adding it if new"""
+    if not def_id:
+        return None
+    def_id = str(def_id)
+    card_id = CARD_DEF_IDS.get(def_id)
+    if card_id is not None:
+        return card_id
+    
+    with CARD_DEF_LOCK:
+        cursor.execute("INSERT OR IGNORE INTO card_defs (def_id, kind) VALUES (?, ?)", (def_id, kind))
+        cursor.execute("SELECT id FROM card_defs WHERE def_id = ?", (def_id,))
+        card_id = cursor.fetchone()[0]
+        CARD_DEF_IDS[def_id] = card_id
+        CARD_DEF_NAMES[card_id] = def_id
+    return card_id
+
+def get_card_def_id(cursor, card_id):
+    """Get the def_id text for an integer card_defs id"""
+    if card_id is None:
+        return None
+    def_id = CARD_DEF_NAMES.get(card_id)
+    if def_id is not None:
+        return def_id
+    
+    cursor.execute("SELECT def_id FROM card_defs WHERE id = ?", (card_id,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    with CARD_DEF_LOCK:
+        CARD_DEF_IDS[row[0]] = card_id
+        CARD_DEF_NAMES[card_id] = row[0]
+    return row[0]
+
+def insert_deck_cards(cursor, deck_id, card_ids_list):
+    """Store the unique cards of a deck in the normalized deck_cards table"""
+    unique_card_ids = sorted(set(str(cid) for cid in card_ids_list if cid)) if card_ids_list else []
+    cursor.executemany(
+        "INSERT OR IGNORE INTO deck_cards (deck_id, card_id) VALUES (?, ?)",
+        [(deck_id, intern_card_def(cursor, card_id)) for card_id in unique_card_ids]
+    )
+
+def insert_match_opp_cards(cursor, game_id, opp_card_ids_list):
+    """Store the unique cards an opponent revealed in a match in match_opp_cards"""
+    unique_card_ids = sorted(set(str(cid) for cid in opp_card_ids_list if cid)) if opp_card_ids_list else []
+    cursor.executemany(
+        "INSERT OR IGNORE INTO match_opp_cards (game_id, card_id) VALUES (?, ?)",
+        [(game_id, intern_card_def(cursor, card_id)) for card_id in unique_card_ids]
+    )
+
+def insert_match_locations(cursor, game_id, location_def_ids):
+    """Store a match's locations in match_locations, one row per filled slot (1-3, left to right)"""
+    cursor.executemany(
+        "INSERT OR REPLACE INTO match_locations (game_id, slot, location_id) VALUES (?, ?, ?)",
+        [(game_id, slot, intern_card_def(cursor, str(loc), 'location'))
+         for slot, loc in enumerate(list(location_def_ids or [])[:3], start=1) if loc]
+    )
+
+def _migrate_card_defs(cursor):
+    """Intern card and location def ids into card_defs and reference them by integer id"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS card_defs (
+                        id INTEGER PRIMARY KEY, 
+                        def_id TEXT NOT NULL UNIQUE, 
+                        kind TEXT NOT NULL DEFAULT 'card')''')
+    
+    # Locations first so they keep kind 'location' if an id somehow shows up in both roles
+    cursor.execute("""
+        INSERT OR IGNORE INTO card_defs (def_id, kind)
+        SELECT loc, 'location' FROM (
+            SELECT loc_1_def_id AS loc FROM matches
+            UNION SELECT loc_2_def_id FROM matches
+            UNION SELECT loc_3_def_id FROM matches
+        ) WHERE loc IS NOT NULL AND loc != ''
+    """)
+    cursor.execute("""
+        INSERT OR IGNORE INTO card_defs (def_id, kind)
+        SELECT card_def_id, 'card' FROM (
+            SELECT card_def_id FROM deck_cards
+            UNION SELECT card_def_id FROM match_opp_cards
+            UNION SELECT card_def_id FROM match_events
+        ) WHERE card_def_id IS NOT NULL AND card_def_id != ''
+    """)
+    
+    cursor.execute('''CREATE TABLE deck_cards_interned (
+                        deck_id INTEGER NOT NULL, 
+                        card_id INTEGER NOT NULL, 
+                        PRIMARY KEY (deck_id, card_id), 
+                        FOREIGN KEY (deck_id) REFERENCES decks(id) ON DELETE CASCADE, 
+                        FOREIGN KEY (card_id) REFERENCES card_defs(id)) WITHOUT ROWID''')
+    cursor.execute("""
+        INSERT INTO deck_cards_interned (deck_id, card_id)
+        SELECT dc.deck_id, cd.id FROM deck_cards dc JOIN card_defs cd ON cd.def_id = dc.card_def_id
+    """)
+    cursor.execute("DROP TABLE deck_cards")
+    cursor.execute("ALTER TABLE deck_cards_interned RENAME TO deck_cards")
+    cursor.execute("CREATE INDEX idx_deck_cards_card_id ON deck_cards (card_id)")
+    
+    cursor.execute('''CREATE TABLE match_opp_cards_interned (
+                        game_id TEXT NOT NULL, 
+                        card_id INTEGER NOT NULL, 
+                        PRIMARY KEY (game_id, card_id), 
+                        FOREIGN KEY (game_id) REFERENCES matches(game_id) ON DELETE CASCADE, 
+                        FOREIGN KEY (card_id) REFERENCES card_defs(id)) WITHOUT ROWID''')
+    cursor.execute("""
+        INSERT INTO match_opp_cards_interned (game_id, card_id)
+        SELECT oc.game_id, cd.id FROM match_opp_cards oc JOIN card_defs cd ON cd.def_id = oc.card_def_id
+    """)
+    cursor.execute("DROP TABLE match_opp_cards")
+    cursor.execute("ALTER TABLE match_opp_cards_interned RENAME TO match_opp_cards")
+    cursor.execute("CREATE INDEX idx_match_opp_cards_card_id ON match_opp_cards (card_id)")
+    
+    cursor.execute('''CREATE TABLE match_events_interned (
+                        id INTEGER PRIMARY KEY, 
+                        game_id TEXT NOT NULL, 
+                        turn INTEGER, 
+                        event_type_code INTEGER, 
+                        player_code INTEGER, 
+                        card_id INTEGER, 
+                        location_index INTEGER, 
+                        source_zone_code INTEGER, 
+                        source_zone_ref INTEGER, 
+                        target_zone_code INTEGER, 
+                        target_zone_ref INTEGER, 
+                        energy_spent INTEGER, 
+                        source_code INTEGER, 
+                        extra_json TEXT, 
+                        dedupe_key INTEGER NOT NULL, 
+                        FOREIGN KEY (game_id) REFERENCES matches(game_id) ON DELETE CASCADE, 
+                        FOREIGN KEY (card_id) REFERENCES card_defs(id))''')
+    # Dedupe keys were computed over def_id text and stay valid as they are
+    cursor.execute("""
+        INSERT INTO match_events_interned (
+            id, game_id, turn, event_type_code, player_code, card_id, location_index, 
+            source_zone_code, source_zone_ref, target_zone_code, target_zone_ref, 
+            energy_spent, source_code, extra_json, dedupe_key)
+        SELECT 
+            e.id, e.game_id, e.turn, e.event_type_code, e.player_code, cd.id, e.location_index, 
+            e.source_zone_code, e.source_zone_ref, e.target_zone_code, e.target_zone_ref, 
+            e.energy_spent, e.source_code, e.extra_json, e.dedupe_key
+        FROM match_events e
+        LEFT JOIN card_defs cd ON cd.def_id = e.card_def_id
+    """)
+    cursor.execute("DROP TABLE match_events")
+    cursor.execute("ALTER TABLE match_events_interned RENAME TO match_events")
+    cursor.execute("CREATE UNIQUE INDEX uidx_events_dedupe ON match_events (dedupe_key)")
+    cursor.execute("CREATE INDEX idx_events_game_id ON match_events (game_id)")
+    cursor.execute("CREATE INDEX idx_events_card_id ON match_events (card_id)")
+
+# SQL for the local-calendar day (days since 1970-01-01) of an epoch column,
+# matching epoch_to_local_day() on the Python side
+LOCAL_DAY_SQL = "CAST(julianday({0}, 'unixepoch', 'localtime') - 2440587.5 AS INTEGER)"
+
+# SQL display formats for matches.ended_at, with the text timestamp as fallback
+ENDED_AT_SHORT_SQL = "COALESCE(strftime('%y-%m-%d %H:%M', m.ended_at, 'unixepoch', 'localtime'), m.timestamp_ended)"
+ENDED_AT_LONG_SQL = "COALESCE(strftime('%Y-%m-%d %H:%M:%S', m.ended_at, 'unixepoch', 'localtime'), m.timestamp_ended)"
+
+# Match history sort key per column. Never NULL, so (key, game_id) row-value comparisons can page through them.
+HISTORY_SORT_KEY_SQL = {
+    "Timestamp": "COALESCE(m.ended_at, 0)",
+    "Deck": "COALESCE(d.deck_name, 'Unknown Deck')",
+    "Opponent": "COALESCE(m.opponent_player_name, '')",
+    "Result": "COALESCE(m.result, '')",
+    "Cubes": "COALESCE(m.cubes_changed, '')",
+    "Turns": "COALESCE(m.turns_taken, '')",
+    "Location1": "COALESCE(m.loc_1_def_id, '')",
+    "Location2": "COALESCE(m.loc_2_def_id, '')",
+    "Location3": "COALESCE(m.loc_3_def_id, '')",
+}
+
+def epoch_to_local_day(epoch_seconds):
+    """Local-calendar day number (days since 1970-01-01) of an epoch timestamp"""
+    return datetime.date.fromtimestamp(epoch_seconds).toordinal() - datetime.date(1970, 1, 1).toordinal()
+
+def current_local_day():
+    return epoch_to_local_day(time.time())
+
+def _migrate_epoch_timestamps(cursor):
+    """Add indexed ended_at epoch and local_day bucket columns to matches"""
+    cursor.execute("ALTER TABLE matches ADD COLUMN ended_at INTEGER")
+    cursor.execute("ALTER TABLE matches ADD COLUMN local_day INTEGER")
+    
+    # timestamp_ended stays the source of truth (it defaults to CURRENT_TIMESTAMP and CSV
+    # imports write it), so derive both columns from it on insert rather than in each writer
+    cursor.execute(f"""
+        UPDATE matches SET 
+            ended_at = CAST(strftime('%s', timestamp_ended) AS INTEGER),
+            local_day = {LOCAL_DAY_SQL.format("CAST(strftime('%s', timestamp_ended) AS INTEGER)")}
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_matches_epoch AFTER INSERT ON matches
+        WHEN NEW.ended_at IS NULL
+        BEGIN
+            UPDATE matches SET 
+                ended_at = CAST(strftime('%s', NEW.timestamp_ended) AS INTEGER),
+                local_day = {LOCAL_DAY_SQL.format("CAST(strftime('%s', NEW.timestamp_ended) AS INTEGER)")}
+            WHERE game_id = NEW.game_id;
+        END
+    """)
+    
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_match_ended_at ON matches (ended_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_match_local_day ON matches (local_day)")
+    # The text timestamp index is superseded by idx_match_ended_at
+    cursor.execute("DROP INDEX IF EXISTS idx_match_timestamp")
+
+# Aggregate tables maintained incrementally as matches are recorded, deleted or imported.
+# Each maps to its key columns; NULL keys are stored as 0 / '' so UPSERT conflicts match.
+ROLLUP_TABLES = {
+    'rollup_deck_season': ('deck_id', 'season'),
+    'rollup_opponent_deck_season': ('opponent', 'deck_id', 'season'),
+    'rollup_location_deck_season': ('location_id', 'deck_id', 'season'),
+    'rollup_day_deck_opponent': ('local_day', 'deck_id', 'opponent'),
+}
+ROLLUP_KEY_TYPES = {'deck_id': 'INTEGER', 'season': 'TEXT', 'opponent': 'TEXT', 'location_id': 'INTEGER', 'local_day': 'INTEGER'}
+# win_cube_games / loss_cube_games count only games with known cubes, so averages match SQL AVG()
+ROLLUP_STAT_COLUMNS = ('games', 'wins', 'losses', 'ties', 'net_cubes', 
+                       'win_cubes', 'win_cube_games', 'loss_cubes', 'loss_cube_games', 
+                       'snapped_games', 'snapped_wins')
+
+# Aggregate SQL over a matches-shaped row source, in ROLLUP_STAT_COLUMNS order
+ROLLUP_AGGREGATE_SQL = """
+    COUNT(*),
+    SUM(CASE WHEN result = 'win' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN result = 'loss' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN result = 'tie' THEN 1 ELSE 0 END),
+    COALESCE(SUM(cubes_changed), 0),
+    COALESCE(SUM(CASE WHEN result = 'win' THEN cubes_changed END), 0),
+    COUNT(CASE WHEN result = 'win' THEN cubes_changed END),
+    COALESCE(SUM(CASE WHEN result = 'loss' THEN cubes_changed END), 0),
+    COUNT(CASE WHEN result = 'loss' THEN cubes_changed END),
+    SUM(CASE WHEN snap_turn_player > 0 THEN 1 ELSE 0 END),
+    SUM(CASE WHEN snap_turn_player > 0 AND result = 'win' THEN 1 ELSE 0 END)
+"""
+
+def _create_rollup_tables(cursor):
+    stat_columns_sql = ", ".join(f"{col} INTEGER NOT NULL DEFAULT 0" for col in ROLLUP_STAT_COLUMNS)
+    for table, keys in ROLLUP_TABLES.items():
+        key_columns_sql = ", ".join(f"{key} {ROLLUP_KEY_TYPES[key]} NOT NULL" for key in keys)
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} ({key_columns_sql}, {stat_columns_sql}, PRIMARY KEY ({', '.join(keys)})) WITHOUT ROWID")
+
+def _rollup_deltas(result, cubes, snap_turn_player, sign):
+    """One match's contribution to every rollup stat column, multiplied by sign (+1 / -1)"""
+    is_win, is_loss = result == 'win', result == 'loss'
+    snapped = (snap_turn_player or 0) > 0
+    deltas = (
+        1, is_win, is_loss, result == 'tie', cubes or 0,
+        (cubes or 0) if is_win else 0, 1 if is_win and cubes is not None else 0,
+        (cubes or 0) if is_loss else 0, 1 if is_loss and cubes is not None else 0,
+        snapped, snapped and is_win,
+    )
+    return tuple(sign * int(value) for value in deltas)
+
+# Per-card cache behind the Card Stats tab. Keyed per deck rather than per deck-name filter,
+# since the filter is a multi-select; any filter is a SUM over its decks' rows.
+CARD_ROLLUP_TABLE = 'rollup_card_deck_season'
+CARD_ROLLUP_KEYS = ('card_id', 'deck_id', 'season')
+CARD_ROLLUP_STAT_COLUMNS = ('games', 'wins', 'cubes', 
+                            'drawn_games', 'drawn_wins', 'drawn_cubes', 
+                            'played_games', 'played_wins', 'played_cubes')
+
+def _create_card_rollup_table(cursor):
+    stat_columns_sql = ", ".join(f"{col} INTEGER NOT NULL DEFAULT 0" for col in CARD_ROLLUP_STAT_COLUMNS)
+    cursor.execute(f"""CREATE TABLE IF NOT EXISTS {CARD_ROLLUP_TABLE} (
+                        card_id INTEGER NOT NULL, deck_id INTEGER NOT NULL, season TEXT NOT NULL, 
+                        {stat_columns_sql}, PRIMARY KEY ({', '.join(CARD_ROLLUP_KEYS)})) WITHOUT ROWID""")
+
+def _card_stats_rows(cursor, match_filter_sql="", params=()):
+    """Per (card, deck, season) drawn/played totals for the filtered matches, computed with NumPy"""
+    # Materialize the filter once; rowid doubles as the dense match index (1..n),
+    # so the event scan below joins on it instead of binding one ? per game
+    cursor.execute("DROP TABLE IF EXISTS temp.card_stats_matches")
+    cursor.execute("""CREATE TEMP TABLE card_stats_matches (
+                        idx INTEGER PRIMARY KEY, game_id TEXT UNIQUE, 
+                        deck_id INTEGER, season TEXT, is_win INTEGER, cubes INTEGER)""")
+    cursor.execute(f"""
+        INSERT INTO temp.card_stats_matches (game_id, deck_id, season, is_win, cubes)
+        SELECT m.game_id, m.deck_id, COALESCE(m.season, ''), m.result = 'win', COALESCE(m.cubes_changed, 0)
+        FROM matches m
+        WHERE m.deck_id IS NOT NULL {match_filter_sql}
+    """, tuple(params))
+    
+    match_rows = cursor.execute("SELECT deck_id, season, is_win, cubes FROM temp.card_stats_matches ORDER BY idx").fetchall()
+    deck_card_rows = cursor.execute("""
+        SELECT dc.deck_id, dc.card_id 
+        FROM deck_cards dc 
+        WHERE dc.deck_id IN (SELECT DISTINCT deck_id FROM temp.card_stats_matches)
+        ORDER BY dc.deck_id, dc.card_id
+    """).fetchall()
+    # Distinct (match, card) pairs with a local drawn or played event. A played
+    # card must have been drawn, so any hit counts as drawn.
+    event_rows = cursor.execute(f"""
+        SELECT 
+            fm.idx - 1, e.card_id, MAX(e.event_type_code = {EVENT_TYPE_CODES['played']})
+        FROM 
+            temp.card_stats_matches fm
+        CROSS JOIN -- Drive from the filtered matches and probe idx_events_game_id; the temp table has no stats
+            match_events e ON e.game_id = fm.game_id
+        WHERE 
+            e.player_code = {PLAYER_CODES['local']} 
+            AND e.event_type_code IN ({EVENT_TYPE_CODES['drawn']}, {EVENT_TYPE_CODES['played']})
+        GROUP BY 
+            fm.idx, e.card_id
+    """).fetchall()
+    cursor.execute("DROP TABLE temp.card_stats_matches")
+    
+    if not match_rows or not deck_card_rows:
+        return []
+    
+    match_deck, match_season, match_win, match_cubes = zip(*match_rows)
+    match_win = np.array(match_win, dtype=np.int64)
+    match_cubes = np.array(match_cubes, dtype=np.int64)
+    
+    # Dense (deck, season) group per match, with per-group totals
+    seasons, match_season_idx = np.unique(np.array(match_season, dtype=object), return_inverse=True)
+    group_keys, match_group = np.unique(np.array(match_deck, dtype=np.int64) * len(seasons) + match_season_idx, return_inverse=True)
+    group_deck, group_season = group_keys // len(seasons), group_keys % len(seasons)
+    n_groups = len(group_keys)
+    group_games = np.bincount(match_group, minlength=n_groups)
+    group_wins = np.bincount(match_group, weights=match_win, minlength=n_groups)
+    group_cubes = np.bincount(match_group, weights=match_cubes, minlength=n_groups)
+    
+    # One (group, card) pair per card in the group's deck. deck_cards arrive sorted by
+    # (deck, card), so the pair keys come out sorted and can be probed with searchsorted.
+    dc_deck, dc_card = (np.array(col, dtype=np.int64) for col in zip(*deck_card_rows))
+    starts = np.searchsorted(dc_deck, group_deck, side='left')
+    counts = np.searchsorted(dc_deck, group_deck, side='right') - starts
+    pair_group = np.repeat(np.arange(n_groups), counts)
+    pair_card = dc_card[np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())]
+    card_space = int(dc_card.max()) + 1
+    pair_keys = pair_group * card_space + pair_card
+    n_pairs = len(pair_keys)
+    
+    stats = {
+        'games': group_games[pair_group], 'wins': group_wins[pair_group], 'cubes': group_cubes[pair_group],
+    }
+    for prefix in ('drawn', 'played'):
+        for suffix in ('games', 'wins', 'cubes'):
+            stats[f"{prefix}_{suffix}"] = np.zeros(n_pairs)
+    
+    if event_rows:
+        ev_match, ev_card, ev_played = (np.array(col, dtype=np.int64) for col in zip(*event_rows))
+        # Keep only events for cards that were in that match's deck (drops generated and stolen cards)
+        ev_keys = match_group[ev_match] * card_space + ev_card
+        ev_pair = np.minimum(np.searchsorted(pair_keys, ev_keys), n_pairs - 1)
+        in_deck = (pair_keys[ev_pair] == ev_keys) & (ev_card < card_space)
+        ev_pair, ev_match, ev_played = ev_pair[in_deck], ev_match[in_deck], ev_played[in_deck].astype(bool)
+        
+        for prefix, mask in (('drawn', slice(None)), ('played', ev_played)):
+            stats[f"{prefix}_games"] = np.bincount(ev_pair[mask], minlength=n_pairs)
+            stats[f"{prefix}_wins"] = np.bincount(ev_pair[mask], weights=match_win[ev_match[mask]], minlength=n_pairs)
+            stats[f"{prefix}_cubes"] = np.bincount(ev_pair[mask], weights=match_cubes[ev_match[mask]], minlength=n_pairs)
+    
+    # bincount weights come back as float64; all of these are exact integer sums
+    stat_lists = [stats[col].astype(np.int64).tolist() for col in CARD_ROLLUP_STAT_COLUMNS]
+    key_lists = [pair_card.tolist(), group_deck[pair_group].tolist(), seasons[group_season[pair_group]].tolist()]
+    return list(zip(*key_lists, *stat_lists))
+
+def apply_matches_to_card_stats(cursor, game_ids, sign):
+    """Add (sign=1) or remove (sign=-1) matches from the card stats cache. Matches and events must still exist"""
+    if not game_ids:
+        return
+    rows = _card_stats_rows(cursor, "AND m.game_id IN (SELECT value FROM json_each(?))", (json.dumps(list(game_ids)),))
+    if not rows:
+        return
+    columns = CARD_ROLLUP_KEYS + CARD_ROLLUP_STAT_COLUMNS
+    cursor.executemany(f"""
+        INSERT INTO {CARD_ROLLUP_TABLE} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})
+        ON CONFLICT ({', '.join(CARD_ROLLUP_KEYS)}) DO UPDATE SET 
+            {', '.join(f"{col} = {col} + excluded.{col}" for col in CARD_ROLLUP_STAT_COLUMNS)}
+    """, [row[:3] + tuple(sign * value for value in row[3:]) for row in rows])
+    if sign < 0:
+        cursor.execute(f"DELETE FROM {CARD_ROLLUP_TABLE} WHERE games <= 0")
+
+def apply_matches_to_rollups(cursor, game_ids, sign):
+    """Add (sign=1) or remove (sign=-1) matches from the rollup tables. The matches (and their events) must still exist"""
+    key_rows = {table: [] for table in ROLLUP_TABLES}
+    for game_id in game_ids:
+        cursor.execute("""
+            SELECT deck_id, season, opponent_player_name, local_day, result, cubes_changed, snap_turn_player
+            FROM matches WHERE game_id = ?
+        """, (game_id,))
+        row = cursor.fetchone()
+        if not row:
+            continue
+        deck_id, season, opponent, local_day, result, cubes, snap_turn_player = row
+        deck_id, season, opponent = deck_id or 0, season or '', opponent or ''
+        deltas = _rollup_deltas(result, cubes, snap_turn_player, sign)
+        
+        key_rows['rollup_deck_season'].append((deck_id, season) + deltas)
+        key_rows['rollup_opponent_deck_season'].append((opponent, deck_id, season) + deltas)
+        cursor.execute("SELECT location_id FROM match_locations WHERE game_id = ?", (game_id,))
+        for (location_id,) in cursor.fetchall(): # One row per filled slot
+            key_rows['rollup_location_deck_season'].append((location_id, deck_id, season) + deltas)
+        if local_day is not None:
+            key_rows['rollup_day_deck_opponent'].append((local_day, deck_id, opponent) + deltas)
+    
+    for table, rows in key_rows.items():
+        if not rows:
+            continue
+        keys = ROLLUP_TABLES[table]
+        columns = keys + ROLLUP_STAT_COLUMNS
+        cursor.executemany(f"""
+            INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})
+            ON CONFLICT ({', '.join(keys)}) DO UPDATE SET 
+                {', '.join(f"{col} = {col} + excluded.{col}" for col in ROLLUP_STAT_COLUMNS)}
+        """, rows)
+        if sign < 0:
+            cursor.execute(f"DELETE FROM {table} WHERE games <= 0") # Keep the tables O(groups)
+    
+    apply_matches_to_card_stats(cursor, game_ids, sign)
+
+def _rebuild_rollups(cursor, schema='main', location_rows_sql=None):
+    """Recompute every rollup table in schema from matches with set-based GROUP BYs.
+    location_rows_sql overrides the (location_id, deck_id, season, result, ...) row source"""
+    for table in ROLLUP_TABLES:
+        cursor.execute(f"DELETE FROM {schema}.{table}")
+    
+    cursor.execute(f"""
+        INSERT INTO {schema}.rollup_deck_season 
+        SELECT COALESCE(deck_id, 0), COALESCE(season, ''), {ROLLUP_AGGREGATE_SQL}
+        FROM matches GROUP BY 1, 2
+    """)
+    cursor.execute(f"""
+        INSERT INTO {schema}.rollup_opponent_deck_season 
+        SELECT COALESCE(opponent_player_name, ''), COALESCE(deck_id, 0), COALESCE(season, ''), {ROLLUP_AGGREGATE_SQL}
+        FROM matches GROUP BY 1, 2, 3
+    """)
+    
+    if location_rows_sql is None:
+        location_rows_sql = """
+            SELECT ml.location_id, m.deck_id, m.season, m.result, m.cubes_changed, m.snap_turn_player 
+            FROM match_locations ml JOIN matches m ON m.game_id = ml.game_id
+        """
+    cursor.execute(f"""
+        INSERT INTO {schema}.rollup_location_deck_season 
+        SELECT location_id, COALESCE(deck_id, 0), COALESCE(season, ''), {ROLLUP_AGGREGATE_SQL}
+        FROM ({location_rows_sql})
+        GROUP BY 1, 2, 3
+    """)
+    
+    cursor.execute(f"""
+        INSERT INTO {schema}.rollup_day_deck_opponent 
+        SELECT local_day, COALESCE(deck_id, 0), COALESCE(opponent_player_name, ''), {ROLLUP_AGGREGATE_SQL}
+        FROM matches WHERE local_day IS NOT NULL GROUP BY 1, 2, 3
+    """)
+
+def _rebuild_card_rollup(cursor, schema='main'):
+    """Recompute the card stats cache in schema from matches, deck_cards and events"""
+    cursor.execute(f"DELETE FROM {schema}.{CARD_ROLLUP_TABLE}")
+    columns = CARD_ROLLUP_KEYS + CARD_ROLLUP_STAT_COLUMNS
+    cursor.executemany(
+        f"INSERT INTO {schema}.{CARD_ROLLUP_TABLE} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})",
+        _card_stats_rows(cursor)
+    )
+
+def rebuild_rollups():
+    """Recompute match_locations, the rollup tables and the search index from scratch in one transaction"""
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN")
+        _rebuild_match_locations(cursor)
+        _rebuild_rollups(cursor)
+        _rebuild_card_rollup(cursor)
+        _rebuild_match_search(cursor)
+        conn.commit()
+        bump_write_generation()
+        cursor.execute("SELECT COALESCE(SUM(games), 0) FROM rollup_deck_season")
+        return cursor.fetchone()[0]
+    except sqlite3.Error:
+        conn.rollback()
+        clear_intern_caches()
+        raise
+    finally:
+        conn.close()
+
+def check_rollups():
+    """Recompute every rollup table into temp copies and count rows that differ, per table"""
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN")
+        tables = list(ROLLUP_TABLES) + [CARD_ROLLUP_TABLE]
+        for table in tables:
+            cursor.execute(f"CREATE TEMP TABLE {table} AS SELECT * FROM main.{table} WHERE 0")
+        _rebuild_rollups(cursor, 'temp')
+        _rebuild_card_rollup(cursor, 'temp')
+        
+        mismatches = {}
+        for table in tables:
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM (
+                    SELECT * FROM (SELECT * FROM main.{table} EXCEPT SELECT * FROM temp.{table})
+                    UNION ALL
+                    SELECT * FROM (SELECT * FROM temp.{table} EXCEPT SELECT * FROM main.{table})
+                )
             """)
-        except sqlite3.IntegrityError:
-            print("-----------------------------------------------------------")
-            print("WARNING: Could not create unique index on 'match_events'.")
-            print("This usually means duplicate events already exist in your database.")
-            print("Please use the 'Tools -> Database -> Clean Duplicate Events' menu")
-            print("option to remove duplicates. The index will be created automatically")
-            print("the next time the application starts after successful cleanup.")
-            print("-----------------------------------------------------------")
-            # Do not crash, allow the application to continue starting.
-            pass # Ignore the error for now.
-        except sqlite3.OperationalError as op_err:
-             # This might happen if the index exists but definition differs, etc.
-             print(f"Operational error creating unique index (might be ignorable): {op_err}")
-             pass
+            mismatches[table] = cursor.fetchone()[0]
+        return mismatches
+    finally:
+        # Nothing here is meant to persist (including locations interned by the rebuild)
+        conn.rollback()
+        clear_intern_caches()
+        conn.close()
 
-    except sqlite3.Error as e:
-         print(f"Error creating indexes: {e}")
+def delete_matches(game_ids):
+    """Delete matches with their events, revealed cards and locations, keeping the rollups in step"""
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+    deleted_count = 0
+    try:
+        cursor.execute("BEGIN")
+        apply_matches_to_rollups(cursor, game_ids, -1)
+        for game_id in game_ids:
+            # Delete associated rows first (foreign keys are not enforced)
+            cursor.execute("DELETE FROM match_events WHERE game_id = ?", (game_id,))
+            cursor.execute("DELETE FROM match_opp_cards WHERE game_id = ?", (game_id,))
+            cursor.execute("DELETE FROM match_locations WHERE game_id = ?", (game_id,))
+            cursor.execute("DELETE FROM matches WHERE game_id = ?", (game_id,))
+            deleted_count += cursor.rowcount
+        conn.commit()
+        bump_write_generation()
+        return deleted_count
+    except sqlite3.Error:
+        conn.rollback()
+        clear_intern_caches()
+        raise
+    finally:
+        conn.close()
 
+def update_match_note(game_id, note):
+    """Set the free-text note on a match"""
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        conn.execute("UPDATE matches SET notes = ? WHERE game_id = ?", (note, game_id))
+        conn.commit()
+    finally:
+        conn.close()
+    bump_write_generation()
 
-    conn.commit()
-    conn.close()
+def _migrate_rollups(cursor):
+    """Add incrementally maintained rollup tables for the stats tabs"""
+    _create_rollup_tables(cursor)
+    # match_locations does not exist yet at this version, so unpivot the matches columns here
+    location_slots_sql = " UNION ALL ".join(
+        f"SELECT loc_{n}_def_id AS loc, deck_id, season, result, cubes_changed, snap_turn_player FROM matches"
+        for n in range(1, 4)
+    )
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO card_defs (def_id, kind)
+        SELECT DISTINCT loc, 'location' FROM ({location_slots_sql}) WHERE loc IS NOT NULL AND loc != ''
+    """)
+    _rebuild_rollups(cursor, location_rows_sql=f"""
+        SELECT cd.id AS location_id, slots.deck_id, slots.season, slots.result, slots.cubes_changed, slots.snap_turn_player
+        FROM ({location_slots_sql}) AS slots JOIN card_defs cd ON cd.def_id = slots.loc
+    """)
+
+def _migrate_card_rollup(cursor):
+    """Add the per-card, per-deck, per-season cache behind the Card Stats tab"""
+    _create_card_rollup_table(cursor)
+    _rebuild_card_rollup(cursor)
+
+def _match_search_row_sql(rowid_filter):
+    """SELECT producing match_search rows (rowid first) for the matches passing rowid_filter"""
+    def_name_sql = "COALESCE(cd.name || ' ', '') || cd.def_id"
+    return f"""
+        SELECT 
+            m.rowid,
+            COALESCE(d.deck_name, ''),
+            COALESCE(m.opponent_player_name, ''),
+            TRIM(COALESCE(m.loc_1_def_id, '') || ' ' || COALESCE(m.loc_2_def_id, '') || ' ' || COALESCE(m.loc_3_def_id, '') || ' ' ||
+                 COALESCE((SELECT group_concat(cd.name, ' ') FROM card_defs cd 
+                           WHERE cd.def_id IN (m.loc_1_def_id, m.loc_2_def_id, m.loc_3_def_id) AND cd.name IS NOT NULL), '')),
+            COALESCE((SELECT group_concat({def_name_sql}, ' ') FROM match_opp_cards oc 
+                      JOIN card_defs cd ON cd.id = oc.card_id WHERE oc.game_id = m.game_id), ''),
+            COALESCE(m.notes, '')
+        FROM matches m
+        LEFT JOIN decks d ON d.id = m.deck_id
+        WHERE {rowid_filter}
+    """
+
+def _refresh_match_search_statements(rowid_filter):
+    """(delete, insert) statements that re-derive the match_search rows of the matches passing rowid_filter"""
+    return (f"DELETE FROM match_search WHERE rowid IN (SELECT m.rowid FROM matches m WHERE {rowid_filter})",
+            f"INSERT INTO match_search (rowid, deck_name, opponent, locations, revealed_cards, notes) {_match_search_row_sql(rowid_filter)}")
+
+def _migrate_match_search(cursor):
+    """Add card_defs.name and an FTS5 index over deck, opponent, location and revealed card names and notes"""
+    cursor.execute("ALTER TABLE card_defs ADD COLUMN name TEXT")
+    try:
+        cursor.execute("""CREATE VIRTUAL TABLE match_search USING fts5(
+                            deck_name, opponent, locations, revealed_cards, notes, 
+                            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')""")
+    except sqlite3.OperationalError as e:
+        # SQLite built without FTS5: history search keeps using LIKE
+        print(f"Full-text search unavailable ({e}); match history search will use LIKE.")
+        return
+    
+    # rowid is matches.rowid. The app never VACUUMs; Rebuild Statistics Tables re-derives the index.
+    triggers = {
+        'trg_match_search_insert': ("AFTER INSERT ON matches", "m.rowid = NEW.rowid"),
+        'trg_match_search_update': ("AFTER UPDATE OF deck_id, opponent_player_name, loc_1_def_id, loc_2_def_id, loc_3_def_id, notes ON matches", 
+                                    "m.rowid = NEW.rowid"),
+        'trg_match_search_deck': ("AFTER UPDATE OF deck_name ON decks", "m.deck_id = NEW.id"),
+        # Revealed cards are written after their match row
+        'trg_match_search_opp_insert': ("AFTER INSERT ON match_opp_cards", "m.game_id = NEW.game_id"),
+        'trg_match_search_opp_delete': ("AFTER DELETE ON match_opp_cards", "m.game_id = OLD.game_id"),
+    }
+    for name, (event, rowid_filter) in triggers.items():
+        trigger_body = "".join(f"{statement};" for statement in _refresh_match_search_statements(rowid_filter))
+        cursor.execute(f"CREATE TRIGGER {name} {event} BEGIN {trigger_body} END")
+    cursor.execute("CREATE TRIGGER trg_match_search_delete AFTER DELETE ON matches BEGIN DELETE FROM match_search WHERE rowid = OLD.rowid; END")
+    
+    cursor.execute(f"INSERT INTO match_search (rowid, deck_name, opponent, locations, revealed_cards, notes) {_match_search_row_sql('1')}")
+
+def match_search_available(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'match_search'")
+    return cursor.fetchone() is not None
+
+def _rebuild_match_search(cursor):
+    if not match_search_available(cursor):
+        return
+    cursor.execute("DELETE FROM match_search")
+    cursor.execute(f"INSERT INTO match_search (rowid, deck_name, opponent, locations, revealed_cards, notes) {_match_search_row_sql('1')}")
+
+def _sync_card_def_names(cursor, card_db):
+    """Copy display names from the card DB onto card_defs and re-index the matches that use them"""
+    cursor.execute("SELECT id, def_id, name FROM card_defs")
+    changed = []
+    for card_id, def_id, name in cursor.fetchall():
+        new_name = (card_db.get(def_id) or {}).get('name') or None
+        if new_name != name:
+            changed.append((new_name, card_id))
+    if not changed:
+        return 0
+    
+    cursor.executemany("UPDATE card_defs SET name = ? WHERE id = ?", changed)
+    if match_search_available(cursor):
+        cursor.execute("DROP TABLE IF EXISTS temp.renamed_card_defs")
+        cursor.execute("CREATE TEMP TABLE renamed_card_defs (id INTEGER PRIMARY KEY, def_id TEXT)")
+        cursor.execute("INSERT INTO temp.renamed_card_defs SELECT id, def_id FROM card_defs WHERE id IN (SELECT value FROM json_each(?))", 
+                       (json.dumps([card_id for _, card_id in changed]),))
+        affected = """(
+            m.loc_1_def_id IN (SELECT def_id FROM temp.renamed_card_defs) OR 
+            m.loc_2_def_id IN (SELECT def_id FROM temp.renamed_card_defs) OR 
+            m.loc_3_def_id IN (SELECT def_id FROM temp.renamed_card_defs) OR 
+            m.game_id IN (SELECT oc.game_id FROM match_opp_cards oc WHERE oc.card_id IN (SELECT id FROM temp.renamed_card_defs))
+        )"""
+        for statement in _refresh_match_search_statements(affected):
+            cursor.execute(statement)
+        cursor.execute("DROP TABLE temp.renamed_card_defs")
+    return len(changed)
+
+def sync_card_def_names(card_db):
+    """Refresh card_defs display names (and the search index) from a loaded card DB. Returns names changed"""
+    if not card_db:
+        return 0
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN")
+        changed = _sync_card_def_names(cursor, card_db)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    if changed:
+        bump_write_generation()
+    return changed
+
+def build_match_search_query(search_text):
+    """FTS5 MATCH expression for free-text input: every word must match, as a prefix. None if no words"""
+    words = re.findall(r"\w+", search_text or "")
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+def search_match_ids(search_text, limit=None):
+    """Game ids whose deck, opponent, location or revealed card names or notes match, best match first"""
+    fts_query = build_match_search_query(search_text)
+    if not fts_query:
+        return []
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        cursor = conn.cursor()
+        if not match_search_available(cursor):
+            return []
+        cursor.execute(f"""
+            SELECT m.game_id 
+            FROM match_search s 
+            JOIN matches m ON m.rowid = s.rowid 
+            WHERE match_search MATCH ? 
+            ORDER BY s.rank{' LIMIT ?' if limit else ''}
+        """, (fts_query, limit) if limit else (fts_query,))
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+# Unpivots matches.loc_N_def_id into (game_id, slot, location def) rows
+MATCH_LOCATION_SLOTS_SQL = " UNION ALL ".join(
+    f"SELECT game_id, {n} AS slot, loc_{n}_def_id AS loc FROM matches WHERE loc_{n}_def_id IS NOT NULL AND loc_{n}_def_id != ''"
+    for n in range(1, 4)
+)
+
+def _rebuild_match_locations(cursor):
+    """Re-derive match_locations from the location columns on matches"""
+    cursor.execute(f"INSERT OR IGNORE INTO card_defs (def_id, kind) SELECT DISTINCT loc, 'location' FROM ({MATCH_LOCATION_SLOTS_SQL})")
+    cursor.execute("DELETE FROM match_locations")
+    cursor.execute(f"""
+        INSERT INTO match_locations (game_id, slot, location_id)
+        SELECT slots.game_id, slots.slot, cd.id 
+        FROM ({MATCH_LOCATION_SLOTS_SQL}) AS slots JOIN card_defs cd ON cd.def_id = slots.loc
+    """)
+
+def _migrate_match_locations(cursor):
+    """Add match_locations, one indexed row per match location slot"""
+    cursor.execute('''CREATE TABLE match_locations (
+                        game_id TEXT NOT NULL, 
+                        slot INTEGER NOT NULL, 
+                        location_id INTEGER NOT NULL, 
+                        PRIMARY KEY (game_id, slot), 
+                        FOREIGN KEY (game_id) REFERENCES matches(game_id) ON DELETE CASCADE, 
+                        FOREIGN KEY (location_id) REFERENCES card_defs(id)) WITHOUT ROWID''')
+    # Covers per-location scans; slot is there for the per-slot breakdown
+    cursor.execute("CREATE INDEX idx_match_locations_location ON match_locations (location_id, slot)")
+    _rebuild_match_locations(cursor)
+
+# Ordered schema migrations. Step N brings the database to PRAGMA user_version N.
+# Append new steps to the end; never reorder or edit a step that has shipped.
+SCHEMA_MIGRATIONS = [
+    _migrate_base_schema,
+    _migrate_deck_cards,
+    _migrate_match_opp_cards,
+    _migrate_compact_events,
+    _migrate_card_defs,
+    _migrate_epoch_timestamps,
+    _migrate_rollups,
+    _migrate_card_rollup,
+    _migrate_match_search,
+    _migrate_match_locations,
+]
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def init_db():
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        current_version = get_schema_version(conn)
+        if current_version >= len(SCHEMA_MIGRATIONS):
+            return # Schema is current, nothing else to do on a warm start
+        
+        clear_intern_caches() # Ids cached for a previous (e.g. reset) database no longer apply
+        for version in range(current_version + 1, len(SCHEMA_MIGRATIONS) + 1):
+            migration = SCHEMA_MIGRATIONS[version - 1]
+            print(f"Applying database migration {version}: {migration.__doc__}")
+            cursor = conn.cursor()
+            try:
+                # Each step runs in its own transaction together with the version bump
+                cursor.execute("BEGIN")
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {version}")
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                clear_intern_caches()
+                print(f"DB Error applying migration {version}: {e}")
+                raise
+        bump_write_generation() # Covers a reset database being re-created
+    finally:
+        conn.close()
 
 def get_current_season_and_rank():
     """Try to determine the current season and rank from game files"""
@@ -148,8 +1345,9 @@ def get_current_season_and_rank():
     # For now, return defaults
     return "Unknown", "Unknown"
 
-def get_or_create_deck_id(card_ids_list, collection_deck_id, deck_name_override=None, card_db=None, tags=None):
-    conn = sqlite3.connect(DB_NAME)
+def get_or_create_deck_id(card_ids_list, collection_deck_id, deck_name_override=None, card_db=None, tags=None, conn=None):
+    own_conn = conn is None # The CSV import passes its connection so the deck joins its transaction
+    conn = conn or sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
     
     # Normalize card IDs list
@@ -206,16 +1404,21 @@ def get_or_create_deck_id(card_ids_list, collection_deck_id, deck_name_override=
         else:
             cursor.execute("UPDATE decks SET last_used = CURRENT_TIMESTAMP WHERE deck_hash = ?", (deck_hash,))
         
-        conn.commit()
-        conn.close()
+        if own_conn:
+            conn.commit()
+            conn.close()
+            bump_write_generation() # Deck names feed the filter lists
         return deck_id
     else:
         # Insert new deck
         cursor.execute("INSERT INTO decks (deck_name, card_ids_json, deck_hash, collection_deck_id, tags) VALUES (?, ?, ?, ?, ?)", 
                       (effective_deck_name, card_ids_json_for_db, deck_hash, collection_deck_id, tags_json))
         deck_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        insert_deck_cards(cursor, deck_id, card_ids_list)
+        if own_conn:
+            conn.commit()
+            conn.close()
+            bump_write_generation() # Deck names feed the filter lists
         return deck_id
 
 def record_match_event(game_id, turn, event_type, player_type, card_def_id, location_index, source_zone, target_zone, details_json_str):
@@ -223,22 +1426,19 @@ def record_match_event(game_id, turn, event_type, player_type, card_def_id, loca
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
     try:
-        # Ensure details_json_str is a string. If it's already a dict, dump it.
-        if isinstance(details_json_str, dict):
-            details_to_store = json.dumps(details_json_str)
-        elif isinstance(details_json_str, str):
-            details_to_store = details_json_str
-        else: # Fallback for None or other types
-            details_to_store = json.dumps({})
-
-        # Attempt to insert, ignoring if it's a duplicate (based on uidx_events_unique)
-        cursor.execute("""
-            INSERT OR IGNORE INTO match_events 
-            (game_id, turn, event_type, player_type, card_def_id, location_index, source_zone, target_zone, details_json) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (game_id, turn, event_type, player_type, card_def_id, location_index, source_zone, target_zone, details_to_store))
+        # details_json_str may be a dict, a JSON string or None; encoding handles all three.
+        # Duplicates are ignored based on uidx_events_dedupe.
+        # A late event for an already recorded match can change its drawn/played hits,
+        # so that match is re-applied to the card stats cache around the insert.
+        cursor.execute("BEGIN")
+        apply_matches_to_card_stats(cursor, [game_id], -1)
+        insert_match_events(cursor, [(game_id, turn, event_type, player_type, card_def_id, location_index, source_zone, target_zone, details_json_str)])
+        apply_matches_to_card_stats(cursor, [game_id], 1)
         conn.commit()
+        bump_write_generation()
     except sqlite3.Error as e: 
+        conn.rollback()
+        clear_intern_caches() # Ids allocated in the failed transaction were not saved
         print(f"DB error recording event for {game_id}: {e}")
     finally: 
         conn.close()
@@ -332,12 +1532,12 @@ def record_match_result(match_data, deck_collection_map, game_events_log, card_d
             opp_revealed_cards_json,
             season, rank
         ))
+        insert_match_opp_cards(cursor, match_data['game_id'], opp_revealed_cards)
+        insert_match_locations(cursor, match_data['game_id'], [loc1, loc2, loc3])
         
-        conn.commit()
-        print(f"Match recorded: {match_data['game_id']} - Deck: '{final_deck_name_for_db or 'Unknown Deck'}' - {match_data.get('result')} ({match_data.get('cubes_changed', '?')} cubes)")
-        
-        # Record match events
+        # Record match events (collected and inserted in the same transaction as the match)
         game_id_for_events = match_data['game_id']
+        events_to_record = []
         
         interim_events  = game_events_log.get(game_id_for_events, [])
         
@@ -363,11 +1563,11 @@ def record_match_result(match_data, deck_collection_map, game_events_log, card_d
         print(f"  Interim Played Logged (from interim events): {len(interim_played_logged_cards)} unique cards")
         
         # 1. Record all interim events (they have more detail like turn, location)
-        #    The INSERT OR IGNORE in record_match_event will handle potential duplicates
+        #    The INSERT OR IGNORE in insert_match_events will handle potential duplicates
         #    if this function is somehow called multiple times for the same game with same events.
         for event_dict in interim_events:
             # print(f"DEBUG record_match_result: Attempting to record event: {event_dict}")
-            record_match_event(
+            events_to_record.append((
                 game_id_for_events,
                 event_dict.get('turn'), 
                 event_dict.get('type'), 
@@ -377,7 +1577,7 @@ def record_match_result(match_data, deck_collection_map, game_events_log, card_d
                 event_dict.get('source_zone'), 
                 event_dict.get('target_zone'),
                 event_dict.get('details', {})
-            )
+            ))
             
         # 2. Reconcile Drawn Cards
         # We need to be careful here. The 'final_drawn_cards' is likely a list of *all* cards
@@ -395,17 +1595,17 @@ def record_match_result(match_data, deck_collection_map, game_events_log, card_d
         for card_def_id in final_drawn_cards:
             if card_def_id not in interim_drawn_logged_cards:
                 print(f"  RECONCILE_DRAWN: Game {game_id_for_events}, Card {card_def_id} in final_drawn but not in interim_drawn. Adding.")
-                record_match_event(
-                    game_id=game_id_for_events,
-                    turn=placeholder_turn_for_missed_events, # Or a special value like -1
-                    event_type='drawn',
-                    player_type='local',
-                    card_def_id=card_def_id,
-                    location_index=None, # Not known
-                    source_zone='Deck',  # Assumed
-                    target_zone='Hand',  # Assumed
-                    details_json_str={'source': 'reconciliation_end_game'}
-                )
+                events_to_record.append((
+                    game_id_for_events,
+                    placeholder_turn_for_missed_events, # Or a special value like -1
+                    'drawn',
+                    'local',
+                    card_def_id,
+                    None,    # location_index, not known
+                    'Deck',  # Assumed
+                    'Hand',  # Assumed
+                    {'source': 'reconciliation_end_game'}
+                ))
                 interim_drawn_logged_cards.add(card_def_id) # Add to set to avoid double-logging if present multiple times in final_drawn_cards
                 
         # 3. Reconcile Played Cards
@@ -413,22 +1613,35 @@ def record_match_result(match_data, deck_collection_map, game_events_log, card_d
         for card_def_id in final_played_cards:
             if card_def_id not in interim_played_logged_cards:
                 print(f"  RECONCILE_PLAYED: Game {game_id_for_events}, Card {card_def_id} in final_played but not in interim_played. Adding.")
-                record_match_event(
-                    game_id=game_id_for_events,
-                    turn=placeholder_turn_for_missed_events, # Or a special value
-                    event_type='played',
-                    player_type='local',
-                    card_def_id=card_def_id,
-                    location_index=None, # Not known from this list
-                    source_zone='Hand',  # Assumed
-                    target_zone='Board', # Assumed, could be more specific if needed (e.g., "Location_Unknown")
-                    details_json_str={'source': 'reconciliation_end_game'}
-                )
+                events_to_record.append((
+                    game_id_for_events,
+                    placeholder_turn_for_missed_events, # Or a special value
+                    'played',
+                    'local',
+                    card_def_id,
+                    None,    # location_index, not known from this list
+                    'Hand',  # Assumed
+                    'Board', # Assumed, could be more specific if needed (e.g., "Location_Unknown")
+                    {'source': 'reconciliation_end_game'}
+                ))
                 interim_played_logged_cards.add(card_def_id)                
         print(f"DEBUG record_match_result: Finished event reconciliation for game {game_id_for_events}.")
+        
+        insert_match_events(cursor, events_to_record)
+        # After the events, since the card stats cache counts drawn/played hits from them
+        apply_matches_to_rollups(cursor, [match_data['game_id']], 1)
+        if card_db:
+            _sync_card_def_names(cursor, card_db) # Names any card or location seen for the first time
+        
+        # Match, revealed cards, rollups and events land together or not at all
+        conn.commit()
+        bump_write_generation()
+        print(f"Match recorded: {match_data['game_id']} - Deck: '{final_deck_name_for_db or 'Unknown Deck'}' - {match_data.get('result')} ({match_data.get('cubes_changed', '?')} cubes)")
          
         return True
     except sqlite3.Error as e:
+        conn.rollback()
+        clear_intern_caches() # Ids allocated in the failed transaction were not saved
         print(f"DB error recording match {match_data.get('game_id', 'UNKNOWN_GAME_ID')}: {e}")
         return False
     finally:
@@ -866,7 +2079,7 @@ def export_match_history_to_csv(filename, deck_filter=None):
         query += " WHERE d.deck_name = ?"
         params.append(deck_filter)
     
-    query += " ORDER BY m.timestamp_ended DESC"
+    query += " ORDER BY m.ended_at DESC"
     
     cursor.execute(query, tuple(params))
     matches = cursor.fetchall()
@@ -928,7 +2141,7 @@ def import_match_history_from_csv(filename, card_db=None):
                 except (json.JSONDecodeError, TypeError):
                     deck_cards = []
                 
-                deck_id = get_or_create_deck_id(deck_cards, None, deck_name, card_db)
+                deck_id = get_or_create_deck_id(deck_cards, None, deck_name, card_db, conn=conn)
                 
                 # Insert match
                 cursor.execute("""
@@ -952,16 +2165,28 @@ def import_match_history_from_csv(filename, card_db=None):
                     row[17] if len(row) > 17 else None
                 ))
                 
+                if row[13]: # Opponent Revealed Cards
+                    try:
+                        opp_cards = json.loads(row[13])
+                    except (json.JSONDecodeError, TypeError):
+                        opp_cards = []
+                    if isinstance(opp_cards, list):
+                        insert_match_opp_cards(cursor, game_id, opp_cards)
+                insert_match_locations(cursor, game_id, [row[7], row[8], row[9]])
+                apply_matches_to_rollups(cursor, [game_id], 1)
+                
                 imported_count += 1
             
             conn.commit()
             conn.close()
+            bump_write_generation()
             
             return (True, f"Imported {imported_count} matches successfully. Skipped {skipped_count} duplicates.")
     
     except Exception as e:
         conn.rollback()
         conn.close()
+        clear_intern_caches()
         return (False, f"Error importing matches: {str(e)}")
 
 def check_for_updates():
@@ -972,59 +2197,59 @@ def check_for_updates():
     # 3. Offer to download and install if an update is available
     return False, VERSION
 
-def calculate_win_rate_over_time(deck_names_set=None, opponent_name=None, days=30):
-    """Calculate win rate over time for charting"""
-    conn = sqlite3.connect(DB_NAME)
+def calculate_card_performance(deck_names_set=None, season=None, conn=None):
+    """Read per-card drawn/played/not-drawn/not-played statistics from the card stats cache"""
+    own_conn = conn is None # Callers may pass a worker connection (e.g. to interrupt it)
+    conn = conn or sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
     
-    query = """
+    query = f"""
         SELECT 
-            date(m.timestamp_ended) as match_date,
-            COUNT(*) as total_matches,
-            SUM(CASE WHEN m.result = 'win' THEN 1 ELSE 0 END) as wins,
-            SUM(m.cubes_changed) as net_cubes
+            cd.def_id, {', '.join(f"SUM(r.{col})" for col in CARD_ROLLUP_STAT_COLUMNS)}
         FROM 
-            matches m
-        LEFT JOIN 
-            decks d ON m.deck_id = d.id
-        WHERE 
-            m.timestamp_ended >= date('now', ?)
+            {CARD_ROLLUP_TABLE} r
+        JOIN 
+            decks d ON r.deck_id = d.id
+        JOIN 
+            card_defs cd ON cd.id = r.card_id
+        WHERE 1=1
     """
-    
-    params = [f'-{days} days'] if days else ['-3650 days']  # Default to ~10 years if "All"
+    params = []
     
     if deck_names_set: # If not None and not empty
         placeholders = ', '.join(['?'] * len(deck_names_set))
         query += f" AND d.deck_name IN ({placeholders})"
         params.extend(list(deck_names_set))
     
-    if opponent_name and opponent_name != "All Opponents":
-        query += " AND m.opponent_player_name = ?"
-        params.append(opponent_name)
+    if season and season != "All Seasons":
+        query += " AND r.season = ?"
+        params.append(season)
     
-    query += " GROUP BY match_date ORDER BY match_date"
+    query += " GROUP BY r.card_id"
     
     cursor.execute(query, tuple(params))
-    results = cursor.fetchall()
-    
-    dates = []
-    win_rates = []
-    net_cubes_daily = []
-    
-    for row in results:
-        dates.append(row[0]) # match_date
-        total_daily_matches = row[1]
-        daily_wins = row[2]
-        daily_net_cubes = row[3]
-
-        win_rate = (daily_wins / total_daily_matches * 100) if total_daily_matches > 0 else 0
-        win_rates.append(win_rate)
-        net_cubes_daily.append(daily_net_cubes if daily_net_cubes is not None else 0)
+    rows = cursor.fetchall()
+    if own_conn:
+        conn.close()
     
-    conn.close()
+    card_performance = {}
+    for (card_def_id, total_games, total_wins, total_cubes, 
+         drawn_games, drawn_wins, drawn_cubes, 
+         played_games, played_wins, played_cubes) in rows:
+        card_performance[card_def_id] = {
+            "total_games_in_deck": total_games, # Games where this card was part of the deck used
+            "drawn_games": drawn_games, "drawn_wins": drawn_wins, "drawn_cubes": drawn_cubes,
+            "played_games": played_games, "played_wins": played_wins, "played_cubes": played_cubes,
+            "not_drawn_games": total_games - drawn_games, 
+            "not_drawn_wins": total_wins - drawn_wins, 
+            "not_drawn_cubes": total_cubes - drawn_cubes,
+            # Not played (but could have been drawn)
+            "not_played_games": total_games - played_games, 
+            "not_played_wins": total_wins - played_wins, 
+            "not_played_cubes": total_cubes - played_cubes,
+        }
     
-    return dates, win_rates, net_cubes_daily
-
+    return card_performance
 
 def calculate_matchup_statistics(deck_id=None):
     """Calculate statistics for deck vs opponent matchups"""
@@ -1034,54 +2259,64 @@ def calculate_matchup_statistics(deck_id=None):
     # Base query to get opponent matchup data
     query = """
         SELECT 
-            m.opponent_player_name,
-            COUNT(*) as matches,
-            SUM(CASE WHEN m.result = 'win' THEN 1 ELSE 0 END) as wins,
-            SUM(CASE WHEN m.result = 'loss' THEN 1 ELSE 0 END) as losses,
-            SUM(CASE WHEN m.result = 'tie' THEN 1 ELSE 0 END) as ties,
-            SUM(m.cubes_changed) as net_cubes,
-            GROUP_CONCAT(m.opp_revealed_cards_json, '|') as all_revealed_cards
+            r.opponent,
+            SUM(r.games) as matches,
+            SUM(r.wins) as wins,
+            SUM(r.losses) as losses,
+            SUM(r.ties) as ties,
+            SUM(r.net_cubes) as net_cubes
         FROM 
-            matches m
+            rollup_opponent_deck_season r
         WHERE 
-            m.opponent_player_name IS NOT NULL
-            AND m.opponent_player_name != 'Opponent'
+            r.opponent != ''
+            AND r.opponent != 'Opponent'
+    """
+    
+    # Top revealed cards per opponent, ranked inside SQLite
+    cards_query = """
+        SELECT opponent_player_name, def_id, times_seen
+        FROM (
+            SELECT 
+                m.opponent_player_name, cd.def_id, COUNT(*) as times_seen,
+                ROW_NUMBER() OVER (
+                    PARTITION BY m.opponent_player_name 
+                    ORDER BY COUNT(*) DESC, cd.def_id
+                ) as card_rank
+            FROM 
+                match_opp_cards oc
+            JOIN 
+                matches m ON m.game_id = oc.game_id
+            JOIN 
+                card_defs cd ON cd.id = oc.card_id
+            WHERE 
+                m.opponent_player_name IS NOT NULL
+                AND m.opponent_player_name != 'Opponent'
     """
     
     params = []
     
     if deck_id and deck_id != "all":
-        query += " AND m.deck_id = ?"
+        query += " AND r.deck_id = ?"
+        cards_query += " AND m.deck_id = ?"
         params.append(deck_id)
     
-    query += " GROUP BY m.opponent_player_name ORDER BY matches DESC, wins DESC"
+    query += " GROUP BY r.opponent ORDER BY matches DESC, wins DESC"
+    cards_query += " GROUP BY m.opponent_player_name, oc.card_id) WHERE card_rank <= 5"
     
     cursor.execute(query, tuple(params))
     opponent_data = cursor.fetchall()
     
+    cursor.execute(cards_query, tuple(params))
+    most_common_by_opponent = defaultdict(list)
+    for opp_name, card_def_id, times_seen in cursor.fetchall():
+        most_common_by_opponent[opp_name].append((card_def_id, times_seen))
+    
     matchup_stats = []
     
     for opponent in opponent_data:
-        name, matches, wins, losses, ties, net_cubes, all_revealed_cards = opponent
+        name, matches, wins, losses, ties, net_cubes = opponent
         win_rate = (wins / matches * 100) if matches > 0 else 0
-        
-        # Process revealed cards to find most common cards
-        all_card_lists = []
-        
-        if all_revealed_cards:
-            card_lists = all_revealed_cards.split('|')
-            for card_list_json in card_lists:
-                if card_list_json and card_list_json.lower() != 'null':
-                    try:
-                        card_list = json.loads(card_list_json)
-                        if card_list:
-                            all_card_lists.extend(card_list)
-                    except json.JSONDecodeError:
-                        pass
-        
-        # Count most frequent cards
-        card_counter = Counter(all_card_lists)
-        most_common_cards = card_counter.most_common(5)
+        most_common_cards = most_common_by_opponent.get(name, [])
         
         matchup_stats.append({
             'opponent': name,
@@ -1097,6 +2332,169 @@ def calculate_matchup_statistics(deck_id=None):
     
     conn.close()
     return matchup_stats
+
+def get_revealed_card_frequencies(opponent_name, deck_name=None, season=None, limit=20):
+    """Count how often an opponent revealed each card. Returns (card_counts, games_with_reveals)"""
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+    
+    filtered_matches_query = """
+        SELECT m.game_id
+        FROM matches m
+        LEFT JOIN decks d ON m.deck_id = d.id
+        WHERE m.opponent_player_name = ?
+    """
+    params = [opponent_name]
+    
+    if deck_name and deck_name != "All Decks":
+        filtered_matches_query += " AND d.deck_name = ?"
+        params.append(deck_name)
+    
+    if season and season != "All Seasons":
+        filtered_matches_query += " AND m.season = ?"
+        params.append(season)
+    
+    cursor.execute(f"""
+        SELECT COUNT(DISTINCT oc.game_id)
+        FROM match_opp_cards oc
+        WHERE oc.game_id IN ({filtered_matches_query})
+    """, tuple(params))
+    games_with_reveals = cursor.fetchone()[0]
+    
+    cursor.execute(f"""
+        SELECT cd.def_id, COUNT(*) as times_seen
+        FROM match_opp_cards oc
+        JOIN card_defs cd ON cd.id = oc.card_id
+        WHERE oc.game_id IN ({filtered_matches_query})
+        GROUP BY oc.card_id
+        ORDER BY times_seen DESC, cd.def_id
+        LIMIT ?
+    """, tuple(params) + (limit,))
+    card_counts = cursor.fetchall()
+    
+    conn.close()
+    return card_counts, games_with_reveals
+
+def get_matches_with_opponent_card(card_def_id, opponent_name=None):
+    """Get game_ids of matches where the opponent revealed the given card, newest first"""
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+    
+    query = """
+        SELECT m.game_id
+        FROM match_opp_cards oc
+        JOIN matches m ON m.game_id = oc.game_id
+        JOIN card_defs cd ON cd.id = oc.card_id
+        WHERE cd.def_id = ?
+    """
+    params = [card_def_id]
+    
+    if opponent_name:
+        query += " AND m.opponent_player_name = ?"
+        params.append(opponent_name)
+    
+    query += " ORDER BY m.ended_at DESC"
+    
+    cursor.execute(query, tuple(params))
+    game_ids = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    return game_ids
+
+def _match_stats_filter(deck_name=None, season=None, location_def_id=None):
+    """WHERE fragment and params over matches m / decks d (and match_locations ml, if location_def_id) for the stats queries"""
+    where_sql, params = "", []
+    if location_def_id:
+        where_sql += " AND ml.location_id = (SELECT id FROM card_defs WHERE def_id = ?)"
+        params.append(location_def_id)
+    if deck_name and deck_name != "All Decks":
+        where_sql += " AND d.deck_name = ?"
+        params.append(deck_name)
+    if season and season != "All Seasons":
+        where_sql += " AND m.season = ?"
+        params.append(season)
+    return where_sql, params
+
+def get_match_cube_samples(group_by, deck_name=None, season=None, conn=None):
+    """One (group key, cubes) row per game for the bootstrap intervals in the stats tables.
+    group_by is 'deck' (deck id), 'opponent' or 'location' (def id); unknown cubes count as 0, like the rollups"""
+    own_conn = conn is None
+    conn = conn or sqlite3.connect(DB_NAME)
+    key_sql, from_sql = {
+        'deck': ("m.deck_id", "matches m LEFT JOIN decks d ON d.id = m.deck_id"),
+        'opponent': ("m.opponent_player_name", "matches m LEFT JOIN decks d ON d.id = m.deck_id"),
+        'location': ("cd.def_id", """match_locations ml JOIN matches m ON m.game_id = ml.game_id
+                                     LEFT JOIN decks d ON d.id = m.deck_id JOIN card_defs cd ON cd.id = ml.location_id"""),
+    }[group_by]
+    where_sql, params = _match_stats_filter(deck_name, season)
+    try:
+        return conn.execute(f"SELECT {key_sql}, COALESCE(m.cubes_changed, 0) FROM {from_sql} WHERE {key_sql} IS NOT NULL {where_sql}",
+                            tuple(params)).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+
+def calculate_location_slot_statistics(deck_name=None, season=None, location_def_id=None, conn=None):
+    """Per (location, slot) results, slot 1-3 left to right. Rows: (def_id, slot, games, wins, losses, ties, net_cubes)"""
+    own_conn = conn is None
+    conn = conn or sqlite3.connect(DB_NAME)
+    where_sql, params = _match_stats_filter(deck_name, season, location_def_id)
+    try:
+        return conn.execute(f"""
+            SELECT
+                cd.def_id, ml.slot, COUNT(*),
+                SUM(m.result = 'win'), SUM(m.result = 'loss'), SUM(m.result = 'tie'),
+                COALESCE(SUM(m.cubes_changed), 0)
+            FROM
+                match_locations ml
+            JOIN
+                matches m ON m.game_id = ml.game_id
+            LEFT JOIN
+                decks d ON d.id = m.deck_id
+            JOIN
+                card_defs cd ON cd.id = ml.location_id
+            WHERE 1=1 {where_sql}
+            GROUP BY ml.location_id, ml.slot
+            ORDER BY cd.def_id, ml.slot
+        """, tuple(params)).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+
+def calculate_location_pair_statistics(deck_name=None, season=None, location_def_id=None, min_games=1, conn=None):
+    """Results for pairs of locations seen in the same match, most played first.
+    Rows: (def_id_a, def_id_b, games, wins, losses, ties, net_cubes). With location_def_id,
+    def_id_a is always that location and def_id_b its partner."""
+    own_conn = conn is None
+    conn = conn or sqlite3.connect(DB_NAME)
+    where_sql, params = _match_stats_filter(deck_name, season, location_def_id)
+    # Each unordered pair once, unless one side is pinned to the selected location
+    pair_sql = "other.location_id != ml.location_id" if location_def_id else "other.location_id > ml.location_id"
+    try:
+        return conn.execute(f"""
+            SELECT
+                cd_a.def_id, cd_b.def_id, COUNT(*),
+                SUM(m.result = 'win'), SUM(m.result = 'loss'), SUM(m.result = 'tie'),
+                COALESCE(SUM(m.cubes_changed), 0)
+            FROM
+                match_locations ml
+            JOIN
+                match_locations other ON other.game_id = ml.game_id AND {pair_sql}
+            JOIN
+                matches m ON m.game_id = ml.game_id
+            LEFT JOIN
+                decks d ON d.id = m.deck_id
+            JOIN
+                card_defs cd_a ON cd_a.id = ml.location_id
+            JOIN
+                card_defs cd_b ON cd_b.id = other.location_id
+            WHERE 1=1 {where_sql}
+            GROUP BY ml.location_id, other.location_id
+            HAVING COUNT(*) >= ?
+            ORDER BY COUNT(*) DESC, cd_a.def_id, cd_b.def_id
+        """, tuple(params) + (min_games,)).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
 
 def calculate_snap_statistics(deck_id=None):
     """Calculate snap-related statistics."""
@@ -0,0 +1,190 @@
+import os
+import json
+import time
+from collections import OrderedDict
+import numpy as np
+from PIL import Image, ImageTk
+from .config import CARD_IMAGES_DIR, THUMBNAIL_ATLAS_INDEX, THUMBNAIL_ATLAS_SIZES, THUMBNAIL_CACHE_MAX_BYTES, THUMBNAIL_SIZE_BUCKET_PX
+
+ATLAS_VERSION = 1
+
+def _greyed(pil_image):
+    """Drawn and played cards: greyscale under a darker overlay"""
+    pil_image = pil_image.convert('L').convert('RGBA')
+    overlay = Image.new('RGBA', pil_image.size, (100, 100, 100, 90))
+    return Image.alpha_composite(pil_image, overlay)
+
+def _fit(pil_image, max_width, max_height):
+    """Resized to fit within the box keeping its aspect ratio, or None if that leaves no pixels"""
+    img_w, img_h = pil_image.size
+    ratio = min(max_width / img_w, max_height / img_h)
+    new_w, new_h = int(img_w * ratio), int(img_h * ratio)
+    if new_w <= 0 or new_h <= 0:
+        return None
+    return pil_image.resize((new_w, new_h), Image.LANCZOS)
+
+def _atlas_key(card_id, size, greyed):
+    return f"{card_id}/{size}/{'greyed' if greyed else 'normal'}"
+
+def _read_atlas_index(images_dir):
+    try:
+        with open(os.path.join(images_dir, THUMBNAIL_ATLAS_INDEX), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return index if index.get('version') == ATLAS_VERSION else None
+
+def build_thumbnail_atlas(images_dir=CARD_IMAGES_DIR, sizes=THUMBNAIL_ATLAS_SIZES):
+    """Pack normal and greyed thumbnails of every card image, at each standard width, into one raw
+    pixel file with a JSON index. Returns the number of cards packed, or None if the atlas was up to date."""
+    sources = {
+        name[:-4]: os.path.getmtime(os.path.join(images_dir, name))
+        for name in os.listdir(images_dir) if name.endswith('.jpg')
+    }
+    index = _read_atlas_index(images_dir)
+    if (index and index.get('sizes') == list(sizes) and index.get('sources') == sources
+            and os.path.exists(os.path.join(images_dir, index['data_file']))):
+        return None
+
+    # A new data file each build: a mapped file can't be replaced on Windows
+    data_file = f"thumbnail_atlas_{int(time.time() * 1000)}.bin"
+    thumbnails = {}
+    offset = 0
+    with open(os.path.join(images_dir, data_file), 'wb') as f:
+        for card_id in sorted(sources):
+            try:
+                with Image.open(os.path.join(images_dir, f"{card_id}.jpg")) as source:
+                    # Greyed pixels are grey, so one channel holds them
+                    variants = ((False, source.convert('RGB')), (True, _greyed(source).convert('L')))
+            except OSError as e:
+                print(f"DEBUG: Skipping unreadable card image {card_id}: {e}")
+                continue
+            for size in sizes:
+                for greyed, pil_image in variants:
+                    thumbnail = _fit(pil_image, size, pil_image.height) # Never upscaled
+                    if thumbnail is None:
+                        continue
+                    pixels = thumbnail.tobytes()
+                    f.write(pixels)
+                    thumbnails[_atlas_key(card_id, size, greyed)] = [offset, thumbnail.width, thumbnail.height]
+                    offset += len(pixels)
+
+    index_path = os.path.join(images_dir, THUMBNAIL_ATLAS_INDEX)
+    with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'version': ATLAS_VERSION, 'sizes': list(sizes), 'data_file': data_file,
+                   'sources': sources, 'thumbnails': thumbnails}, f)
+    os.replace(index_path + '.tmp', index_path)
+
+    # Drop older data files; one still mapped (Windows) goes on a later build
+    for name in os.listdir(images_dir):
+        if name.startswith('thumbnail_atlas_') and name.endswith('.bin') and name != data_file:
+            try:
+                os.remove(os.path.join(images_dir, name))
+            except OSError:
+                pass
+    packed = len({key.split('/')[0] for key in thumbnails})
+    print(f"DEBUG: Built thumbnail atlas of {packed} cards ({offset // 1024} KB)")
+    return packed
+
+class ThumbnailAtlas:
+    """Memory-mapped thumbnails written by build_thumbnail_atlas. Lookups slice the mapping,
+    so no card art is decoded and only the pages of thumbnails actually shown are read."""
+    def __init__(self, pixels, sizes, thumbnails):
+        self.pixels = pixels
+        self.sizes = sizes
+        self.thumbnails = thumbnails # "card_id/size/variant" -> [offset, width, height]
+
+    @classmethod
+    def load(cls, images_dir=CARD_IMAGES_DIR):
+        """Map the current atlas; None if there is none yet"""
+        index = _read_atlas_index(images_dir)
+        if not index:
+            return None
+        try:
+            pixels = np.memmap(os.path.join(images_dir, index['data_file']), dtype=np.uint8, mode='r')
+        except (OSError, ValueError) as e: # Missing or empty data file
+            print(f"DEBUG: Could not map thumbnail atlas: {e}")
+            return None
+        return cls(pixels, index['sizes'], index['thumbnails'])
+
+    def get(self, card_id, max_width, max_height, greyed):
+        """Largest standard thumbnail within the box, unless fitting the box exactly would be over 4/3 its size"""
+        for size in sorted(self.sizes, reverse=True):
+            entry = self.thumbnails.get(_atlas_key(card_id, size, greyed))
+            if entry and entry[1] <= max_width and entry[2] <= max_height:
+                break
+        else:
+            return None
+        offset, width, height = entry
+        if min(max_width / width, max_height / height) > 4 / 3:
+            return None
+        mode, bands = ('L', 1) if greyed else ('RGB', 3)
+        return Image.frombuffer(mode, (width, height), self.pixels[offset:offset + width * height * bands], 'raw', mode, 0, 1)
+
+class CardThumbnailCache:
+    """Ready PhotoImages of card art per (card id, size bucket, status), so deck modal redraws for status
+    changes and resizes reuse thumbnails instead of decoding and resampling the JPGs again.
+    Misses are cut from the atlas when it has a close enough size, else decoded from card_images/.
+    The least recently used are dropped once their decoded pixels exceed max_bytes."""
+    def __init__(self, atlas=None, max_bytes=THUMBNAIL_CACHE_MAX_BYTES):
+        self.atlas = atlas # Swapped in whole when a new atlas is built
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # (card_id, width, height, status) -> (PhotoImage, bytes)
+        self.total_bytes = 0
+
+    def _key(self, card_id, max_width, max_height, status):
+        """Cache key; the box is rounded down to the size bucket"""
+        return (card_id, max_width // THUMBNAIL_SIZE_BUCKET_PX * THUMBNAIL_SIZE_BUCKET_PX,
+                max_height // THUMBNAIL_SIZE_BUCKET_PX * THUMBNAIL_SIZE_BUCKET_PX, status)
+
+    def cached(self, card_id, max_width, max_height, status):
+        """The thumbnail if it is already cached, else None"""
+        key = self._key(card_id, max_width, max_height, status)
+        entry = self.entries.get(key)
+        if not entry:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def load_image(self, card_id, max_width, max_height, status):
+        """PIL thumbnail for the box, or None if the card has no image. Touches neither Tk nor the cache,
+        so it may run on a worker thread; add() then turns the result into the cached PhotoImage."""
+        _, width, height, _ = self._key(card_id, max_width, max_height, status)
+        if width <= 0 or height <= 0:
+            return None
+        greyed = status != 'in_deck'
+        atlas = self.atlas
+        pil_image = atlas.get(card_id, width, height, greyed) if atlas else None
+        if pil_image is None:
+            image_path = os.path.join(CARD_IMAGES_DIR, f"{card_id}.jpg")
+            if not os.path.exists(image_path):
+                return None # Not cached: the image may still be downloaded
+            pil_image = Image.open(image_path).convert("RGBA")
+            # Apply grayscale/overlay effect based on status BEFORE resizing
+            pil_image = _fit(_greyed(pil_image) if greyed else pil_image, width, height)
+        return pil_image
+
+    def add(self, card_id, max_width, max_height, status, pil_image):
+        """Cache a load_image() result as a PhotoImage (Tk thread only) and return it.
+        A key loaded twice (two requests raced) keeps its first PhotoImage."""
+        key = self._key(card_id, max_width, max_height, status)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+        photo = ImageTk.PhotoImage(pil_image)
+        size = pil_image.width * pil_image.height * 4
+        self.entries[key] = (photo, size)
+        self.total_bytes += size
+        # Labels still showing an evicted image keep their own reference to it
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+        return photo
+
+    def get(self, card_id, max_width, max_height, status):
+        """Thumbnail fitting within the box, loaded on this thread if not cached; None if the card has no image"""
+        photo = self.cached(card_id, max_width, max_height, status)
+        if photo:
+            return photo
+        pil_image = self.load_image(card_id, max_width, max_height, status)
+        return self.add(card_id, max_width, max_height, status, pil_image) if pil_image else None
@@ -0,0 +1,122 @@
+import datetime
+import sqlite3
+import numpy as np
+from .config import DB_NAME, TREND_SESSION_GAP_MINUTES
+from .database import current_local_day
+
+# Trends tab "Group By" choices -> (granularity, rolling window in games)
+TREND_GRANULARITIES = {
+    "Day": ('day', None),
+    "Week": ('week', None),
+    "Session": ('session', None),
+    "10-Game Rolling": ('rolling', 10),
+    "25-Game Rolling": ('rolling', 25),
+    "50-Game Rolling": ('rolling', 50),
+}
+
+EPOCH_DATE = datetime.datetime(1970, 1, 1)
+
+def _trend_filter_sql(day_column, opponent_column, deck_names_set, opponent_name, days):
+    """WHERE fragment (after WHERE 1=1) and params shared by the daily and per-game trend queries"""
+    where_sql, params = "", []
+    if days:
+        where_sql += f" AND {day_column} >= ?"
+        params.append(current_local_day() - days)
+    if deck_names_set:
+        where_sql += f" AND d.deck_name IN ({', '.join(['?'] * len(deck_names_set))})"
+        params.extend(sorted(deck_names_set))
+    if opponent_name and opponent_name != "All Opponents":
+        where_sql += f" AND {opponent_column} = ?"
+        params.append(opponent_name)
+    return where_sql, params
+
+def _daily_rows(conn, deck_names_set, opponent_name, days):
+    """(local_day, games, wins, net_cubes) arrays from the per-day rollup, in day order"""
+    where_sql, params = _trend_filter_sql("r.local_day", "r.opponent", deck_names_set, opponent_name, days)
+    rows = conn.execute(f"""
+        SELECT r.local_day, SUM(r.games), SUM(r.wins), SUM(r.net_cubes)
+        FROM rollup_day_deck_opponent r
+        LEFT JOIN decks d ON r.deck_id = d.id
+        WHERE 1=1 {where_sql}
+        GROUP BY r.local_day ORDER BY r.local_day
+    """, tuple(params)).fetchall()
+    if not rows:
+        return (np.zeros(0, dtype=np.int64),) * 4
+    return tuple(np.array(col, dtype=np.int64) for col in zip(*rows))
+
+def _game_rows(conn, deck_names_set, opponent_name, days):
+    """(ended_at, is_win, cubes) arrays, one entry per game in time order"""
+    where_sql, params = _trend_filter_sql("m.local_day", "m.opponent_player_name", deck_names_set, opponent_name, days)
+    rows = conn.execute(f"""
+        SELECT m.ended_at, m.result = 'win', COALESCE(m.cubes_changed, 0)
+        FROM matches m
+        LEFT JOIN decks d ON m.deck_id = d.id
+        WHERE m.ended_at IS NOT NULL {where_sql}
+        ORDER BY m.ended_at
+    """, tuple(params)).fetchall()
+    if not rows:
+        return (np.zeros(0, dtype=np.int64),) * 3
+    return tuple(np.array(col, dtype=np.int64) for col in zip(*rows))
+
+def _bucket(keys, games, wins, cubes):
+    """Sum per-row games/wins/cubes into buckets of equal (sorted) keys. Returns (first row index, games, wins, cubes)"""
+    if not len(games):
+        return games, games, wins, cubes
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return starts, np.add.reduceat(games, starts), np.add.reduceat(wins, starts), np.add.reduceat(cubes, starts)
+
+def _rolling_sum(values, window):
+    """Sum of the last `window` values at each position (fewer at the start)"""
+    if not len(values):
+        return values
+    return np.convolve(values, np.ones(window, dtype=np.int64))[:len(values)]
+
+def calculate_trends(granularity="Day", deck_names_set=None, opponent_name=None, days=30, conn=None):
+    """Win rate and cube series for the Trends tab at the given "Group By" granularity, plus period totals.
+    Day and week read the per-day rollup; session and rolling windows need one ordered scan of the games.
+    Either way the summary is summed from the same arrays."""
+    kind, window = TREND_GRANULARITIES.get(granularity, ('day', None))
+    own_conn = conn is None # Callers may pass a worker connection (e.g. to interrupt it)
+    conn = conn or sqlite3.connect(DB_NAME)
+    try:
+        if kind in ('day', 'week'):
+            local_days, games, wins, cubes = _daily_rows(conn, deck_names_set, opponent_name, days)
+            if kind == 'week' and len(local_days):
+                # Day 0 (1970-01-01) was a Thursday; + 3 makes weeks start on Monday
+                starts, games, wins, cubes = _bucket((local_days + 3) // 7, games, wins, cubes)
+                local_days = (local_days[starts] + 3) // 7 * 7 - 3
+            times = [EPOCH_DATE + datetime.timedelta(days=int(day)) for day in local_days]
+        else:
+            ended_at, is_win, game_cubes = _game_rows(conn, deck_names_set, opponent_name, days)
+            ones = np.ones(len(ended_at), dtype=np.int64)
+            if kind == 'session':
+                new_session = np.r_[True, np.diff(ended_at) > TREND_SESSION_GAP_MINUTES * 60]
+                starts, games, wins, cubes = _bucket(np.cumsum(new_session), ones, is_win, game_cubes)
+                time_points = ended_at[starts]
+            else:
+                games = _rolling_sum(ones, window)
+                wins = _rolling_sum(is_win, window)
+                cubes = _rolling_sum(game_cubes, window)
+                time_points = ended_at
+            times = [datetime.datetime.fromtimestamp(int(ts)) for ts in time_points]
+            # Summary totals are per game, not per (overlapping) window
+            total_games, total_wins, total_cubes = len(ended_at), int(is_win.sum()), int(game_cubes.sum())
+    finally:
+        if own_conn:
+            conn.close()
+
+    if kind in ('day', 'week'):
+        total_games, total_wins, total_cubes = int(games.sum()), int(wins.sum()), int(cubes.sum())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rates = np.where(games > 0, wins * 100.0 / games, 0.0)
+    return {
+        'kind': kind,
+        'window': window,
+        'times': times,
+        'games': games,
+        'win_rates': win_rates,
+        'net_cubes': cubes,
+        # Running total over the period; for rolling windows it follows the individual games
+        'cumulative_cubes': np.cumsum(game_cubes if kind == 'rolling' else cubes),
+        'summary': (total_games, total_wins, total_cubes),
+    }
@@ -1,29 +1,43 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox, colorchooser
-import os, json, time, datetime, sqlite3, hashlib, shutil, webbrowser, csv, requests, threading, re, math
+import os, json, time, datetime, sqlite3, hashlib, shutil, webbrowser, csv, requests, threading, queue, re, math, traceback
 from PIL import Image, ImageTk
 from io import BytesIO
 from collections import Counter, defaultdict
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
-from matplotlib.dates import DateFormatter
 import numpy as np
-from .config import VERSION, DB_NAME, CARD_IMAGES_DIR, get_config, apply_theme
+from .config import VERSION, DB_NAME, CARD_IMAGES_DIR, HIDDEN_TAB_REFRESH_DELAY_MS, HISTORY_PAGE_SIZE, LIVE_VIEW_REPORT_TICKS, QUERY_POLL_INTERVAL_MS, SEARCH_DEBOUNCE_MS, get_config, apply_theme
 from .utils import get_snap_states_folder, get_game_state_path, build_id_map, resolve_ref, extract_cards_with_details, load_deck_names_from_collection, get_selected_deck_id_from_playstate, load_card_database, update_card_database, import_card_database_from_file, create_fallback_card_database, download_card_image, get_card_tooltip_text
-from .database import init_db, get_current_season_and_rank, get_or_create_deck_id, record_match_event, record_match_result, analyze_game_state_for_gui, export_match_history_to_csv, import_match_history_from_csv, check_for_updates, calculate_win_rate_over_time, calculate_matchup_statistics
+from .confidence import confidence_columns, win_rate_columns
+from .trends import TREND_GRANULARITIES, calculate_trends
+from .charts import CardStatsChart, LocationChart, TrendChart, ChartRenderer, RasterCanvas
+from .thumbnails import CardThumbnailCache, ThumbnailAtlas, build_thumbnail_atlas
+from .database import init_db, cached_query, current_local_day, BackgroundQueryExecutor, build_match_search_query, match_search_available, sync_card_def_names, update_match_note, delete_matches, rebuild_rollups, check_rollups, ENDED_AT_SHORT_SQL, ENDED_AT_LONG_SQL, HISTORY_SORT_KEY_SQL, get_match_events, remove_redundant_drawn_events, get_current_season_and_rank, get_or_create_deck_id, record_match_event, record_match_result, analyze_game_state_for_gui, export_match_history_to_csv, import_match_history_from_csv, check_for_updates, calculate_matchup_statistics, calculate_card_performance, get_revealed_card_frequencies, get_matches_with_opponent_card, get_match_cube_samples, calculate_location_slot_statistics, calculate_location_pair_statistics
 
 class CardTooltip:
-    """Tooltip widget for displaying card information"""
-    def __init__(self, parent, card_db):
+    """Tooltip widget for displaying card information. The text shows at once; card images not yet
+    in the thumbnail cache are downloaded and sized on a worker thread behind a placeholder."""
+    IMAGE_BOX = (200, 280) # Max card image size in the tooltip
+    
+    def __init__(self, parent, card_db, thumbnails):
         self.parent = parent
         self.card_db = card_db
+        self.thumbnails = thumbnails # Also holds the tooltip images once rendered
         self.tooltip_window = None
+        self.image_label = None # Placeholder until the image is ready
         self.current_card_id = None
         self.x_offset = 20
         self.y_offset = 10
         self.delay = 500  # ms
         self.timer_id = None
+        # Image worker, started on first use
+        self.image_requests = None
+        self.image_results = queue.Queue()
+        self.images_outstanding = 0
+        self.images_pending = set() # Card ids queued or loading, so a re-hover doesn't queue them again
+        self.image_poll_id = None
     
     def show_tooltip(self, card_id, event=None):
         """Schedule tooltip to be shown after delay"""
@@ -41,17 +55,13 @@ class CardTooltip:
         
         self.hide_tooltip()
         
-        x = self.parent.winfo_pointerx() + self.x_offset
-        y = self.parent.winfo_pointery() + self.y_offset
+        self.pointer_x = self.parent.winfo_pointerx() + self.x_offset
+        self.pointer_y = self.parent.winfo_pointery() + self.y_offset
         
         # Create tooltip window
         self.tooltip_window = tk.Toplevel(self.parent)
         self.tooltip_window.wm_overrideredirect(True)  # No window decorations
-        self.tooltip_window.wm_geometry(f"+{x}+{y}")
-        
-        # Apply theme colors
-        config = get_config()
-        colors = config['Colors']
+        self.tooltip_window.wm_geometry(f"+{self.pointer_x}+{self.pointer_y}")
         
         # Create content frame
         frame = ttk.Frame(self.tooltip_window, relief="solid", borderwidth=1)
@@ -60,35 +70,17 @@ class CardTooltip:
         # Get tooltip text
         tooltip_text = get_card_tooltip_text(card_id, self.card_db)
         
-        # Try to get card image
-        image_path = None
+        # Card image: shown now if rendered before, else a placeholder until the worker has it
         if self.card_db and card_id in self.card_db:
-            image_path = download_card_image(card_id, self.card_db)
-        
-        # If we have an image, show it
-        if image_path and os.path.exists(image_path):
-            try:
-                pil_image = Image.open(image_path)
-                
-                # Resize image while maintaining aspect ratio
-                width, height = pil_image.size
-                max_width = 200
-                max_height = 280
-                
-                if width > max_width or height > max_height:
-                    ratio = min(max_width / width, max_height / height)
-                    new_width = int(width * ratio)
-                    new_height = int(height * ratio)
-                    pil_image = pil_image.resize((new_width, new_height), Image.LANCZOS)
-                
-                photo_image = ImageTk.PhotoImage(pil_image)
-                
-                # Create and place image label
-                image_label = ttk.Label(frame, image=photo_image)
-                image_label.image = photo_image  # Keep a reference
-                image_label.pack(pady=5, padx=5)
-            except Exception as e:
-                print(f"Error showing card image: {e}")
+            photo_image = self.thumbnails.cached(card_id, *self.IMAGE_BOX, 'in_deck')
+            if photo_image:
+                self.image_label = ttk.Label(frame, image=photo_image)
+                self.image_label.image = photo_image  # Keep a reference
+            else:
+                self.image_label = ttk.Label(frame, text="Loading image...", anchor="center", width=24)
+                self.image_label.image = None
+                self._request_image(card_id)
+            self.image_label.pack(pady=5, padx=5)
         
         # Add text label
         text_label = ttk.Label(frame, text=tooltip_text, justify="left", wraplength=250)
@@ -98,7 +90,11 @@ class CardTooltip:
         frame.configure(style="TFrame")
         text_label.configure(style="TLabel")
         
-        # Make sure tooltip fits on screen
+        self._place()
+    
+    def _place(self):
+        """Make sure tooltip fits on screen"""
+        x, y = self.pointer_x, self.pointer_y
         self.tooltip_window.update_idletasks()
         tooltip_width = self.tooltip_window.winfo_width()
         tooltip_height = self.tooltip_window.winfo_height()
@@ -115,6 +111,60 @@ class CardTooltip:
         
         self.tooltip_window.wm_geometry(f"+{x}+{y}")
     
+    def _request_image(self, card_id):
+        """Queue a card image for the worker; results are polled back onto the Tk thread"""
+        if self.image_requests is None:
+            self.image_requests = queue.Queue()
+            threading.Thread(target=self._image_worker, daemon=True).start()
+        if card_id in self.images_pending:
+            return # Its result fills in the placeholder when it arrives
+        self.images_pending.add(card_id)
+        self.images_outstanding += 1
+        self.image_requests.put(card_id)
+        if self.image_poll_id is None:
+            self.image_poll_id = self.parent.after(QUERY_POLL_INTERVAL_MS, self._poll_images)
+    
+    def _image_worker(self):
+        # Worker thread: may block on the download; no Tk calls here
+        while True:
+            card_id = self.image_requests.get()
+            pil_image = None
+            skipped = card_id != self.current_card_id # Skip cards the pointer left while this waited
+            if not skipped:
+                try:
+                    if download_card_image(card_id, self.card_db):
+                        pil_image = self.thumbnails.load_image(card_id, *self.IMAGE_BOX, 'in_deck')
+                except Exception as e:
+                    print(f"Error loading card image for tooltip: {e}")
+            self.image_results.put((card_id, pil_image, skipped))
+    
+    def _poll_images(self):
+        """Swap finished images into the cache and, if still showing that card, the tooltip"""
+        self.image_poll_id = None
+        while True:
+            try:
+                card_id, pil_image, skipped = self.image_results.get_nowait()
+            except queue.Empty:
+                break
+            self.images_outstanding -= 1
+            self.images_pending.discard(card_id)
+            showing_placeholder = card_id == self.current_card_id and self.image_label and not self.image_label.image
+            if skipped and showing_placeholder:
+                # Hovered again after the worker skipped it: that placeholder still needs the image
+                self._request_image(card_id)
+                continue
+            photo_image = self.thumbnails.add(card_id, *self.IMAGE_BOX, 'in_deck', pil_image) if pil_image else None
+            if showing_placeholder:
+                if photo_image:
+                    self.image_label.configure(image=photo_image, text="")
+                    self.image_label.image = photo_image
+                else:
+                    self.image_label.destroy()
+                    self.image_label = None
+                self._place()
+        if self.images_outstanding and self.image_poll_id is None: # A re-request above may have scheduled one
+            self.image_poll_id = self.parent.after(QUERY_POLL_INTERVAL_MS, self._poll_images)
+    
     def hide_tooltip(self):
         """Hide the tooltip"""
         if self.timer_id:
@@ -124,6 +174,122 @@ class CardTooltip:
         if self.tooltip_window:
             self.tooltip_window.destroy()
             self.tooltip_window = None
+            self.image_label = None
+
+class SortableTable:
+    """Treeview rows plus their typed values, so heading clicks sort without parsing the displayed text.
+    Tables whose rows come from the database in pages pass on_sort(col, reverse) to re-query instead."""
+    def __init__(self, tree, on_sort=None):
+        self.tree = tree
+        self.on_sort = on_sort
+        self.iids = [] # Display order
+        self.values = [] # Typed values per row, one per column, in the same order
+        self.rendered = {} # iid -> (display values, tags) last sent to Tk
+        self.sort_keys = {} # Column -> precomputed key per row, built on first sort
+        self.sort_state = None # (column, reverse) of the last local sort, kept across set_rows
+        self.columns = list(tree["columns"])
+        for col in self.columns:
+            tree.heading(col, command=lambda _col=col: self.sort(_col, False))
+
+    def clear(self):
+        self.tree.delete(*self.tree.get_children())
+        self.iids, self.values, self.rendered, self.sort_keys = [], [], {}, {}
+
+    def insert(self, display_values, sort_values=None, **kwargs):
+        """Append a row; sort_values (default: the displayed ones) are what the column sorts on"""
+        iid = self.tree.insert("", "end", values=display_values, **kwargs)
+        self.iids.append(iid)
+        self.values.append(tuple(display_values) if sort_values is None else tuple(sort_values))
+        self.rendered[iid] = (tuple(display_values), tuple(kwargs.get("tags", ())))
+        self.sort_keys = {}
+        return iid
+
+    def set_rows(self, rows):
+        """Reconcile the tree with rows of (iid, display values, sort values, tags), matched by iid.
+        Only new, changed and removed rows cost a Tk call; selection and scroll position are kept."""
+        rendered, iids, values = {}, [], []
+        for iid, display_values, sort_values, tags in rows:
+            iid, row = str(iid), (tuple(display_values), tuple(tags))
+            old_row = self.rendered.get(iid)
+            if old_row is None:
+                self.tree.insert("", "end", iid=iid, values=row[0], tags=row[1])
+            elif old_row != row:
+                self.tree.item(iid, values=row[0], tags=row[1])
+            rendered[iid] = row
+            iids.append(iid)
+            values.append(tuple(sort_values))
+        removed = [iid for iid in self.rendered if iid not in rendered]
+        if removed:
+            self.tree.delete(*removed)
+        self.rendered, self.iids, self.values, self.sort_keys = rendered, iids, values, {}
+
+        if self.sort_state:
+            self._sort_rows(*self.sort_state)
+        elif tuple(self.tree.get_children()) != tuple(iids):
+            self.tree.set_children("", *iids)
+
+    @staticmethod
+    def _sort_key(value):
+        # Missing values first, then numbers, then text
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return (0, 0)
+        if isinstance(value, (int, float, np.number)):
+            return (1, value)
+        return (2, str(value).lower())
+
+    def sort(self, col, reverse):
+        """Sort by col; the next click on its heading reverses the order"""
+        self.tree.heading(col, command=lambda _col=col: self.sort(_col, not reverse))
+        if self.on_sort:
+            self.on_sort(col, reverse)
+            return
+        self.sort_state = (col, reverse)
+        self._sort_rows(col, reverse)
+
+    def _sort_rows(self, col, reverse):
+        if col not in self.sort_keys:
+            index = self.columns.index(col)
+            self.sort_keys = {col: [self._sort_key(row[index]) for row in self.values]}
+        keys = self.sort_keys[col]
+        order = sorted(range(len(self.iids)), key=keys.__getitem__, reverse=reverse)
+        self.iids = [self.iids[i] for i in order]
+        self.values = [self.values[i] for i in order]
+        self.sort_keys = {col: [keys[i] for i in order]}
+        # Reorder in one Tk call; no row is redrawn or re-inserted
+        if tuple(self.tree.get_children()) != tuple(self.iids):
+            self.tree.set_children("", *self.iids)
+
+class LiveViewModel:
+    """Display state of the live game view. update_data_loop stages every field each tick, and flush()
+    pushes only the ones whose text changed; each StringVar.set() fires its traces and re-lays out the label."""
+    def __init__(self, report_ticks=LIVE_VIEW_REPORT_TICKS):
+        self.shown = {} # Tcl variable name -> value last pushed
+        self.pending = {} # Tcl variable name -> (variable, value) staged this tick
+        self.report_ticks = report_ticks
+        self.updates_last_tick = 0
+        self.ticks = 0
+        self.updates_since_report = 0
+
+    def set(self, var, value):
+        self.pending[str(var)] = (var, value) # Variables aren't hashable; their Tcl names are
+
+    def flush(self):
+        """Push the staged fields that differ from what is shown; returns the number of widget updates issued"""
+        updates = 0
+        for name, (var, value) in self.pending.items():
+            if name not in self.shown or self.shown[name] != value:
+                var.set(value)
+                self.shown[name] = value
+                updates += 1
+        self.pending = {}
+
+        self.updates_last_tick = updates
+        self.ticks += 1
+        self.updates_since_report += updates
+        if self.report_ticks and self.ticks % self.report_ticks == 0:
+            print(f"DEBUG: Live view: {self.updates_since_report} widget updates in the last {self.report_ticks} ticks (last tick: {updates})")
+            self.updates_since_report = 0
+        return updates
 
 class SnapTrackerApp:
     def __init__(self, root_window):
@@ -132,8 +298,7 @@ class SnapTrackerApp:
         self.root.geometry("1200x800")
         self.root.minsize(1000, 700)
         
-        # Initialize database
-        init_db()
+        # Database schema is brought up to date by init_db() at startup (see nicetracker.py)
         
         # Load configuration
         self.config = get_config()
@@ -141,11 +306,15 @@ class SnapTrackerApp:
         # Apply theme
         apply_theme(self.root)
         
+        # Card art for the deck modal and tooltips; the atlas is rebuilt after image downloads
+        self.card_thumbnails = CardThumbnailCache(ThumbnailAtlas.load())
+        
         # Load card database
         self.card_db = load_card_database()
         
         if self.card_db:
             threading.Thread(target=self.download_all_card_images, daemon=True).start()
+        self.sync_card_names_to_db()
         
         # Initialize state variables
         self.last_recorded_game_id = None
@@ -160,7 +329,7 @@ class SnapTrackerApp:
         self.playstate_read_attempt_count = 0
         
         # Set up tooltip handler
-        self.card_tooltip = CardTooltip(self.root, self.card_db)
+        self.card_tooltip = CardTooltip(self.root, self.card_db, self.card_thumbnails)
         
         # Create stringvars for UI
         self.setup_string_vars()
@@ -180,11 +349,7 @@ class SnapTrackerApp:
         
         # Load data for history and stats tabs
         self.load_history_tab_data() # This populates deck filter options
-        self.load_card_stats_data()
-        self.load_matchup_data()
-        self.load_location_stats()
-        self.load_deck_performance_data() # New call
-        self.update_trends() # Initial trend load
+        self.request_tab_refresh() # The other stats tabs load on first view or when idle
         
         # Create and configure main menu
         self.create_main_menu()
@@ -193,6 +358,9 @@ class SnapTrackerApp:
 
     def setup_string_vars(self):
         """Initialize all string variables used in the UI"""
+        # The live game variables below are written through this each tick (see update_data_loop)
+        self.live_view = LiveViewModel()
+        
         # Status variables
         self.status_var = tk.StringVar(value="Initializing...")
         self.turn_var = tk.StringVar(value="Turn: N/A")
@@ -247,6 +415,7 @@ class SnapTrackerApp:
         self.matchup_deck_filter_display_var = tk.StringVar(value="Decks: All")
         
         self.trend_days_var = tk.StringVar(value="30")
+        self.trend_granularity_var = tk.StringVar(value="Day")
         self.trend_selected_deck_names = set()
         self.trend_deck_filter_display_var = tk.StringVar(value="Decks: All")
 
@@ -261,11 +430,30 @@ class SnapTrackerApp:
         self.history_tree = None
         self.stats_text_widget = None
         self.card_stats_tree = None
+        self.card_stats_performance = {} # Last engine result, shared by table and chart views
         self.opponent_encounter_history_text = None
         self.trends_canvas = None
+        self.chart_renderer = None # Created with the first background-rendered chart
         self.matchup_tree = None
         self.location_stats_tree = None
         self.deck_performance_tree = None # For the new tab's treeview
+        
+        # Lazy tab refresh state (see request_tab_refresh)
+        self.main_notebook = None
+        self.tab_loaders = {} # Notebook tab widget name -> loader
+        self.dirty_tabs = set()
+        self.tab_refresh_idle_id = None
+        self.hidden_tab_refresh_id = None
+        
+        # Tab loaders fetch on a worker thread; results are polled back onto the Tk thread
+        self.query_executor = BackgroundQueryExecutor()
+        self.query_poll_id = None
+        self.history_search_after_id = None
+        self.history_model = None # Filtered game ids and sort keys behind the paged history list
+        self.history_sort = None # (column, descending) from the headings; None is newest / best match first
+        self.history_all_selected = False # Ctrl+A: the whole model is selected, loaded or not
+        self.history_page_pending = False
+        self.match_search_enabled = self._check_match_search()
 
     def setup_ui(self):
         """Set up the main UI components"""
@@ -304,6 +492,18 @@ class SnapTrackerApp:
         
         # Pack the notebook
         main_notebook.pack(expand=True, fill=tk.BOTH)
+        
+        # Data tabs and the loader that refreshes each one
+        self.main_notebook = main_notebook
+        self.tab_loaders = {
+            str(history_tab): self.load_history_tab_data,
+            str(deck_performance_tab): self.load_deck_performance_data,
+            str(card_stats_tab): self.load_card_stats_data,
+            str(matchup_tab): self.load_matchup_data,
+            str(location_tab): self.load_location_stats,
+            str(trends_tab): self.update_trends,
+        }
+        main_notebook.bind("<<NotebookTabChanged>>", self.on_main_tab_changed)
 
     def create_main_menu(self):
         """Create the application menu bar"""
@@ -341,6 +541,8 @@ class SnapTrackerApp:
         db_menu = tk.Menu(tools_menu, tearoff=0)
         db_menu.add_command(label="Backup Database", command=self.backup_database)
         db_menu.add_command(label="Clean Duplicate Events", command=self.cleanup_duplicate_events_command)
+        db_menu.add_command(label="Check Statistics Tables", command=self.check_rollups_command)
+        db_menu.add_command(label="Rebuild Statistics Tables", command=self.rebuild_rollups_command)
         db_menu.add_command(label="Reset Database", command=self.reset_database)
         tools_menu.add_cascade(label="Database", menu=db_menu)
         
@@ -831,7 +1033,7 @@ class SnapTrackerApp:
         search_frame.pack(side=tk.RIGHT)
         ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=(0,5))
         self.search_var = tk.StringVar()
-        self.search_var.trace("w", lambda *args: self.apply_history_filter())
+        self.search_var.trace("w", lambda *args: self.schedule_history_search())
         ttk.Entry(search_frame, textvariable=self.search_var, width=20).pack(side=tk.LEFT)
         
         # History list frame
@@ -844,8 +1046,10 @@ class SnapTrackerApp:
         
         # Configure columns
         for col in cols:
-            self.history_tree.heading(col, text=col, command=lambda _col=col: self.sort_history_treeview(_col, False))
+            self.history_tree.heading(col, text=col)
             self.history_tree.column(col, width=100, anchor='w')
+        # Only a page is loaded, so sorting re-queries the model
+        self.history_table = SortableTable(self.history_tree, on_sort=self.sort_history_treeview)
         
         # Adjust column widths
         self.history_tree.column("Timestamp", width=140)
@@ -860,7 +1064,9 @@ class SnapTrackerApp:
         # Add scrollbars
         vsb = ttk.Scrollbar(history_list_frame, orient="vertical", command=self.history_tree.yview)
         hsb = ttk.Scrollbar(history_list_frame, orient="horizontal", command=self.history_tree.xview)
-        self.history_tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.history_vsb = vsb
+        # Rows are loaded a page at a time as the list nears its end
+        self.history_tree.configure(yscrollcommand=self._on_history_yscroll, xscrollcommand=hsb.set)
         
         # Pack scrollbars and treeview
         vsb.pack(side='right', fill='y')
@@ -870,6 +1076,7 @@ class SnapTrackerApp:
         # Bind events
         self.history_tree.bind("<<TreeviewSelect>>", self.on_history_match_select)
         self.history_tree.bind("<Double-1>", self.on_history_match_double_click)
+        self.history_tree.bind("<Control-a>", self.select_all_history_matches)
         
         # Stats and details frame
         stats_frame = ttk.LabelFrame(parent_frame, text="Stats & Details", padding="5")
@@ -905,19 +1112,22 @@ class SnapTrackerApp:
         deck_perf_list_frame = ttk.LabelFrame(parent_frame, text="Deck Statistics", padding="5")
         deck_perf_list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
 
-        cols = ("Deck Name", "Games", "Wins", "Losses", "Ties", "Win %", "Net Cubes", "Avg Cubes/Game", "Avg Cubes/Win", "Avg Cubes/Loss", "Tags")
+        cols = ("Deck Name", "Games", "Wins", "Losses", "Ties", "Win %", "Net Cubes", "Avg Cubes/Game", "Avg Cubes/Win", "Avg Cubes/Loss", 
+                "Adj. Win %", "Win % Low", "Win % High", "Avg Cubes Low", "Avg Cubes High", "Tags")
         self.deck_performance_tree = ttk.Treeview(deck_perf_list_frame, columns=cols, show="headings", selectmode="browse")
 
         col_widths = {
             "Deck Name": 200, "Games": 60, "Wins": 50, "Losses": 50, "Ties": 50,
             "Win %": 70, "Net Cubes": 70, "Avg Cubes/Game": 100,
-            "Avg Cubes/Win": 100, "Avg Cubes/Loss": 100, "Tags": 100
+            "Avg Cubes/Win": 100, "Avg Cubes/Loss": 100, "Tags": 100,
+            "Adj. Win %": 80, "Win % Low": 80, "Win % High": 80, "Avg Cubes Low": 100, "Avg Cubes High": 100
         }
 
         for col in cols:
-            self.deck_performance_tree.heading(col, text=col, command=lambda _col=col: self.sort_deck_performance_treeview(_col, False))
+            self.deck_performance_tree.heading(col, text=col)
             anchor_val = 'w' if col == "Deck Name" or col == "Tags" else 'center'
             self.deck_performance_tree.column(col, width=col_widths.get(col, 80), anchor=anchor_val, stretch=(col == "Deck Name"))
+        self.deck_performance_table = SortableTable(self.deck_performance_tree)
 
         # Add scrollbars
         vsb = ttk.Scrollbar(deck_perf_list_frame, orient="vertical", command=self.deck_performance_tree.yview)
@@ -988,7 +1198,8 @@ class SnapTrackerApp:
             "Played G", "Played Win%", "Net C (P)", "Avg C (P)", # Played
             "Not Drawn G", "Not Drawn Win%", "Net C (ND)", "Avg C (ND)", # Not Drawn
             "Not Played G", "Not Played Win%", "Net C (NP)", "Avg C (NP)",  # Not Played
-            "ΔC (Drawn)", "ΔC (Played)" # Delta Columns
+            "ΔC (Drawn)", "ΔC (Played)", # Delta Columns
+            "Drawn Adj. Win%", "Drawn Win% Low", "Played Adj. Win%", "Played Win% Low" # Sample-size aware
         )
         self.card_stats_tree = ttk.Treeview(self.card_stats_table_frame, columns=cols, show="headings", selectmode="browse")
         
@@ -1001,21 +1212,20 @@ class SnapTrackerApp:
             "Not Drawn G": 70, "Not Drawn Win%": 70, "Net C (ND)": 70, "Avg C (ND)": 70,
             "Not Played G": 70, "Not Played Win%": 70, "Net C (NP)": 70, "Avg C (NP)": 70,
             "ΔC (Drawn)": 70, # Delta Cubes Drawn vs Not Drawn
-            "ΔC (Played)": 70  # Delta Cubes Played vs Not Played            
+            "ΔC (Played)": 70,  # Delta Cubes Played vs Not Played            
+            "Drawn Adj. Win%": 90, "Drawn Win% Low": 90, "Played Adj. Win%": 90, "Played Win% Low": 90
         }
         
         # Configure columns
         for col in cols:
-            self.card_stats_tree.heading(
-                col, text=col, 
-                command=lambda _col=col: self.sort_card_stats_treeview(_col, False)
-            )
+            self.card_stats_tree.heading(col, text=col)
             anchor_val = 'center' if col != "Card" else "w"
             self.card_stats_tree.column(
                 col, width=col_widths.get(col, 80), 
                 anchor=anchor_val, 
                 stretch=tk.YES if col == "Card" else tk.NO
             )
+        self.card_stats_table = SortableTable(self.card_stats_tree)
         
         # Add scrollbars
         vsb = ttk.Scrollbar(self.card_stats_table_frame, orient="vertical", command=self.card_stats_tree.yview)
@@ -1036,8 +1246,9 @@ class SnapTrackerApp:
         
         # Create matplotlib figure for chart
         self.card_stats_figure = Figure(figsize=(8, 6), dpi=100)
-        self.card_stats_canvas = FigureCanvasTkAgg(self.card_stats_figure, self.card_stats_chart_frame)
+        self.card_stats_canvas = self._create_chart_canvas(self.card_stats_figure, self.card_stats_chart_frame)
         self.card_stats_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.card_stats_chart = CardStatsChart(self.card_stats_figure, self.card_stats_canvas)
         
         # Status bar
         ttk.Label(parent_frame, textvariable=self.card_stats_summary_var, relief=tk.SUNKEN, anchor=tk.W).pack(side=tk.BOTTOM, fill=tk.X, pady=(5,0))
@@ -1077,14 +1288,16 @@ class SnapTrackerApp:
         paned_window.add(matchup_list_frame, weight=3)
         
         # Create matchup treeview
-        cols = ("Opponent", "Matches", "Win %", "Wins", "Losses", "Ties", "Net Cubes", "Avg Cubes")
+        cols = ("Opponent", "Matches", "Win %", "Wins", "Losses", "Ties", "Net Cubes", "Avg Cubes", 
+                "Adj. Win %", "Win % Low", "Win % High", "Avg Cubes Low", "Avg Cubes High")
         self.matchup_tree = ttk.Treeview(matchup_list_frame, columns=cols, show="headings", selectmode="browse")
         
         # Configure columns
         for col in cols:
-            self.matchup_tree.heading(col, text=col, command=lambda _col=col: self.sort_matchup_treeview(_col, False))
+            self.matchup_tree.heading(col, text=col)
             anchor_val = 'center' if col != "Opponent" else "w"
             self.matchup_tree.column(col, width=80, anchor=anchor_val, stretch=tk.YES if col == "Opponent" else tk.NO)
+        self.matchup_table = SortableTable(self.matchup_tree)
         
         self.matchup_tree.column("Opponent", width=150, stretch=tk.YES)
         self.matchup_tree.column("Matches", width=60)
@@ -1110,6 +1323,7 @@ class SnapTrackerApp:
         # Details notebook
         details_notebook = ttk.Notebook(matchup_details_frame)
         details_notebook.pack(fill=tk.BOTH, expand=True)
+        self.matchup_details_notebook = details_notebook
         
         # Summary tab
         summary_tab = ttk.Frame(details_notebook)
@@ -1145,13 +1359,17 @@ class SnapTrackerApp:
         r_hsb.pack(side='bottom', fill='x')
         self.revealed_cards_tree.pack(fill=tk.BOTH, expand=True)
         
+        # Double-click a revealed card to highlight the matches where it was seen
+        self.revealed_cards_tree.bind("<Double-1>", self.on_revealed_card_double_click)
+        
         # History tab
         history_tab = ttk.Frame(details_notebook)
         details_notebook.add(history_tab, text="Match History")
+        self.matchup_history_tab = history_tab
         
         # Create matchup history treeview
         history_cols = ("Date", "Deck", "Result", "Cubes", "Revealed Cards")
-        self.matchup_history_tree = ttk.Treeview(history_tab, columns=history_cols, show="headings", selectmode="browse")
+        self.matchup_history_tree = ttk.Treeview(history_tab, columns=history_cols, show="headings", selectmode="extended")
         
         # Configure columns
         for col in history_cols:
@@ -1218,16 +1436,19 @@ class SnapTrackerApp:
         self.location_table_frame.pack(fill=tk.BOTH, expand=True)
         
         # Create location stats treeview
-        cols = ("Location", "Games", "Win %", "Wins", "Losses", "Ties", "Net Cubes", "Avg Cubes")
+        cols = ("Location", "Games", "Win %", "Wins", "Losses", "Ties", "Net Cubes", "Avg Cubes", 
+                "Adj. Win %", "Win % Low", "Win % High", "Avg Cubes Low", "Avg Cubes High")
         self.location_stats_tree = ttk.Treeview(self.location_table_frame, columns=cols, show="headings", selectmode="browse")
         
         # Configure columns
         for col in cols:
-            self.location_stats_tree.heading(col, text=col, command=lambda _col=col: self.sort_location_treeview(_col, False))
+            self.location_stats_tree.heading(col, text=col)
             anchor_val = 'center' if col != "Location" else "w"
             self.location_stats_tree.column(col, width=80, anchor=anchor_val, stretch=tk.YES if col == "Location" else tk.NO)
+        self.location_stats_table = SortableTable(self.location_stats_tree)
         
         self.location_stats_tree.column("Location", width=150, stretch=tk.YES)
+        self.location_stats_tree.bind("<<TreeviewSelect>>", self.on_location_select)
         
         # Add scrollbars
         vsb = ttk.Scrollbar(self.location_table_frame, orient="vertical", command=self.location_stats_tree.yview)
@@ -1245,8 +1466,9 @@ class SnapTrackerApp:
         
         # Create matplotlib figure for chart
         self.location_figure = Figure(figsize=(8, 6), dpi=100)
-        self.location_canvas = FigureCanvasTkAgg(self.location_figure, self.location_chart_frame)
+        self.location_canvas = self._create_chart_canvas(self.location_figure, self.location_chart_frame)
         self.location_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.location_chart = LocationChart(self.location_figure, self.location_canvas)
         
         # Details area
         self.location_details_frame = ttk.LabelFrame(parent_frame, text="Location Details", padding="5")
@@ -1277,6 +1499,12 @@ class SnapTrackerApp:
         self.trend_days_combo.pack(side=tk.LEFT, padx=5)
         self.trend_days_combo.current(2)  # Default to 30 days
         
+        ttk.Label(control_frame, text="Group By:").pack(side=tk.LEFT, padx=(20,5))
+        self.trend_granularity_combo = ttk.Combobox(control_frame, textvariable=self.trend_granularity_var, 
+                                                    values=list(TREND_GRANULARITIES), state="readonly", width=16)
+        self.trend_granularity_combo.pack(side=tk.LEFT, padx=5)
+        self.trend_granularity_combo.bind("<<ComboboxSelected>>", self.update_trends)
+        
         # Filter frame
         filter_frame = ttk.Frame(parent_frame)
         filter_frame.pack(fill=tk.X, pady=5)
@@ -1306,14 +1534,13 @@ class SnapTrackerApp:
         # Create matplotlib figure for trend charts
         self.trend_figure = Figure(figsize=(10, 8), dpi=100)
         
-        # Create subplots
-        self.trend_win_rate_ax = self.trend_figure.add_subplot(211)
-        self.trend_cubes_ax = self.trend_figure.add_subplot(212)
-        
         # Add the plot to the tkinter window
-        self.trends_canvas = FigureCanvasTkAgg(self.trend_figure, chart_frame)
+        self.trends_canvas = self._create_chart_canvas(self.trend_figure, chart_frame)
         self.trends_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
+        # Subplots and lines are created once and updated in place
+        self.trend_chart = TrendChart(self.trend_figure, self.trends_canvas)
+        
         # Stats summary
         self.trend_summary_frame = ttk.LabelFrame(parent_frame, text="Summary", padding="5")
         self.trend_summary_frame.pack(fill=tk.X, pady=5)
@@ -1398,6 +1625,11 @@ class SnapTrackerApp:
         error_log_entry = ttk.Entry(error_log_frame, textvariable=self.max_error_log_var, width=6)
         error_log_entry.pack(side=tk.LEFT)
         
+        # Background chart rendering
+        self.background_chart_rendering_var = tk.BooleanVar(value=self.config.getboolean('Settings', 'background_chart_rendering', fallback=False))
+        ttk.Checkbutton(general_frame, text="Render charts in the background (takes effect after restart)", 
+                      variable=self.background_chart_rendering_var).pack(anchor="w", pady=5)
+        
         # Theme settings
         theme_frame = ttk.LabelFrame(settings_frame, text="Theme Settings", padding="10")
         theme_frame.pack(fill=tk.X, pady=10, padx=10)
@@ -1587,122 +1819,96 @@ class SnapTrackerApp:
                 self.card_tooltip.show_tooltip(card_id_to_show, event)
         
     def sort_history_treeview(self, col, reverse):
-        """Sort history treeview by column"""
-        data = [(self.history_tree.set(child, col), child) for child in self.history_tree.get_children('')]
-        
-        def try_convert(val_str):
-            val_str = str(val_str).replace('%', '')
-            try: 
-                return int(val_str)
-            except (ValueError, TypeError):
-                try: 
-                    return float(val_str)
-                except (ValueError, TypeError): 
-                    return val_str.lower()
-        
-        data.sort(key=lambda t: try_convert(t[0]), reverse=reverse)
-        
-        for index, (val, child) in enumerate(data): 
-            self.history_tree.move(child, '', index)
-        
-        self.history_tree.heading(col, command=lambda _col=col: self.sort_history_treeview(_col, not reverse))
-    
-    def sort_card_stats_treeview(self, col, reverse):
-        """Sort card stats treeview by column"""
-        data = [(self.card_stats_tree.set(child, col), child) for child in self.card_stats_tree.get_children('')]
-        
-        def try_convert(val_str):
-            val_str = str(val_str).replace('%', '').replace('N/A', '-9999')
-            try: 
-                return int(val_str)
-            except (ValueError, TypeError):
-                try: 
-                    return float(val_str)
-                except (ValueError, TypeError): 
-                    return val_str.lower()
-        
-        data.sort(key=lambda t: try_convert(t[0]), reverse=reverse)
-        
-        for index, (val, child) in enumerate(data): 
-            self.card_stats_tree.move(child, '', index)
-        
-        self.card_stats_tree.heading(col, command=lambda _col=col: self.sort_card_stats_treeview(_col, not reverse))
-    
-    def sort_matchup_treeview(self, col, reverse):
-        """Sort matchup treeview by column"""
-        data = [(self.matchup_tree.set(child, col), child) for child in self.matchup_tree.get_children('')]
-        
-        # Updated key creation function
-        def create_sort_key(value_from_cell):
-            s_value = str(value_from_cell)  # Ensure it's a string initially
-
-            # Handle "N/A" specifically for numeric comparison, sorting it as a very small number
-            if s_value == "N/A":
-                return (0, -float('inf')) 
-
-            # Clean string for potential numeric conversion (remove %, etc.)
-            numeric_candidate_str = s_value.replace('%', '')
-
-            try:
-                # Attempt to convert to int
-                return (0, int(numeric_candidate_str))  # Type 0 for numbers
-            except ValueError:
-                try:
-                    # Attempt to convert to float
-                    return (0, float(numeric_candidate_str))  # Type 0 for numbers
-                except ValueError:
-                    # If it's not a number, treat it as a string
-                    # Handle empty strings specifically if needed, or just lowercase
-                    if not s_value.strip(): # If original string was empty or whitespace
-                        return (1, "") # Sort empty strings together as type 1
-                    return (1, s_value.lower()) # Type 1 for strings
-
-        # Sort using the new key
-        data.sort(key=lambda t: create_sort_key(t[0]), reverse=reverse)
-        
-        for index, (val, child) in enumerate(data): 
-            self.matchup_tree.move(child, '', index)
-        
-        self.matchup_tree.heading(col, command=lambda _col=col: self.sort_matchup_treeview(_col, not reverse))
+        """Sort history by column; only a page is loaded, so the model is re-queried in the new order"""
+        self.history_sort = (col, reverse)
+        self.apply_history_filter()
     
-    def sort_location_treeview(self, col, reverse):
-        """Sort location treeview by column"""
-        data = [(self.location_stats_tree.set(child, col), child) for child in self.location_stats_tree.get_children('')]
-        
-        def try_convert(val_str):
-            val_str = str(val_str).replace('%', '').replace('N/A', '-9999')
-            try: 
-                return int(val_str)
-            except (ValueError, TypeError):
-                try: 
-                    return float(val_str)
-                except (ValueError, TypeError): 
-                    return val_str.lower()
-        
-        data.sort(key=lambda t: try_convert(t[0]), reverse=reverse)
-        
-        for index, (val, child) in enumerate(data): 
-            self.location_stats_tree.move(child, '', index)
-        
-        self.location_stats_tree.heading(col, command=lambda _col=col: self.sort_location_treeview(_col, not reverse))
-        
-    def sort_deck_performance_treeview(self, col, reverse):
-        """Sort deck performance treeview by column"""
-        data = [(self.deck_performance_tree.set(child, col), child) for child in self.deck_performance_tree.get_children('')]
-
-        def try_convert(val_str):
-            val_str = str(val_str).replace('%', '').replace('N/A', '-99999') # Use a very small number for N/A in sorting
-            try:
-                return float(val_str) # Convert to float for consistent numeric sorting
-            except (ValueError, TypeError):
-                return val_str.lower()
-
-        data.sort(key=lambda t: try_convert(t[0]), reverse=reverse)
+    def _fetch_all(self, query, params=()):
+        """Run a read-only query on a short-lived connection and return all rows"""
+        conn = sqlite3.connect(DB_NAME)
+        try:
+            return conn.execute(query, tuple(params)).fetchall()
+        finally:
+            conn.close()
 
-        for index, (val, child) in enumerate(data):
-            self.deck_performance_tree.move(child, '', index)
+    def _check_match_search(self):
+        """Whether the database has the FTS5 history search index"""
+        conn = sqlite3.connect(DB_NAME)
+        try:
+            return match_search_available(conn.cursor())
+        finally:
+            conn.close()
 
-        self.deck_performance_tree.heading(col, command=lambda _col=col: self.sort_deck_performance_treeview(_col, not reverse))
+    def _submit_query(self, kind, filters, query, params, on_result):
+        """Fetch rows on the query worker (through the result cache) and hand them to on_result
+        on the Tk thread. A newer submission of the same kind supersedes this one."""
+        params = tuple(params)
+        self._submit_work(kind, filters, lambda conn: conn.execute(query, params).fetchall(), on_result)
+
+    def _submit_work(self, kind, filters, compute, on_result):
+        # Snapshot mutable filter sets now; the cache key is built later on the worker
+        filters = tuple(frozenset(value) if isinstance(value, set) else value for value in filters)
+        self.query_executor.submit(
+            kind,
+            lambda conn: cached_query(kind, filters, lambda: compute(conn)),
+            on_result,
+            lambda e: self.log_error(f"Error loading {kind} data: {e}", "".join(traceback.format_exception(type(e), e, e.__traceback__)))
+        )
+        if self.query_poll_id is None:
+            self.query_poll_id = self.root.after(QUERY_POLL_INTERVAL_MS, self._poll_query_results)
+
+    def _rows_with_confidence(self, conn, query, params, group_by, deck_name, season, key_index=0, games_index=1, wins_index=2):
+        """Fetch a stats table's rows plus its confidence columns (see confidence_columns), on the query worker"""
+        rows = conn.execute(query, tuple(params)).fetchall()
+        samples = get_match_cube_samples(group_by, deck_name, season, conn=conn)
+        sample_keys, sample_cubes = zip(*samples) if samples else ((), ())
+        confidence = confidence_columns(
+            [row[key_index] for row in rows],
+            [row[wins_index] or 0 for row in rows],
+            [row[games_index] or 0 for row in rows],
+            sample_keys, sample_cubes
+        )
+        return rows, confidence
+
+    def _add_card_confidence(self, card_performance):
+        """Add adjusted win rates and Wilson lower bounds for drawn and played games to each card's stats"""
+        if not card_performance:
+            return card_performance
+        stats_list = list(card_performance.values())
+        def column(key):
+            return np.array([stats[key] for stats in stats_list], dtype=np.float64)
+        total_games = column("drawn_games") + column("not_drawn_games")
+        # Shrink toward the card's win rate over all its deck's games rather than the global rate
+        with np.errstate(divide='ignore', invalid='ignore'):
+            card_rate = np.where(total_games > 0, (column("drawn_wins") + column("not_drawn_wins")) / total_games, 0.5)
+        for prefix in ("drawn", "played"):
+            columns = win_rate_columns(column(f"{prefix}_wins"), column(f"{prefix}_games"), prior_rate=card_rate)
+            for stats, adj, low in zip(stats_list, columns['adj_win_pct'], columns['win_pct_low']):
+                stats[f"{prefix}_adj_win_pct"] = adj
+                stats[f"{prefix}_win_pct_low"] = low
+        return card_performance
+
+    CONFIDENCE_COLUMN_FORMATS = (
+        ('adj_win_pct', "{:.1f}%"), ('win_pct_low', "{:.1f}%"), ('win_pct_high', "{:.1f}%"),
+        ('avg_cubes_low', "{:.2f}"), ('avg_cubes_high', "{:.2f}"),
+    )
+
+    def _confidence_values(self, confidence, row_index):
+        """Typed values for the Adj. Win % ... Avg Cubes High columns of one row"""
+        return tuple(float(confidence[key][row_index]) for key, _ in self.CONFIDENCE_COLUMN_FORMATS)
+
+    def _confidence_display(self, values):
+        """Display strings for _confidence_values"""
+        return tuple(self._format_stat(value, fmt) for value, (_, fmt) in zip(values, self.CONFIDENCE_COLUMN_FORMATS))
+
+    def _format_stat(self, value, fmt):
+        return "N/A" if value is None or math.isnan(value) else fmt.format(value)
+
+    def _poll_query_results(self):
+        self.query_poll_id = None
+        self.query_executor.poll_results()
+        if self.query_executor.has_pending():
+            self.query_poll_id = self.root.after(QUERY_POLL_INTERVAL_MS, self._poll_query_results)
 
     def load_deck_performance_data(self, event=None):
         """Load and display statistics for each deck."""
@@ -1710,47 +1916,48 @@ class SnapTrackerApp:
             print("WARN: Deck performance tree not initialized yet.")
             return
 
-        # Clear current items
-        for item in self.deck_performance_tree.get_children():
-            self.deck_performance_tree.delete(item)
-
         selected_season = self.deck_performance_season_filter_var.get()
 
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-
+        # Reads the (deck, season) rollup, so the cost is O(groups) rather than O(matches)
         query_parts = ["""
             SELECT
                 d.id as deck_db_id,
                 COALESCE(d.deck_name, 'Unknown Deck') as deck_name,
-                COUNT(m.game_id) as games_played,
-                SUM(CASE WHEN m.result = 'win' THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN m.result = 'loss' THEN 1 ELSE 0 END) as losses,
-                SUM(CASE WHEN m.result = 'tie' THEN 1 ELSE 0 END) as ties,
-                SUM(m.cubes_changed) as net_cubes,
-                AVG(CASE WHEN m.result = 'win' THEN m.cubes_changed ELSE NULL END) as avg_cubes_win,
-                AVG(CASE WHEN m.result = 'loss' THEN m.cubes_changed ELSE NULL END) as avg_cubes_loss,
+                SUM(r.games) as games_played,
+                SUM(r.wins) as wins,
+                SUM(r.losses) as losses,
+                SUM(r.ties) as ties,
+                SUM(r.net_cubes) as net_cubes,
+                SUM(r.win_cubes) * 1.0 / NULLIF(SUM(r.win_cube_games), 0) as avg_cubes_win,
+                SUM(r.loss_cubes) * 1.0 / NULLIF(SUM(r.loss_cube_games), 0) as avg_cubes_loss,
                 d.tags as deck_tags
             FROM
                 decks d
             JOIN
-                matches m ON d.id = m.deck_id
+                rollup_deck_season r ON d.id = r.deck_id
         """]
         params = []
 
         if selected_season != "All Seasons":
-            query_parts.append("WHERE m.season = ?")
+            query_parts.append("WHERE r.season = ?")
             params.append(selected_season)
 
         query_parts.append("GROUP BY d.id, d.deck_name, d.tags")
         query_parts.append("ORDER BY games_played DESC, wins DESC")
 
         final_query = " ".join(query_parts)
-        cursor.execute(final_query, tuple(params))
-        deck_stats = cursor.fetchall()
-        conn.close()
+        self._submit_work(
+            'deck_performance', (selected_season,),
+            lambda conn: self._rows_with_confidence(conn, final_query, params, 'deck', None, selected_season, key_index=0, games_index=2, wins_index=3),
+            self._show_deck_performance
+        )
+
+    def _show_deck_performance(self, result):
+        """Populate the deck performance tree from fetched rows and their confidence columns"""
+        deck_stats, confidence = result
+        rows = []
 
-        for row in deck_stats:
+        for row_index, row in enumerate(deck_stats):
             deck_db_id, name, games, wins, losses, ties, net_cubes, avg_win, avg_loss, tags_json = row
 
             wins = wins if wins is not None else 0
@@ -1775,7 +1982,8 @@ class SnapTrackerApp:
                     deck_tags_display = "Error"
 
 
-            self.deck_performance_tree.insert("", "end", iid=deck_db_id, values=(
+            confidence_values = self._confidence_values(confidence, row_index)
+            rows.append((deck_db_id, (
                 name,
                 games,
                 wins,
@@ -1786,22 +1994,27 @@ class SnapTrackerApp:
                 f"{avg_cubes_game:.2f}",
                 avg_win_str,
                 avg_loss_str,
+                *self._confidence_display(confidence_values),
                 deck_tags_display
-            ))        
+            ), (
+                name, games, wins, losses, ties, win_rate, net_cubes, avg_cubes_game, avg_win, avg_loss,
+                *confidence_values, deck_tags_display
+            ), ()))
+        # Only rows that changed are touched, so the selection and scroll position survive a refresh
+        self.deck_performance_table.set_rows(rows)
         
     def load_history_tab_data(self):
         """Load match history data and populate UI"""
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        
         # Get all deck names for filter
-        cursor.execute("SELECT DISTINCT deck_name FROM decks WHERE deck_name IS NOT NULL ORDER BY deck_name")
+        deck_name_rows = cached_query('filter_decks', (), lambda: self._fetch_all(
+            "SELECT DISTINCT deck_name FROM decks WHERE deck_name IS NOT NULL ORDER BY deck_name"))
         # Store all actual deck names (excluding the "All Decks" placeholder)
-        self.all_deck_names_for_filter = [row[0] for row in cursor.fetchall() if row[0]] 
+        self.all_deck_names_for_filter = [row[0] for row in deck_name_rows if row[0]] 
         
         # Get all seasons for filter
-        cursor.execute("SELECT DISTINCT season FROM matches WHERE season IS NOT NULL ORDER BY season")
-        seasons = ["All Seasons"] + [row[0] for row in cursor.fetchall() if row[0]]
+        season_rows = cached_query('filter_seasons', (), lambda: self._fetch_all(
+            "SELECT DISTINCT season FROM matches WHERE season IS NOT NULL ORDER BY season"))
+        seasons = ["All Seasons"] + [row[0] for row in season_rows if row[0]]
         
         # Update menu options for all filters that use deck names
         #self.history_deck_options = deck_names if deck_names else ["All Decks"]
@@ -1866,8 +2079,9 @@ class SnapTrackerApp:
                     str_var.set(effective_options[0])
 
         # Update opponent filter menu for Trends tab
-        cursor.execute("SELECT DISTINCT opponent_player_name FROM matches WHERE opponent_player_name IS NOT NULL AND opponent_player_name != 'Opponent' ORDER BY opponent_player_name")
-        opponents = ["All Opponents"] + [row[0] for row in cursor.fetchall() if row[0]]
+        opponent_rows = cached_query('filter_opponents', (), lambda: self._fetch_all(
+            "SELECT DISTINCT opponent_player_name FROM matches WHERE opponent_player_name IS NOT NULL AND opponent_player_name != 'Opponent' ORDER BY opponent_player_name"))
+        opponents = ["All Opponents"] + [row[0] for row in opponent_rows if row[0]]
         
         menu = self.trend_opponent_filter_menu["menu"]
         menu.delete(0, "end")
@@ -1885,128 +2099,211 @@ class SnapTrackerApp:
         
         if not self.trend_opponent_filter_var.get() and effective_opp_options:
              self.trend_opponent_filter_var.set(effective_opp_options[0])
-
-        conn.close()
         
         # Apply the filter to update the history view
         self.apply_history_filter()
     
     def apply_history_filter(self, event=None):
         """Apply filters to match history view"""
-        # Clear current items
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
-        
         # Get filter values
         #selected_deck_name = self.history_deck_filter_var.get()
         selected_season = self.season_filter_var.get()
         selected_result = self.result_filter_var.get()
         search_text = self.search_var.get().lower()
         
-        # Build query
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
+        # Free-text search goes through the FTS5 index when the database has one
+        fts_query = build_match_search_query(search_text) if self.match_search_enabled else None
+        search_join = ""
+        params = []
+        if fts_query:
+            search_join = """JOIN 
+                (SELECT rowid AS hit_rowid, rank AS hit_rank FROM match_search WHERE match_search MATCH ?) hits ON hits.hit_rowid = m.rowid"""
+            params.append(fts_query)
         
-        query = """
-            SELECT 
-                m.timestamp_ended, COALESCE(d.deck_name, 'Unknown Deck'), 
-                m.opponent_player_name, m.result, m.cubes_changed, m.turns_taken, 
-                m.loc_1_def_id, m.loc_2_def_id, m.loc_3_def_id, m.game_id
-            FROM 
-                matches m 
-            LEFT JOIN 
+        # Filtered matches; shared by the model, page and summary queries
+        from_where_sql = f"""
+            FROM
+                matches m
+            {search_join}
+            LEFT JOIN
                 decks d ON m.deck_id = d.id
             WHERE 1=1
         """
-        params = []
         
         # --- MODIFIED DECK FILTERING ---
-        print(f"DEBUG apply_history_filter: self.history_selected_deck_names = {self.history_selected_deck_names}") # DEBUG
-        if self.history_selected_deck_names: 
+        if self.history_selected_deck_names:
             placeholders = ', '.join(['?'] * len(self.history_selected_deck_names))
-            query += f" AND d.deck_name IN ({placeholders})"
-            params.extend(list(self.history_selected_deck_names))
-            print(f"DEBUG apply_history_filter: Added deck filter with params: {list(self.history_selected_deck_names)}") # DEBUG
-        else:
-            print("DEBUG apply_history_filter: No specific decks selected, showing all.") # DEBUG
+            from_where_sql += f" AND d.deck_name IN ({placeholders})"
+            params.extend(sorted(self.history_selected_deck_names))
         # --- END MODIFIED ---
         
-        # if selected_deck_name != "All Decks":
-            # query += " AND d.deck_name = ?"
-            # params.append(selected_deck_name)
-        
         if selected_season != "All Seasons":
-            query += " AND m.season = ?"
+            from_where_sql += " AND m.season = ?"
             params.append(selected_season)
         
         if selected_result != "All Results":
-            query += " AND m.result = ?"
+            from_where_sql += " AND m.result = ?"
             params.append(selected_result.lower())
         
-        if search_text:
-            query += """ AND (
-                lower(COALESCE(d.deck_name, '')) LIKE ? OR 
-                lower(COALESCE(m.opponent_player_name, '')) LIKE ? OR 
-                lower(COALESCE(m.loc_1_def_id, '')) LIKE ? OR 
-                lower(COALESCE(m.loc_2_def_id, '')) LIKE ? OR 
+        if search_text and not fts_query: # LIKE fallback without FTS5
+            from_where_sql += """ AND (
+                lower(COALESCE(d.deck_name, '')) LIKE ? OR
+                lower(COALESCE(m.opponent_player_name, '')) LIKE ? OR
+                lower(COALESCE(m.loc_1_def_id, '')) LIKE ? OR
+                lower(COALESCE(m.loc_2_def_id, '')) LIKE ? OR
                 lower(COALESCE(m.loc_3_def_id, '')) LIKE ? OR
-                lower(COALESCE(m.notes, '')) LIKE ? 
+                lower(COALESCE(m.notes, '')) LIKE ?
             )""" # Added notes to search
             search_pattern = f"%{search_text}%"
             params.extend([search_pattern] * 6) # Increased to 6
         
-        query += " ORDER BY m.timestamp_ended DESC"
+        # Sort key: the clicked heading, else best full-text matches first while searching, else newest first
+        if self.history_sort:
+            key_sql, descending = HISTORY_SORT_KEY_SQL[self.history_sort[0]], self.history_sort[1]
+        elif fts_query:
+            key_sql, descending = "hits.hit_rank", False
+        else:
+            key_sql, descending = HISTORY_SORT_KEY_SQL["Timestamp"], True
+        direction = "DESC" if descending else "ASC"
+        
+        model = {
+            'from_where_sql': from_where_sql,
+            'params': tuple(params),
+            'order_sql': f"ORDER BY {key_sql} {direction}, m.game_id {direction}",
+            # Keyset condition: rows after the last loaded (key, game_id) in display order
+            'after_sql': f"AND ({key_sql}, m.game_id) {'<' if descending else '>'} (?, ?)",
+        }
         
-        cursor.execute(query, tuple(params))
-        matches = cursor.fetchall()
+        def fetch_model(conn):
+            # Keys and ids for every filtered match, but full rows only for the first page
+            keys = conn.execute(f"SELECT {key_sql}, m.game_id {from_where_sql} {model['order_sql']}", model['params']).fetchall()
+            first_page = conn.execute(self._history_page_sql(model, False), model['params'] + (HISTORY_PAGE_SIZE,)).fetchall()
+            totals = conn.execute(f"""
+                SELECT
+                    COUNT(*), SUM(m.result = 'win'), SUM(m.result = 'loss'), SUM(m.result = 'tie'),
+                    COALESCE(SUM(m.cubes_changed), 0), COALESCE(SUM(m.turns_taken), 0)
+                {from_where_sql}
+            """, model['params']).fetchone()
+            top_locations = conn.execute(f"""
+                SELECT cd.def_id, COUNT(*)
+                FROM match_locations ml
+                JOIN card_defs cd ON cd.id = ml.location_id
+                WHERE ml.game_id IN (SELECT m.game_id {from_where_sql})
+                GROUP BY ml.location_id ORDER BY COUNT(*) DESC, cd.def_id LIMIT 5
+            """, model['params']).fetchall()
+            return dict(model, keys=keys, first_page=first_page, totals=totals, top_locations=top_locations)
+        
+        history_filters = (self.history_selected_deck_names, selected_season, selected_result, search_text, self.history_sort)
+        self._submit_work('history', history_filters, fetch_model, self._show_history_matches)
+    
+    def _history_page_sql(self, model, after_cursor):
+        """Keyset-paginated history rows; params are the model's, then the (key, game_id) cursor if after_cursor, then the limit"""
+        return f"""
+            SELECT
+                {ENDED_AT_SHORT_SQL}, COALESCE(d.deck_name, 'Unknown Deck'),
+                m.opponent_player_name, m.result, m.cubes_changed, m.turns_taken,
+                m.loc_1_def_id, m.loc_2_def_id, m.loc_3_def_id, m.game_id
+            {model['from_where_sql']} {model['after_sql'] if after_cursor else ''}
+            {model['order_sql']}
+            LIMIT ?
+        """
+    
+    def schedule_history_search(self):
+        """Debounce search box edits so the filter runs once typing pauses"""
+        if self.history_search_after_id is not None:
+            self.root.after_cancel(self.history_search_after_id)
+        self.history_search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self._run_history_search)
+    
+    def _run_history_search(self):
+        self.history_search_after_id = None
+        self.apply_history_filter()
+    
+    def _show_history_matches(self, model):
+        """Reset the history tree to a freshly fetched model and show its first page and summary"""
+        self.history_table.clear()
+        self.history_all_selected = False
         
-        # Insert matches into treeview
+        # Cache hits hand back the same model, so page through a copy
+        self.history_model = dict(model, loaded=0)
+        self._insert_history_rows(model['first_page'])
+        
+        # Calculate and display stats for filtered matches
+        self.calculate_and_display_stats(model['totals'], model['top_locations'])
+    
+    def _insert_history_rows(self, matches):
+        """Append a page of fetched rows to the history tree"""
         for match in matches:
-            try:
-                ts_str = datetime.datetime.strptime(match[0].split('.')[0], "%Y-%m-%d %H:%M:%S").strftime("%y-%m-%d %H:%M")
-            except (ValueError, TypeError):
-                ts_str = match[0]
-            
+            ts_str = match[0] # Already formatted in SQL
+        
             # Resolve location names if using card_db
             loc1, loc2, loc3 = match[6], match[7], match[8]
             if self.card_db and self.display_card_names_var.get():
                 loc1 = self.card_db.get(loc1, {}).get('name', loc1) if loc1 else '?'
                 loc2 = self.card_db.get(loc2, {}).get('name', loc2) if loc2 else '?'
                 loc3 = self.card_db.get(loc3, {}).get('name', loc3) if loc3 else '?'
-            
-            self.history_tree.insert(
-                "", "end", 
-                values=(
-                    ts_str, match[1], match[2], match[3], 
-                    match[4] if match[4] is not None else '?', 
+        
+            self.history_table.insert(
+                (
+                    ts_str, match[1], match[2], match[3],
+                    match[4] if match[4] is not None else '?',
                     match[5], loc1, loc2, loc3
-                ), 
+                ),
                 iid=match[9] # Use game_id as item ID
             )
-        
-        # Calculate and display stats for filtered matches
-        self.calculate_and_display_stats(matches)
-        
-        conn.close()
+        self.history_model['loaded'] += len(matches)
+        if self.history_all_selected and matches:
+            self.history_tree.selection_add([match[9] for match in matches])
+    
+    def _load_next_history_page(self):
+        """Materialize the next page of the model, continuing after the last loaded row's sort key"""
+        self.history_page_pending = False
+        model = self.history_model
+        if not model or model['loaded'] >= len(model['keys']):
+            return
+        cursor_key = tuple(model['keys'][model['loaded'] - 1])
+        try:
+            rows = self._fetch_all(self._history_page_sql(model, True), model['params'] + cursor_key + (HISTORY_PAGE_SIZE,))
+        except sqlite3.Error as e:
+            self.log_error(f"Error loading match history page: {e}", traceback.format_exc())
+            return
+        self._insert_history_rows(rows)
     
-    def calculate_and_display_stats(self, filtered_matches):
-        """Calculate statistics from filtered matches and display them"""
+    def _on_history_yscroll(self, first, last):
+        """Scrollbar update for the history tree; fetches the next page when the view nears the loaded end"""
+        self.history_vsb.set(first, last)
+        model = self.history_model
+        if (model and not self.history_page_pending and float(last) > 0.9
+                and model['loaded'] < len(model['keys'])):
+            self.history_page_pending = True
+            self.root.after_idle(self._load_next_history_page)
+    
+    def select_all_history_matches(self, event=None):
+        """Select every filtered match, including pages not loaded yet"""
+        self.history_all_selected = True
+        self.history_tree.selection_set(self.history_tree.get_children())
+        return "break"
+    
+    def _selected_history_game_ids(self):
+        """Selected game ids in list order; all of the model's after Select All"""
+        selected_items = self.history_tree.selection()
+        if (self.history_all_selected and self.history_model
+                and len(selected_items) == len(self.history_tree.get_children())):
+            return [game_id for _, game_id in self.history_model['keys']]
+        self.history_all_selected = False # Selection changed since Select All
+        return list(selected_items)
+
+    def calculate_and_display_stats(self, totals, top_locations):
+        """Display totals over the filtered matches (see apply_history_filter) and their most common locations"""
         self.stats_text_widget.config(state=tk.NORMAL)
         self.stats_text_widget.delete(1.0, tk.END)
         
-        if not filtered_matches:
+        total_games, wins, losses, ties, total_cubes, total_turns = totals
+        if not total_games:
             self.stats_summary_var.set("No matches found.")
             self.stats_text_widget.insert(tk.END, "No matches found.")
             self.stats_text_widget.config(state=tk.DISABLED)
             return
         
-        # Calculate basic stats
-        total_games = len(filtered_matches)
-        wins = sum(1 for m in filtered_matches if m[3] == 'win')
-        losses = sum(1 for m in filtered_matches if m[3] == 'loss')
-        ties = sum(1 for m in filtered_matches if m[3] == 'tie')
-        total_cubes = sum(m[4] for m in filtered_matches if m[4] is not None)
-        
         win_rate = (wins / total_games * 100) if total_games > 0 else 0
         avg_cubes = (total_cubes / total_games) if total_games > 0 else 0
         
@@ -2028,24 +2325,13 @@ class SnapTrackerApp:
         self.stats_summary_var.set(f"{filter_selection} - Win Rate: {win_rate:.1f}%, Net Cubes: {total_cubes}")
         
         # Calculate additional stats
-        avg_game_length = sum(m[5] for m in filtered_matches if m[5] is not None) / total_games if total_games > 0 else 0
+        avg_game_length = total_turns / total_games if total_games > 0 else 0
         summary += f"Average Game Length: {avg_game_length:.1f} turns\n"
         
-        # Count most common locations
-        location_counter = Counter()
-        for match in filtered_matches:
-            if match[6]:
-                location_counter[match[6]] += 1
-            if match[7]:
-                location_counter[match[7]] += 1
-            if match[8]:
-                location_counter[match[8]] += 1
-        
         # Display most common locations
-        common_locations = location_counter.most_common(5)
-        if common_locations:
+        if top_locations:
             summary += "\nMost Common Locations:\n"
-            for loc, count in common_locations:
+            for loc, count in top_locations:
                 # Use card name if available
                 loc_name = loc
                 if self.card_db and self.display_card_names_var.get() and loc in self.card_db:
@@ -2075,12 +2361,12 @@ class SnapTrackerApp:
         conn = sqlite3.connect(DB_NAME)
         cursor = conn.cursor()
         
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
-                m.timestamp_ended, COALESCE(d.deck_name, 'Unknown'), 
+                {ENDED_AT_LONG_SQL}, COALESCE(d.deck_name, 'Unknown'), 
                 m.opponent_player_name, m.result, m.cubes_changed, m.turns_taken,
                 m.loc_1_def_id, m.loc_2_def_id, m.loc_3_def_id, 
-                d.card_ids_json, m.opp_revealed_cards_json, m.notes
+                m.deck_id, m.opp_revealed_cards_json, m.notes
             FROM 
                 matches m 
             LEFT JOIN 
@@ -2092,14 +2378,14 @@ class SnapTrackerApp:
         match_details = cursor.fetchone()
         
         if match_details:
-            # Format timestamp
-            try:
-                timestamp = datetime.datetime.strptime(
-                    match_details[0].split('.')[0], 
-                    "%Y-%m-%d %H:%M:%S"
-                ).strftime("%Y-%m-%d %H:%M:%S")
-            except (ValueError, TypeError):
-                timestamp = match_details[0]
+            # Deck list comes from the normalized deck_cards table
+            cursor.execute(
+                "SELECT cd.def_id FROM deck_cards dc JOIN card_defs cd ON cd.id = dc.card_id WHERE dc.deck_id = ? ORDER BY cd.def_id",
+                (match_details[9],)
+            )
+            deck_card_ids = [row[0] for row in cursor.fetchall()]
+            
+            timestamp = match_details[0] # Formatted in SQL
             
             # Start building details
             details_str = f"Game ID: {selected_item_id}\n"
@@ -2128,21 +2414,17 @@ class SnapTrackerApp:
                 details_str += f"\nNotes: {match_details[11]}\n"
             
             # Add deck cards with names if available
-            if match_details[9]:
-                try:
-                    cards = json.loads(match_details[9])
-                    if self.card_db and self.display_card_names_var.get():
-                        named_cards = []
-                        for card_id in cards:
-                            if card_id in self.card_db:
-                                named_cards.append(self.card_db[card_id].get('name', card_id))
-                            else:
-                                named_cards.append(card_id)
-                        details_str += f"\nYour Deck Cards: {', '.join(named_cards)}\n"
-                    else:
-                        details_str += f"\nYour Deck Cards: {', '.join(cards)}\n"
-                except json.JSONDecodeError:
-                    pass
+            if deck_card_ids:
+                if self.card_db and self.display_card_names_var.get():
+                    named_cards = []
+                    for card_id in deck_card_ids:
+                        if card_id in self.card_db:
+                            named_cards.append(self.card_db[card_id].get('name', card_id))
+                        else:
+                            named_cards.append(card_id)
+                    details_str += f"\nYour Deck Cards: {', '.join(named_cards)}\n"
+                else:
+                    details_str += f"\nYour Deck Cards: {', '.join(deck_card_ids)}\n"
             
             # Add opponent revealed cards with names if available
             if match_details[10]:
@@ -2165,19 +2447,7 @@ class SnapTrackerApp:
             details_str += "\n--- Events ---\n"
             self.stats_text_widget.insert(tk.END, details_str)
             
-            cursor.execute("""
-                SELECT 
-                    turn, event_type, player_type, card_def_id, 
-                    location_index, source_zone, target_zone, details_json 
-                FROM 
-                    match_events 
-                WHERE 
-                    game_id = ? 
-                ORDER BY 
-                    turn, id
-            """, (selected_item_id,))
-            
-            events = cursor.fetchall()
+            events = get_match_events(selected_item_id)
             
             if events:
                 for ev in events:
@@ -2190,15 +2460,8 @@ class SnapTrackerApp:
                     if self.card_db and self.display_card_names_var.get() and card_id in self.card_db:
                         card_name = self.card_db[card_id].get('name', card_id)
                     
-                    # Parse details JSON
-                    ev_details_str = ev[7]
-                    details_dict = {}
-                    
-                    if ev_details_str:
-                        try:
-                            details_dict = json.loads(ev_details_str)
-                        except json.JSONDecodeError:
-                            details_dict = {"raw_details": ev_details_str}  # Show raw if not JSON
+                    # Details come back decoded; raw text means they were not a JSON object
+                    details_dict = ev[7] if isinstance(ev[7], dict) else {"raw_details": ev[7]}
                     
                     det_parts = [f"{k}:{v}" for k, v in details_dict.items()]
                     det_final = f" ({', '.join(det_parts)})" if det_parts else ""
@@ -2262,12 +2525,7 @@ class SnapTrackerApp:
         
         def save_note():
             note = note_text.get("1.0", tk.END).strip()
-            
-            conn_save = sqlite3.connect(DB_NAME)
-            cursor_save = conn_save.cursor()
-            cursor_save.execute("UPDATE matches SET notes = ? WHERE game_id = ?", (note, game_id))
-            conn_save.commit()
-            conn_save.close()
+            update_match_note(game_id, note)
             
             note_dialog.destroy()
             
@@ -2280,7 +2538,7 @@ class SnapTrackerApp:
     
     def delete_selected_matches(self):
         """Delete selected matches from the database"""
-        selected_items = self.history_tree.selection() # Returns a tuple of item IDs
+        selected_items = self._selected_history_game_ids() # Includes unloaded pages after Select All
         if not selected_items:
             messagebox.showinfo("Delete Matches", "Please select at least one match to delete.")
             return
@@ -2294,32 +2552,21 @@ class SnapTrackerApp:
         if not confirm:
             return
         
-        # Delete matches
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        
-        deleted_count = 0
-        for game_id in selected_items:
-            try:
-                # Delete associated events first (because of foreign key)
-                cursor.execute("DELETE FROM match_events WHERE game_id = ?", (game_id,))
-                
-                # Delete the match
-                cursor.execute("DELETE FROM matches WHERE game_id = ?", (game_id,))
-                deleted_count += 1
-            except sqlite3.Error as e:
-                self.log_error(f"Error deleting match {game_id}: {e}")
-        
-        conn.commit()
-        conn.close()
+        # Delete matches (events, revealed cards and rollups are handled in the same transaction)
+        try:
+            deleted_count = delete_matches(selected_items)
+        except sqlite3.Error as e:
+            self.log_error(f"Error deleting matches: {e}", traceback.format_exc())
+            messagebox.showerror("Delete Matches", f"Database error while deleting matches:\n{e}")
+            return
         
         messagebox.showinfo("Deletion Complete", f"{deleted_count} match(es) deleted.")
-        # Refresh the view
-        self.load_history_tab_data()
+        # Refresh the view (the stats tabs read the same rollups)
+        self.request_tab_refresh()
     
     def export_selected_matches(self):
         """Export only selected matches to CSV"""
-        selected_items = self.history_tree.selection()
+        selected_items = self._selected_history_game_ids()
         if not selected_items:
             messagebox.showinfo("Export Matches", "Please select at least one match to export.")
             return
@@ -2338,10 +2585,7 @@ class SnapTrackerApp:
         conn = sqlite3.connect(DB_NAME)
         cursor = conn.cursor()
         
-        # Prepare placeholders for the IN clause
-        placeholders = ', '.join(['?'] * len(selected_items))
-        
-        query = f"""
+        query = """
             SELECT 
                 m.game_id, m.timestamp_ended, COALESCE(d.deck_name, 'Unknown Deck'), 
                 m.opponent_player_name, m.result, m.cubes_changed, m.turns_taken,
@@ -2353,10 +2597,10 @@ class SnapTrackerApp:
             LEFT JOIN 
                 decks d ON m.deck_id = d.id
             WHERE
-                m.game_id IN ({placeholders})
+                m.game_id IN (SELECT value FROM json_each(?)) -- One parameter however many are selected
         """
         
-        cursor.execute(query, selected_items)
+        cursor.execute(query, (json.dumps(selected_items),))
         matches_to_export = cursor.fetchall() # Renamed to avoid conflict
         
         # Write to CSV
@@ -2381,136 +2625,33 @@ class SnapTrackerApp:
     
     def load_card_stats_data(self, event=None):
         """Load and display card statistics with extended metrics."""
-        for item in self.card_stats_tree.get_children():
-            self.card_stats_tree.delete(item)
-
         #selected_deck_name = self.card_stats_deck_filter_var.get()
         selected_season = self.card_stats_season_filter_var.get()
 
         #print(f"\nDEBUG load_card_stats_data (Extended): Filtering for deck: '{selected_deck_name}', season: '{selected_season}'")
 
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-
-        # --- Part 1: Get all relevant matches and the cards in their decks ---
-        match_deck_query_parts = ["""
-            SELECT 
-                m.game_id, m.result, m.cubes_changed, d.card_ids_json 
-            FROM 
-                matches m
-            JOIN 
-                decks d ON m.deck_id = d.id
-            WHERE 1=1 
-        """]
-        match_deck_params = []
-
-        if self.card_stats_selected_deck_names: # If set is not empty
-            placeholders = ', '.join(['?'] * len(self.card_stats_selected_deck_names))
-            match_deck_query_parts.append(f"AND d.deck_name IN ({placeholders})")
-            match_deck_params.extend(list(self.card_stats_selected_deck_names))
-        
-        
-        if selected_season != "All Seasons":
-            match_deck_query_parts.append("AND m.season = ?")
-            match_deck_params.append(selected_season)
+        # --- Part 1: Per-card stats from the card stats cache, on the query worker ---
+        deck_names = frozenset(self.card_stats_selected_deck_names) if self.card_stats_selected_deck_names else None
+        self._submit_work(
+            'card_stats', (deck_names, selected_season),
+            lambda conn: self._add_card_confidence(calculate_card_performance(deck_names, selected_season, conn)),
+            lambda card_performance: self._show_card_stats(card_performance, selected_season)
+        )
+    
+    def _show_card_stats(self, card_performance, selected_season):
+        """Populate the card stats tree (and chart, if shown) from the engine result"""
+        self.card_stats_performance = card_performance
         
-        cursor.execute(" ".join(match_deck_query_parts), tuple(match_deck_params))
-        all_match_deck_data = cursor.fetchall()
-
-        if not all_match_deck_data:
-            filter_msg = self.card_stats_deck_filter_display_var.get()
-            if selected_season != "All Seasons":
-                filter_msg += f", Season: {selected_season}"
-            self.card_stats_summary_var.set(f"No match data for {filter_msg}.")
-            conn.close()
-            return
-
-        # --- Part 2: Get all 'drawn' and 'played' events for local player for these matches ---
-        game_ids_for_events = [md[0] for md in all_match_deck_data]
-        event_query_parts = [f"""
-            SELECT game_id, card_def_id, event_type 
-            FROM match_events 
-            WHERE player_type = 'local' 
-              AND (event_type = 'drawn' OR event_type = 'played')
-              AND game_id IN ({','.join(['?'] * len(game_ids_for_events))})
-        """]
-        # No need for deck/season filter here as game_ids are already filtered
-        cursor.execute(" ".join(event_query_parts), tuple(game_ids_for_events))
-        all_event_data = cursor.fetchall()
-        conn.close() # Close DB connection once data is fetched
-
-        # --- Part 3: Process the data ---
-        # Organize events by game_id
-        game_events = defaultdict(lambda: {"drawn": set(), "played": set()})
-        for game_id, card_def_id, event_type in all_event_data:
-            if event_type == 'drawn':
-                game_events[game_id]["drawn"].add(card_def_id)
-            elif event_type == 'played':
-                game_events[game_id]["played"].add(card_def_id)
-                game_events[game_id]["drawn"].add(card_def_id) # If played, it must have been drawn
-
-        # Initialize card performance statistics
-        # Key: card_def_id
-        # Value: dict of stats
-        card_performance = defaultdict(lambda: {
-            "total_games_in_deck": 0, # Games where this card was part of the deck used
-            "drawn_games": 0, "drawn_wins": 0, "drawn_cubes": 0,
-            "played_games": 0, "played_wins": 0, "played_cubes": 0,
-            "not_drawn_games": 0, "not_drawn_wins": 0, "not_drawn_cubes": 0,
-            "not_played_games": 0, "not_played_wins": 0, "not_played_cubes": 0, # Not played (but could have been drawn)
-        })
-
-        # Iterate through each match
-        for game_id, result, cubes, deck_cards_json_str in all_match_deck_data:
-            cubes_val = cubes if cubes is not None else 0
-            is_win = (result == 'win')
-            
-            try:
-                deck_cards_for_this_game = set(json.loads(deck_cards_json_str))
-            except (json.JSONDecodeError, TypeError):
-                print(f"WARN: Could not parse deck_cards_json for game {game_id}: {deck_cards_json_str}")
-                continue # Skip this match if deck is unreadable
-
-            game_specific_drawn_cards = game_events[game_id]["drawn"]
-            game_specific_played_cards = game_events[game_id]["played"]
-
-            for card_id in deck_cards_for_this_game: # Iterate over all cards that were in the deck for this match
-                stats = card_performance[card_id]
-                stats["total_games_in_deck"] += 1
-
-                was_drawn = card_id in game_specific_drawn_cards
-                was_played = card_id in game_specific_played_cards
-
-                if was_drawn:
-                    stats["drawn_games"] += 1
-                    stats["drawn_cubes"] += cubes_val
-                    if is_win:
-                        stats["drawn_wins"] += 1
-                else: # Not drawn
-                    stats["not_drawn_games"] += 1
-                    stats["not_drawn_cubes"] += cubes_val
-                    if is_win:
-                        stats["not_drawn_wins"] += 1
-                
-                if was_played:
-                    stats["played_games"] += 1
-                    stats["played_cubes"] += cubes_val
-                    if is_win:
-                        stats["played_wins"] += 1
-                else: # Not played (but was in deck)
-                    stats["not_played_games"] += 1
-                    stats["not_played_cubes"] += cubes_val
-                    if is_win:
-                        stats["not_played_wins"] += 1
-        
-        # --- Part 4: Populate Treeview ---
+        # --- Part 2: Populate Treeview ---
         if not card_performance:
             filter_msg = self.card_stats_deck_filter_display_var.get()
             if selected_season != "All Seasons":
                 filter_msg += f", Season: {selected_season}"
             self.card_stats_summary_var.set(f"No card performance data for {filter_msg}.")
+            self.card_stats_table.set_rows([])
             return
 
+        rows = []
         for card_def, stats in card_performance.items():
             card_name = card_def
             if self.card_db and self.display_card_names_var.get() and card_def in self.card_db:
@@ -2550,9 +2691,9 @@ class SnapTrackerApp:
             elif stats["not_drawn_games"] > 0: # Never drawn
                 delta_cubes_drawn_vs_not = -avg_cubes_not_drawn
 
-            self.card_stats_tree.insert(
-                "", "end",
-                values=(
+            rows.append((
+                card_def,
+                (
                     card_name, # Card
                     stats["drawn_games"], f"{drawn_win_pct:.1f}%", # Drawn Games, Drawn Win %
                     stats["drawn_cubes"], f"{avg_cubes_drawn:.2f}",  # Net Cubes (Drawn), Avg Cubes (Drawn)
@@ -2567,10 +2708,24 @@ class SnapTrackerApp:
                     stats["not_played_cubes"], f"{avg_cubes_not_played:.2f}", # Net Cubes (Not Played), Avg Cubes (Not Played)
 
                     f"{delta_cubes_drawn_vs_not:.2f}",  # Delta C (Drawn vs ND)
-                    f"{delta_cubes_played_vs_not:.2f}"  # Delta C (Played vs NP)                    
+                    f"{delta_cubes_played_vs_not:.2f}",  # Delta C (Played vs NP)                    
+                    
+                    self._format_stat(stats["drawn_adj_win_pct"], "{:.1f}%"), self._format_stat(stats["drawn_win_pct_low"], "{:.1f}%"),
+                    self._format_stat(stats["played_adj_win_pct"], "{:.1f}%"), self._format_stat(stats["played_win_pct_low"], "{:.1f}%")
                 ),
-                tags=(card_def,)
-            )
+                (
+                    card_name,
+                    stats["drawn_games"], drawn_win_pct, stats["drawn_cubes"], avg_cubes_drawn,
+                    stats["played_games"], played_win_pct, stats["played_cubes"], avg_cubes_played,
+                    stats["not_drawn_games"], not_drawn_win_pct, stats["not_drawn_cubes"], avg_cubes_not_drawn,
+                    stats["not_played_games"], not_played_win_pct, stats["not_played_cubes"], avg_cubes_not_played,
+                    delta_cubes_drawn_vs_not, delta_cubes_played_vs_not,
+                    float(stats["drawn_adj_win_pct"]), float(stats["drawn_win_pct_low"]),
+                    float(stats["played_adj_win_pct"]), float(stats["played_win_pct_low"])
+                ),
+                (card_def,)
+            ))
+        self.card_stats_table.set_rows(rows)
 
         filter_msg = self.card_stats_deck_filter_display_var.get() # NEW
         if selected_season != "All Seasons":
@@ -2582,13 +2737,6 @@ class SnapTrackerApp:
     
     def update_card_stats_chart(self, card_performance):
         """Update the card stats chart with current data"""
-        # Clear the figure
-        self.card_stats_figure.clear()
-        
-        # Create subplots
-        ax1 = self.card_stats_figure.add_subplot(211)  # Win rates
-        ax2 = self.card_stats_figure.add_subplot(212)  # Cube values
-        
         # Prepare data for plotting
         cards = []
         drawn_win_rates = []
@@ -2598,8 +2746,8 @@ class SnapTrackerApp:
         
         # Get top 10 most played cards by win rate
         sorted_cards_data = sorted( # Renamed to avoid conflict
-            [(card_id, stats) for card_id, stats in card_performance.items() if len(stats["played_games"]) > 0],
-            key=lambda x: len(x[1]["played_games"]) * (x[1]["played_wins"] / len(x[1]["played_games"]) if len(x[1]["played_games"]) > 0 else 0),
+            [(card_id, stats) for card_id, stats in card_performance.items() if stats["played_games"] > 0],
+            key=lambda x: x[1]["played_wins"], # played_games * played win rate
             reverse=True
         )[:10]
         
@@ -2612,9 +2760,9 @@ class SnapTrackerApp:
             cards.append(card_name)
             
             # Calculate statistics
-            drawn_win_rate = (stats["drawn_wins"] / len(stats["drawn_games"]) * 100) if len(stats["drawn_games"]) > 0 else 0
-            played_win_rate = (stats["played_wins"] / len(stats["played_games"]) * 100) if len(stats["played_games"]) > 0 else 0
-            avg_cube_value = stats["played_cubes"] / len(stats["played_games"]) if len(stats["played_games"]) > 0 else 0
+            drawn_win_rate = (stats["drawn_wins"] / stats["drawn_games"] * 100) if stats["drawn_games"] > 0 else 0
+            played_win_rate = (stats["played_wins"] / stats["played_games"] * 100) if stats["played_games"] > 0 else 0
+            avg_cube_value = stats["played_cubes"] / stats["played_games"] if stats["played_games"] > 0 else 0
             
             drawn_win_rates.append(drawn_win_rate)
             played_win_rates.append(played_win_rate)
@@ -2628,59 +2776,8 @@ class SnapTrackerApp:
         net_cubes_list.reverse()
         avg_cubes_list.reverse()
         
-        # Set up colors from the theme
-        win_color = self.config['Colors']['win']
-        loss_color = self.config['Colors']['loss']
-        neutral_color = self.config['Colors']['neutral']
-        bg_color = self.config['Colors']['bg_main']
-        fg_color = self.config['Colors']['fg_main']
-        
-        # Plot win rates
-        y_pos = range(len(cards))
-        ax1.barh(y_pos, played_win_rates, height=0.4, align='center', color=win_color, alpha=0.8, label='Played Win %')
-        ax1.barh([y + 0.4 for y in y_pos], drawn_win_rates, height=0.4, align='center', color=neutral_color, alpha=0.8, label='Drawn Win %')
-        
-        # Add a vertical line at 50% win rate
-        ax1.axvline(x=50, color=fg_color, linestyle='--', alpha=0.5)
-        
-        # Set up axes
-        ax1.set_yticks(y_pos)
-        ax1.set_yticklabels(cards)
-        ax1.set_xlabel('Win %')
-        ax1.set_title('Card Win Rates')
-        ax1.legend()
-        
-        # Set limits
-        ax1.set_xlim(0, 100)
-        
-        # Plot cube values
-        ax2.barh(y_pos, avg_cubes_list, height=0.8, align='center', 
-               color=[win_color if avg > 0 else loss_color for avg in avg_cubes_list], alpha=0.8)
-        
-        # Add a vertical line at 0 cubes
-        ax2.axvline(x=0, color=fg_color, linestyle='--', alpha=0.5)
-        
-        # Set up axes
-        ax2.set_yticks(y_pos)
-        ax2.set_yticklabels(cards)
-        ax2.set_xlabel('Avg. Cubes per Game')
-        ax2.set_title('Card Cube Value')
-        
-        # Set theme colors
-        for ax_item in [ax1, ax2]: # Renamed to avoid conflict
-            ax_item.set_facecolor(bg_color)
-            ax_item.tick_params(colors=fg_color)
-            ax_item.xaxis.label.set_color(fg_color)
-            ax_item.yaxis.label.set_color(fg_color)
-            ax_item.title.set_color(fg_color)
-            for spine in ax_item.spines.values():
-                spine.set_color(fg_color)
-        
-        self.card_stats_figure.patch.set_facecolor(bg_color)
-        
-        # Adjust layout and redraw
-        self.card_stats_figure.tight_layout()
-        self.card_stats_canvas.draw()
+        # Bars, labels and theme are updated in place
+        self.card_stats_chart.update(self.config['Colors'], cards, played_win_rates, drawn_win_rates, avg_cubes_list)
     
     def toggle_card_stats_view(self):
         """Toggle between table and chart view for card stats"""
@@ -2695,40 +2792,8 @@ class SnapTrackerApp:
             self.card_stats_table_frame.pack_forget()
             self.card_stats_chart_frame.pack(fill=tk.BOTH, expand=True)
             
-            # Update the chart
-            # Get current card performance data from the treeview
-            card_performance = {}
-            
-            for item_id in self.card_stats_tree.get_children():
-                values = self.card_stats_tree.item(item_id, "values")
-                card_name = values[0]
-                
-                # Try to get card ID
-                card_id = card_name
-                for cid, card_info in self.card_db.items():
-                    if card_info.get('name') == card_name:
-                        card_id = cid
-                        break
-                
-                drawn_games = int(values[1])
-                drawn_win_pct = float(values[2].replace("%", ""))
-                played_games = int(values[3])
-                played_win_pct = float(values[4].replace("%", ""))
-                played_cubes = int(values[5]) if values[5] else 0
-                
-                # Calculate derived values
-                drawn_wins = int(drawn_games * drawn_win_pct / 100)
-                played_wins = int(played_games * played_win_pct / 100)
-                
-                card_performance[card_id] = {
-                    "drawn_games": set(range(drawn_games)),  # Dummy set of appropriate size
-                    "drawn_wins": drawn_wins,
-                    "played_games": set(range(played_games)),  # Dummy set of appropriate size
-                    "played_wins": played_wins,
-                    "played_cubes": played_cubes
-                }
-            
-            self.update_card_stats_chart(card_performance)
+            # Update the chart from the same engine result the table was built from
+            self.update_card_stats_chart(self.card_stats_performance)
     
     def on_card_stats_select(self, event):
         """Handle selection of a card in the card stats view"""
@@ -2759,40 +2824,22 @@ class SnapTrackerApp:
         selected_deck = self.matchup_deck_filter_var.get()
         selected_season = self.matchup_season_filter_var.get()
         
-        # Clear current data
-        for item in self.matchup_tree.get_children():
-            self.matchup_tree.delete(item)
-        
-        # Clear details
-        for item in self.revealed_cards_tree.get_children():
-            self.revealed_cards_tree.delete(item)
-            
-        for item in self.matchup_history_tree.get_children():
-            self.matchup_history_tree.delete(item)
-            
-        self.matchup_summary_var.set("Select an opponent to view matchup details")
-        
-        # Connect to database
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        
         # Build query
         query_parts = ["""
             SELECT 
-                m.opponent_player_name,
-                COUNT(*) as matches,
-                SUM(CASE WHEN m.result = 'win' THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN m.result = 'loss' THEN 1 ELSE 0 END) as losses,
-                SUM(CASE WHEN m.result = 'tie' THEN 1 ELSE 0 END) as ties,
-                SUM(m.cubes_changed) as net_cubes,
-                GROUP_CONCAT(m.opp_revealed_cards_json, '|') as all_revealed_cards
+                r.opponent,
+                SUM(r.games) as matches,
+                SUM(r.wins) as wins,
+                SUM(r.losses) as losses,
+                SUM(r.ties) as ties,
+                SUM(r.net_cubes) as net_cubes
             FROM 
-                matches m
+                rollup_opponent_deck_season r
             LEFT JOIN
-                decks d ON m.deck_id = d.id
+                decks d ON r.deck_id = d.id
             WHERE 
-                m.opponent_player_name IS NOT NULL
-                AND m.opponent_player_name != 'Opponent'
+                r.opponent != ''
+                AND r.opponent != 'Opponent'
         """]
         
         params = []
@@ -2802,18 +2849,26 @@ class SnapTrackerApp:
             params.append(selected_deck)
         
         if selected_season != "All Seasons":
-            query_parts.append("AND m.season = ?")
+            query_parts.append("AND r.season = ?")
             params.append(selected_season)
         
-        query_parts.append("GROUP BY m.opponent_player_name ORDER BY matches DESC, wins DESC")
+        query_parts.append("GROUP BY r.opponent ORDER BY matches DESC, wins DESC")
         final_query = " ".join(query_parts)
         
-        cursor.execute(final_query, tuple(params))
-        matchup_data = cursor.fetchall()
-        
-        # Insert data into treeview
-        for row in matchup_data:
-            name, matches, wins, losses, ties, net_cubes, _ = row
+        self._submit_work(
+            'matchups', (selected_deck, selected_season),
+            lambda conn: self._rows_with_confidence(conn, final_query, params, 'opponent', selected_deck, selected_season),
+            self._show_matchups
+        )
+    
+    def _show_matchups(self, result):
+        """Reconcile the matchup tree with fetched rows and refresh or reset the details pane"""
+        matchup_data, confidence = result
+        rows = []
+        
+        # Build the rows, keyed by opponent
+        for row_index, row in enumerate(matchup_data):
+            name, matches, wins, losses, ties, net_cubes = row
             
             # Calculate win rate
             win_rate = (wins / matches * 100) if matches > 0 else 0
@@ -2821,9 +2876,10 @@ class SnapTrackerApp:
             # Calculate average cubes
             avg_cubes = (net_cubes / matches) if matches > 0 and net_cubes is not None else 0
             
-            self.matchup_tree.insert(
-                "", "end",
-                values=(
+            confidence_values = self._confidence_values(confidence, row_index)
+            rows.append((
+                f"opponent:{name}", # Item ID; an empty name would mean the tree root
+                (
                     name,
                     matches,
                     f"{win_rate:.1f}%",
@@ -2831,12 +2887,28 @@ class SnapTrackerApp:
                     losses,
                     ties,
                     net_cubes if net_cubes is not None else 0,
-                    f"{avg_cubes:.2f}"
+                    f"{avg_cubes:.2f}",
+                    *self._confidence_display(confidence_values)
                 ),
-                tags=(name,)  # Use opponent name as tag
-            )
+                (name, matches, win_rate, wins, losses, ties, net_cubes or 0, avg_cubes, *confidence_values),
+                (name,)  # Use opponent name as tag
+            ))
+        self.matchup_table.set_rows(rows)
         
-        conn.close()
+        # The selected opponent survives the refresh; show its updated details
+        selected_item = self.matchup_tree.focus()
+        if selected_item and self.matchup_tree.exists(selected_item):
+            self.load_matchup_details(self.matchup_tree.item(selected_item, "values")[0])
+            return
+        
+        # Clear details
+        for item in self.revealed_cards_tree.get_children():
+            self.revealed_cards_tree.delete(item)
+            
+        for item in self.matchup_history_tree.get_children():
+            self.matchup_history_tree.delete(item)
+            
+        self.matchup_summary_var.set("Select an opponent to view matchup details")
     
     def on_matchup_select(self, event):
         """Handle selection of an opponent in the matchup view"""
@@ -2851,6 +2923,32 @@ class SnapTrackerApp:
         # Update details
         self.load_matchup_details(opponent_name)
     
+    def on_revealed_card_double_click(self, event):
+        """Select the matches in which the opponent revealed the double-clicked card"""
+        card_item = self.revealed_cards_tree.identify_row(event.y)
+        opponent_item = self.matchup_tree.focus()
+        if not card_item or not opponent_item:
+            return
+        
+        card_tags = self.revealed_cards_tree.item(card_item, "tags")
+        if not card_tags:
+            return
+        card_id = card_tags[0]
+        opponent_name = self.matchup_tree.item(opponent_item, "values")[0]
+        
+        try:
+            game_ids = get_matches_with_opponent_card(card_id, opponent_name)
+        except sqlite3.Error as e:
+            self.log_error(f"DB error looking up matches with card {card_id}: {e}")
+            return
+        
+        # Only rows currently shown (respecting the deck/season filters) can be selected
+        shown_game_ids = [gid for gid in game_ids if self.matchup_history_tree.exists(gid)]
+        self.matchup_details_notebook.select(self.matchup_history_tab)
+        self.matchup_history_tree.selection_set(shown_game_ids)
+        if shown_game_ids:
+            self.matchup_history_tree.see(shown_game_ids[0])
+    
     def load_matchup_details(self, opponent_name):
         """Load detailed matchup information for an opponent"""
         # Get filter values
@@ -2926,55 +3024,15 @@ class SnapTrackerApp:
 
             # --- Get Revealed Cards (only if matches > 0) ---
             if matches > 0:
-                query_parts_revealed = ["""
-                    SELECT
-                        m.opp_revealed_cards_json
-                    FROM
-                        matches m
-                    LEFT JOIN
-                        decks d ON m.deck_id = d.id
-                    WHERE
-                        m.opponent_player_name = ?
-                        AND m.opp_revealed_cards_json IS NOT NULL
-                        AND m.opp_revealed_cards_json != 'null'
-                        AND m.opp_revealed_cards_json != '[]'
-                """]
-                params_revealed = [opponent_name]
-
-                if selected_deck != "All Decks":
-                    query_parts_revealed.append("AND d.deck_name = ?")
-                    params_revealed.append(selected_deck)
-                if selected_season != "All Seasons":
-                    query_parts_revealed.append("AND m.season = ?")
-                    params_revealed.append(selected_season)
-
-                final_query_revealed = " ".join(query_parts_revealed)
-                # print(f"DEBUG: Revealed Query: {final_query_revealed}") # Optional Debug
-                # print(f"DEBUG: Revealed Params: {params_revealed}")    # Optional Debug
-                cursor.execute(final_query_revealed, tuple(params_revealed))
-                revealed_cards_data = cursor.fetchall()
-
-                revealed_card_counter = Counter()
-                valid_revealed_games = 0 # Count games where parsing worked
-                for row in revealed_cards_data:
-                    try:
-                        cards_json = row[0]
-                        if cards_json:
-                            cards = json.loads(cards_json)
-                            if isinstance(cards, list): # Ensure it's a list
-                                revealed_card_counter.update(cards)
-                                valid_revealed_games += 1 # Count this game if parse successful
-                    except (json.JSONDecodeError, TypeError) as json_e:
-                         print(f"WARN: Error parsing revealed cards JSON for opponent {opponent_name}: {json_e} - JSON: {cards_json[:100]}...")
-                         continue # Skip this row
-
-                most_common_cards = revealed_card_counter.most_common(20)
+                most_common_cards, valid_revealed_games = get_revealed_card_frequencies(
+                    opponent_name, selected_deck, selected_season, limit=20
+                )
                 for card_id, count in most_common_cards:
                     card_name = card_id
                     if self.card_db and self.display_card_names_var.get() and card_id in self.card_db:
                         card_name = self.card_db[card_id].get('name', card_id)
 
-                    # Percentage based on games where revealed cards were successfully parsed
+                    # Percentage based on games where the opponent revealed at least one card
                     percentage = (count / valid_revealed_games * 100) if valid_revealed_games > 0 else 0
 
                     self.revealed_cards_tree.insert(
@@ -2985,13 +3043,13 @@ class SnapTrackerApp:
 
             # --- Get Match History (only if matches > 0) ---
             if matches > 0:
-                query_parts_history = ["""
+                query_parts_history = [f"""
                     SELECT
-                        m.timestamp_ended,
+                        {ENDED_AT_SHORT_SQL},
                         COALESCE(d.deck_name, 'Unknown Deck'),
                         m.result,
                         m.cubes_changed,
-                        m.opp_revealed_cards_json,
+                        (SELECT GROUP_CONCAT(cd.def_id, '|') FROM match_opp_cards oc JOIN card_defs cd ON cd.id = oc.card_id WHERE oc.game_id = m.game_id),
                         m.notes,
                         m.game_id -- Include game_id for potential future use/debugging
                     FROM
@@ -3010,7 +3068,7 @@ class SnapTrackerApp:
                     query_parts_history.append("AND m.season = ?")
                     params_history.append(selected_season)
 
-                query_parts_history.append("ORDER BY m.timestamp_ended DESC")
+                query_parts_history.append("ORDER BY m.ended_at DESC")
                 final_query_history = " ".join(query_parts_history)
                 # print(f"DEBUG: History Query: {final_query_history}") # Optional Debug
                 # print(f"DEBUG: History Params: {params_history}")    # Optional Debug
@@ -3018,25 +3076,18 @@ class SnapTrackerApp:
                 history_data = cursor.fetchall()
 
                 for row in history_data:
-                    timestamp, deck_name, result, cubes, revealed_cards_json, notes, game_id = row
-
-                    try: date_str = datetime.datetime.strptime(timestamp.split('.')[0], "%Y-%m-%d %H:%M:%S").strftime("%y-%m-%d %H:%M")
-                    except: date_str = timestamp
+                    date_str, deck_name, result, cubes, revealed_cards_concat, notes, game_id = row
 
                     revealed_cards_str = "None"
-                    if revealed_cards_json and revealed_cards_json.lower() != 'null':
-                        try:
-                            cards = json.loads(revealed_cards_json)
-                            if cards:
-                                card_display_list = []
-                                if self.card_db and self.display_card_names_var.get():
-                                    for card_id_rev in cards:
-                                        card_display_list.append(self.card_db.get(card_id_rev, {}).get('name', card_id_rev))
-                                else:
-                                     card_display_list = cards
-                                revealed_cards_str = ", ".join(card_display_list)
-                        except json.JSONDecodeError:
-                            revealed_cards_str = "Error"
+                    if revealed_cards_concat:
+                        cards = sorted(revealed_cards_concat.split('|')) # GROUP_CONCAT order is undefined
+                        card_display_list = []
+                        if self.card_db and self.display_card_names_var.get():
+                            for card_id_rev in cards:
+                                card_display_list.append(self.card_db.get(card_id_rev, {}).get('name', card_id_rev))
+                        else:
+                             card_display_list = cards
+                        revealed_cards_str = ", ".join(card_display_list)
 
                     self.matchup_history_tree.insert(
                         "", "end",
@@ -3065,79 +3116,53 @@ class SnapTrackerApp:
     
     def load_location_stats(self, event=None):
         """Load and display location statistics"""
-        # Clear current data
-        for item in self.location_stats_tree.get_children():
-            self.location_stats_tree.delete(item)
-        
         # Get filter values
         selected_deck = self.location_deck_filter_var.get()
         selected_season = self.location_season_filter_var.get()
         
-        # Connect to database
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        
-        # Build query for locations
-        # Construct the subquery parts with aliases for deck name and season
-        # This ensures filters can be applied correctly within each part of the UNION ALL
-        
-        subquery_template = """
+        # Build query for locations from the (location, deck, season) rollup
+        query_parts = ["""
             SELECT 
-                m.loc_{loc_num}_def_id as loc_id, m.result, m.cubes_changed, d.deck_name as deck_name_alias, m.season as season_alias
+                cd.def_id as loc_id,
+                SUM(r.games) as matches,
+                SUM(r.wins) as wins,
+                SUM(r.losses) as losses,
+                SUM(r.ties) as ties,
+                SUM(r.net_cubes) as net_cubes
             FROM 
-                matches m
+                rollup_location_deck_season r
+            JOIN
+                card_defs cd ON cd.id = r.location_id
             LEFT JOIN
-                decks d ON m.deck_id = d.id
-            WHERE 
-                m.loc_{loc_num}_def_id IS NOT NULL AND m.loc_{loc_num}_def_id != ''
-        """
-
-        subqueries = []
-        for i in range(1, 4):
-            subqueries.append(subquery_template.format(loc_num=i))
-
-        # Apply filters to each subquery
-        filter_conditions = []
-        params_for_each_subquery = []
+                decks d ON r.deck_id = d.id
+            WHERE 1=1
+        """]
+        final_params = []
 
         if selected_deck != "All Decks":
-            filter_conditions.append("deck_name_alias = ?")
-            params_for_each_subquery.append(selected_deck)
+            query_parts.append("AND d.deck_name = ?")
+            final_params.append(selected_deck)
         
         if selected_season != "All Seasons":
-            filter_conditions.append("season_alias = ?")
-            params_for_each_subquery.append(selected_season)
-
-        if filter_conditions:
-            filter_string = " AND " + " AND ".join(filter_conditions)
-            subqueries = [sq.replace("WHERE \n                m.loc_", f"WHERE \n                m.loc_") + filter_string for sq in subqueries]
-        
-        # Combine subqueries with UNION ALL
-        full_subquery = " UNION ALL ".join(subqueries)
-
-        query = f"""
-            SELECT 
-                loc_id,
-                COUNT(*) as matches,
-                SUM(CASE WHEN result = 'win' THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN result = 'loss' THEN 1 ELSE 0 END) as losses,
-                SUM(CASE WHEN result = 'tie' THEN 1 ELSE 0 END) as ties,
-                SUM(cubes_changed) as net_cubes
-            FROM (
-                {full_subquery}
-            ) AS all_locations
-            GROUP BY loc_id 
-            ORDER BY matches DESC
-        """
+            query_parts.append("AND r.season = ?")
+            final_params.append(selected_season)
         
-        # The parameters list needs to be repeated for each subquery
-        final_params = params_for_each_subquery * len(subqueries)
+        query_parts.append("GROUP BY r.location_id ORDER BY matches DESC")
+        query = " ".join(query_parts)
 
-        cursor.execute(query, tuple(final_params))
-        location_data = cursor.fetchall()
+        self._submit_work(
+            'locations', (selected_deck, selected_season),
+            lambda conn: self._rows_with_confidence(conn, query, final_params, 'location', selected_deck, selected_season),
+            self._show_location_stats
+        )
+    
+    def _show_location_stats(self, result):
+        """Reconcile the location tree (and chart, if shown) with fetched rows"""
+        location_data, confidence = result
+        rows = []
         
         # Insert data into treeview
-        for row in location_data:
+        for row_index, row in enumerate(location_data):
             loc_id, matches, wins, losses, ties, net_cubes = row
             
             # Get location name if available
@@ -3149,9 +3174,10 @@ class SnapTrackerApp:
             win_rate = (wins / matches * 100) if matches > 0 else 0
             avg_cubes = (net_cubes / matches) if matches > 0 and net_cubes is not None else 0
             
-            self.location_stats_tree.insert(
-                "", "end",
-                values=(
+            confidence_values = self._confidence_values(confidence, row_index)
+            rows.append((
+                loc_id,
+                (
                     loc_name,
                     matches,
                     f"{win_rate:.1f}%",
@@ -3159,17 +3185,71 @@ class SnapTrackerApp:
                     losses,
                     ties,
                     net_cubes if net_cubes is not None else 0,
-                    f"{avg_cubes:.2f}"
+                    f"{avg_cubes:.2f}",
+                    *self._confidence_display(confidence_values)
                 ),
-                tags=(loc_id,)  # Use location ID as tag
-            )
+                (loc_name, matches, win_rate, wins, losses, ties, net_cubes or 0, avg_cubes, *confidence_values),
+                (loc_id,)  # Use location ID as tag
+            ))
+        self.location_stats_table.set_rows(rows)
         
-        conn.close()
+        # Keep the details of a location that is still selected up to date
+        selected_item = self.location_stats_tree.focus()
+        if selected_item and self.location_stats_tree.exists(selected_item):
+            self.load_location_details(selected_item)
         
         # If in chart view, update the chart
         if self.location_view_var.get() == "Chart":
             self.update_location_chart()
     
+    def on_location_select(self, event):
+        """Show the per-slot and pairing breakdown of the selected location"""
+        selected_item = self.location_stats_tree.focus()
+        if not selected_item:
+            return
+        loc_tags = self.location_stats_tree.item(selected_item, "tags")
+        if loc_tags:
+            self.load_location_details(loc_tags[0])
+    
+    def load_location_details(self, loc_id):
+        """Fetch per-slot results and the most common partner locations for one location"""
+        selected_deck = self.location_deck_filter_var.get()
+        selected_season = self.location_season_filter_var.get()
+        self.location_details_var.set("Loading details...")
+        
+        def compute(conn):
+            slot_rows = calculate_location_slot_statistics(selected_deck, selected_season, loc_id, conn=conn)
+            pair_rows = calculate_location_pair_statistics(selected_deck, selected_season, loc_id, conn=conn)
+            return loc_id, slot_rows, pair_rows
+        
+        self._submit_work('location_details', (loc_id, selected_deck, selected_season), compute, self._show_location_details)
+    
+    def _show_location_details(self, details):
+        loc_id, slot_rows, pair_rows = details
+        
+        def loc_name(def_id):
+            if self.card_db and self.display_card_names_var.get() and def_id in self.card_db:
+                return self.card_db[def_id].get('name', def_id)
+            return def_id
+        
+        slot_names = {1: "Left", 2: "Middle", 3: "Right"}
+        slot_parts = []
+        for _, slot, games, wins, losses, ties, net_cubes in slot_rows:
+            win_rate = (wins / games * 100) if games > 0 else 0
+            slot_parts.append(f"{slot_names.get(slot, slot)}: {games} games, {win_rate:.1f}% win, {net_cubes:+d} cubes")
+        
+        # Partners seen at least twice, best and worst by win rate
+        partners = [(loc_name(other_id), games, (wins / games * 100) if games > 0 else 0)
+                    for _, other_id, games, wins, losses, ties, net_cubes in pair_rows if games >= 2]
+        partners.sort(key=lambda p: (-p[2], -p[1]))
+        
+        lines = [f"{loc_name(loc_id)} - " + (" | ".join(slot_parts) if slot_parts else "No matches")]
+        if partners:
+            lines.append("Best with: " + ", ".join(f"{name} ({games}g, {wr:.0f}%)" for name, games, wr in partners[:3]))
+            if len(partners) > 3: # Don't repeat the best ones when there are few partners
+                lines.append("Worst with: " + ", ".join(f"{name} ({games}g, {wr:.0f}%)" for name, games, wr in reversed(partners[3:][-3:])))
+        self.location_details_var.set("\n".join(lines))
+    
     def toggle_location_view(self):
         """Toggle between table and chart view for location stats"""
         view_mode = self.location_view_var.get()
@@ -3188,33 +3268,14 @@ class SnapTrackerApp:
     
     def update_location_chart(self):
         """Update the location stats chart with current data"""
-        # Clear the figure
-        self.location_figure.clear()
-        
-        # Create subplots
-        ax1 = self.location_figure.add_subplot(211)  # Win rates
-        ax2 = self.location_figure.add_subplot(212)  # Cube values
-        
-        # Get data from treeview
+        # Get data from the table model
         locations = []
         matches = []
         win_rates = []
         net_cubes_list = [] # Renamed to avoid conflict
         
         # Get top 15 locations by number of matches
-        items = self.location_stats_tree.get_children()
-        data = []
-        
-        for item in items:
-            values = self.location_stats_tree.item(item, "values")
-            
-            if len(values) >= 8:  # Make sure we have all values
-                location = values[0]
-                match_count = int(values[1])
-                win_rate = float(values[2].replace("%", ""))
-                net_cube_val = float(values[6]) if values[6] else 0 # Renamed
-                
-                data.append((location, match_count, win_rate, net_cube_val))
+        data = [(values[0], values[1], values[2], values[6]) for values in self.location_stats_table.values]
         
         # Sort by number of matches and take top 15
         data.sort(key=lambda x: x[1], reverse=True)
@@ -3233,89 +3294,8 @@ class SnapTrackerApp:
         win_rates.reverse()
         net_cubes_list.reverse()
         
-        # Set up colors from the theme
-        win_color = self.config['Colors']['win']
-        loss_color = self.config['Colors']['loss']
-        # neutral_color = self.config['Colors']['neutral'] # Not used here
-        bg_color = self.config['Colors']['bg_main']
-        fg_color = self.config['Colors']['fg_main']
-        
-        # Plot win rates with match count as bar width
-        y_pos = range(len(locations))
-        
-        # Normalize matches for bar width
-        max_matches = max(matches) if matches else 1
-        normalized_matches = [m/max_matches*0.8 for m in matches]
-        
-        # Plot win rates
-        bars = ax1.barh(y_pos, win_rates, height=normalized_matches, align='center', color=win_color, alpha=0.8)
-        
-        # Add match count annotation
-        for i, bar in enumerate(bars):
-            ax1.text(
-                bar.get_width() + 2, 
-                bar.get_y() + bar.get_height()/2, 
-                f"{matches[i]} matches", 
-                va='center', 
-                color=fg_color,
-                fontsize=8
-            )
-        
-        # Add a vertical line at 50% win rate
-        ax1.axvline(x=50, color=fg_color, linestyle='--', alpha=0.5)
-        
-        # Set up axes
-        ax1.set_yticks(y_pos)
-        ax1.set_yticklabels(locations)
-        ax1.set_xlabel('Win Rate (%)')
-        ax1.set_title('Location Win Rates')
-        
-        # Set limits
-        ax1.set_xlim(0, 100)
-        
-        # Plot cube values
-        bars2 = ax2.barh(
-            y_pos, net_cubes_list, height=normalized_matches, align='center', 
-            color=[win_color if c > 0 else loss_color for c in net_cubes_list], alpha=0.8
-        )
-        
-        # Add avg cubes annotation
-        for i, bar in enumerate(bars2):
-            avg_cubes_val = net_cubes_list[i] / matches[i] if matches[i] > 0 else 0 # Renamed
-            ax2.text(
-                bar.get_width() + 2 if net_cubes_list[i] >= 0 else bar.get_width() - 2, 
-                bar.get_y() + bar.get_height()/2, 
-                f"Avg: {avg_cubes_val:.2f}", 
-                va='center', 
-                ha='left' if net_cubes_list[i] >= 0 else 'right',
-                color=fg_color,
-                fontsize=8
-            )
-        
-        # Add a vertical line at 0 cubes
-        ax2.axvline(x=0, color=fg_color, linestyle='--', alpha=0.5)
-        
-        # Set up axes
-        ax2.set_yticks(y_pos)
-        ax2.set_yticklabels(locations)
-        ax2.set_xlabel('Net Cubes')
-        ax2.set_title('Location Cube Value')
-        
-        # Set theme colors
-        for ax_item in [ax1, ax2]: # Renamed
-            ax_item.set_facecolor(bg_color)
-            ax_item.tick_params(colors=fg_color)
-            ax_item.xaxis.label.set_color(fg_color)
-            ax_item.yaxis.label.set_color(fg_color)
-            ax_item.title.set_color(fg_color)
-            for spine in ax_item.spines.values():
-                spine.set_color(fg_color)
-        
-        self.location_figure.patch.set_facecolor(bg_color)
-        
-        # Adjust layout and redraw
-        self.location_figure.tight_layout()
-        self.location_canvas.draw()
+        # Bars, annotations and theme are updated in place
+        self.location_chart.update(self.config['Colors'], locations, matches, win_rates, net_cubes_list)
     
     def update_trends(self, event=None):
         """Update trend charts based on selected filters"""
@@ -3333,134 +3313,24 @@ class SnapTrackerApp:
             except ValueError:
                 days = 30  # Default to 30 days
         
-        # Calculate trends (daily data for chart)
-        dates, win_rates_daily, net_cubes_daily = calculate_win_rate_over_time(self.trend_selected_deck_names if self.trend_selected_deck_names else None , selected_opponent, days)
-        
-        # Clear existing plots
-        self.trend_win_rate_ax.clear()
-        self.trend_cubes_ax.clear()
-        if hasattr(self, 'trend_cumulative_cubes_ax'): # Remove old twinx axis if exists
-            self.trend_cumulative_cubes_ax.remove()
-            delattr(self, 'trend_cumulative_cubes_ax')
-
-
-        # Check if we have data for charts
-        if not dates:
-            self.trend_win_rate_ax.text(0.5, 0.5, "No daily data for chart", horizontalalignment='center', verticalalignment='center', color=self.config['Colors']['fg_main'])
-            self.trend_cubes_ax.text(0.5, 0.5, "No daily data for chart", horizontalalignment='center', verticalalignment='center', color=self.config['Colors']['fg_main'])
-        else:
-            # Get theme colors
-            win_color = self.config['Colors']['win']
-            loss_color = self.config['Colors']['loss']
-            neutral_color = self.config['Colors']['neutral']
-            bg_color = self.config['Colors']['bg_main']
-            fg_color = self.config['Colors']['fg_main']
-            
-            # Convert string dates to datetime objects
-            dates_dt = [datetime.datetime.strptime(d, '%Y-%m-%d') for d in dates]
-            
-            # Plot win rate trend
-            self.trend_win_rate_ax.plot(dates_dt, win_rates_daily, marker='o', linestyle='-', color=win_color)
-            self.trend_win_rate_ax.axhline(y=50, color=fg_color, linestyle='--', alpha=0.5)
-            self.trend_win_rate_ax.set_ylabel('Win Rate (%)')
-            self.trend_win_rate_ax.set_title('Win Rate Over Time (Daily)')
-            
-            self.trend_win_rate_ax.xaxis.set_major_formatter(DateFormatter('%m/%d'))
-            self.trend_win_rate_ax.tick_params(axis='x', rotation=45)
-            
-            min_wr = min(win_rates_daily) if win_rates_daily else 0
-            max_wr = max(win_rates_daily) if win_rates_daily else 100
-            padding = 10
-            self.trend_win_rate_ax.set_ylim(max(0, min_wr - padding), min(100, max_wr + padding))
-            
-            # Plot net cubes trend (daily)
-            self.trend_cubes_ax.plot(dates_dt, net_cubes_daily, marker='s', linestyle='-', color=neutral_color)
-            self.trend_cubes_ax.axhline(y=0, color=fg_color, linestyle='--', alpha=0.5)
-            self.trend_cubes_ax.set_ylabel('Net Cubes (Daily)')
-            self.trend_cubes_ax.set_xlabel('Date')
-            self.trend_cubes_ax.set_title('Cube Progression (Daily & Cumulative)')
-            
-            self.trend_cubes_ax.xaxis.set_major_formatter(DateFormatter('%m/%d'))
-            self.trend_cubes_ax.tick_params(axis='x', rotation=45)
-            
-            # Calculate cumulative cubes
-            cumulative_cubes = np.cumsum(net_cubes_daily).tolist()
-            
-            # Add cumulative line on a twin axis
-            self.trend_cumulative_cubes_ax = self.trend_cubes_ax.twinx() # Store twin axis
-            cumulative_line_color = win_color if cumulative_cubes and cumulative_cubes[-1] > 0 else loss_color
-            self.trend_cumulative_cubes_ax.plot(dates_dt, cumulative_cubes, marker='^', linestyle='--', color=cumulative_line_color, label='Cumulative Cubes')
-            self.trend_cumulative_cubes_ax.set_ylabel('Cumulative Cubes', color=cumulative_line_color)
-            self.trend_cumulative_cubes_ax.tick_params(axis='y', labelcolor=cumulative_line_color)
-            self.trend_cumulative_cubes_ax.spines['right'].set_color(cumulative_line_color)
-
-
-            # Set theme colors for all axes
-            for ax in [self.trend_win_rate_ax, self.trend_cubes_ax, self.trend_cumulative_cubes_ax]:
-                ax.set_facecolor(bg_color)
-                ax.tick_params(colors=fg_color) # For tick numbers
-                ax.xaxis.label.set_color(fg_color)
-                ax.yaxis.label.set_color(fg_color) # Primary Y axis label color
-                if ax != self.trend_cumulative_cubes_ax : # For primary y-axis label
-                     ax.yaxis.label.set_color(fg_color)
-                ax.title.set_color(fg_color)
-                for spine in ax.spines.values():
-                    if ax == self.trend_cumulative_cubes_ax and spine == 'right': # Special handling for twinx right spine
-                        continue # Already colored by tick_params and set_ylabel
-                    spine.set_color(fg_color)
-        
-        self.trend_figure.patch.set_facecolor(self.config['Colors']['bg_main'])
-
-        # Fetch summary stats for the period for the labels
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        summary_query_parts = ["""
-            SELECT
-                COUNT(*) as total_matches,
-                SUM(CASE WHEN m.result = 'win' THEN 1 ELSE 0 END) as total_wins,
-                SUM(m.cubes_changed) as total_cubes
-            FROM
-                matches m
-            LEFT JOIN
-                decks d ON m.deck_id = d.id
-            WHERE 1=1
-        """]
-        summary_params = []
-
-        if days:
-            summary_query_parts.append("AND m.timestamp_ended >= date('now', ?)")
-            summary_params.append(f'-{days} days')
-        else: # All time
-             summary_query_parts.append("AND 1=1") # Keep WHERE clause valid
-
-        if self.trend_selected_deck_names: 
-            placeholders = ', '.join(['?'] * len(self.trend_selected_deck_names))
-            query += f" AND d.deck_name IN ({placeholders})"
-            params.extend(list(self.trend_selected_deck_names))
-           
-        #if selected_deck and selected_deck != "All Decks":
-        #    summary_query_parts.append("AND d.deck_name = ?")
-        #    summary_params.append(selected_deck)
+        trend_deck_names = frozenset(self.trend_selected_deck_names) if self.trend_selected_deck_names else None
+        granularity = self.trend_granularity_var.get()
         
-        if selected_opponent and selected_opponent != "All Opponents":
-            summary_query_parts.append("AND m.opponent_player_name = ?")
-            summary_params.append(selected_opponent)
-
-        final_summary_query = " ".join(summary_query_parts)
-
-        try:
-            cursor.execute(final_summary_query, tuple(summary_params))
-            summary_results = cursor.fetchone()
-        except sqlite3.Error as e:
-            print(f"Error fetching trends summary: {e}")
-            summary_results = (0, 0, 0) # Default values on error
-        finally:
-            conn.close()
+        # Series and period summary come from one pass on the query worker. The day is part of
+        # the key: the "last N days" window moves at midnight even when nothing was written.
+        self._submit_work(
+            'trends', (granularity, trend_deck_names, selected_opponent, days, current_local_day()),
+            lambda conn: calculate_trends(granularity, trend_deck_names, selected_opponent, days, conn),
+            self._show_trends
+        )
+    
+    def _show_trends(self, trend):
+        """Redraw the trend charts and summary labels from a calculate_trends result"""
+        self.trend_chart.update(self.config['Colors'], trend)
 
-        # Update summary labels based on the direct query
-        if summary_results:
-            total_matches_summary, total_wins_summary, total_net_cubes_summary = summary_results
-            total_net_cubes_summary = total_net_cubes_summary if total_net_cubes_summary is not None else 0
+        # Update summary labels from the totals computed alongside the series
+        total_matches_summary, total_wins_summary, total_net_cubes_summary = trend['summary']
+        if total_matches_summary:
             avg_win_rate_summary = (total_wins_summary / total_matches_summary * 100) if total_matches_summary > 0 else 0
             avg_cubes_per_game_summary = (total_net_cubes_summary / total_matches_summary) if total_matches_summary > 0 else 0
 
@@ -3474,10 +3344,6 @@ class SnapTrackerApp:
             self.trend_net_cubes_var.set("0")
             self.trend_avg_cubes_var.set("0")
 
-        # Adjust layout and redraw canvas
-        self.trend_figure.tight_layout()
-        self.trends_canvas.draw()
-
     def browse_game_state_path(self):
         """Browse for game state file path"""
         initial_dir = None
@@ -3644,6 +3510,16 @@ class SnapTrackerApp:
             messagebox.showinfo("Theme Reset", "Theme has been reset to default.")
             # No need to destroy dialog, let the user close it or Apply
 
+    def _create_chart_canvas(self, figure, parent):
+        """Tk canvas for a chart figure: drawn on the Tk thread, or rendered to images on a
+        worker thread when background chart rendering is enabled"""
+        if not self.config.getboolean('Settings', 'background_chart_rendering', fallback=False):
+            return FigureCanvasTkAgg(figure, parent)
+        if self.chart_renderer is None:
+            self.chart_renderer = ChartRenderer()
+        return RasterCanvas(figure, parent, self.chart_renderer,
+                            on_error=lambda e: self.log_error(f"Error rendering chart: {e}", "".join(traceback.format_exception(e))))
+    
     def save_settings(self):
         """Save all settings to config file"""
         # Update settings from UI
@@ -3652,6 +3528,7 @@ class SnapTrackerApp:
         self.config['Settings']['card_name_display'] = str(self.display_card_names_var.get())
         self.config['Settings']['update_interval'] = self.update_interval_var.get()
         self.config['Settings']['max_error_log_entries'] = self.max_error_log_var.get()
+        self.config['Settings']['background_chart_rendering'] = str(self.background_chart_rendering_var.get())
         
         # Update card database API
         self.config['CardDB']['api_url'] = self.card_db_api_var.get()
@@ -3910,6 +3787,7 @@ class SnapTrackerApp:
                 
                 if card_db_result:
                     self.card_db = card_db_result # Update instance variable
+                    self.sync_card_names_to_db()
                     
                     self.config['CardDB']['last_update'] = str(int(time.time()))
                     save_config(self.config)
@@ -3941,11 +3819,21 @@ class SnapTrackerApp:
 
         threading.Thread(target=update_thread, daemon=True).start()
 
+    def sync_card_names_to_db(self):
+        """Store card display names in the database so history search can match them"""
+        try:
+            renamed = sync_card_def_names(self.card_db)
+            if renamed:
+                print(f"Synced {renamed} card name(s) into the database")
+        except sqlite3.Error as e:
+            print(f"Error syncing card names to the database: {e}")
+
     def import_card_db_file_command(self):
         """Import card database from a local JSON file"""
         imported_db = import_card_database_from_file()
         if imported_db is not None:
             self.card_db = imported_db
+            self.sync_card_names_to_db()
             threading.Thread(target=self.download_all_card_images, daemon=True).start()
             self.refresh_all_data() # Refresh UI with new card names
 
@@ -4028,11 +3916,11 @@ class SnapTrackerApp:
         cursor = conn.cursor()
         
         try:
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT 
-                    m.timestamp_ended, 
+                    {ENDED_AT_SHORT_SQL}, 
                     COALESCE(d.deck_name, 'Unknown Deck (Yours)'),
-                    m.opp_revealed_cards_json, 
+                    (SELECT GROUP_CONCAT(cd.def_id, '|') FROM match_opp_cards oc JOIN card_defs cd ON cd.id = oc.card_id WHERE oc.game_id = m.game_id), 
                     m.result, 
                     m.cubes_changed, 
                     m.turns_taken
@@ -4043,7 +3931,7 @@ class SnapTrackerApp:
                 WHERE 
                     m.opponent_player_name = ? 
                 ORDER BY 
-                    m.timestamp_ended DESC 
+                    m.ended_at DESC 
                 LIMIT 5
             """, (opponent_name_current_game,))
             
@@ -4053,13 +3941,7 @@ class SnapTrackerApp:
                 history_str = ""
                 
                 for i, match_row in enumerate(past_matches):
-                    ts, deck_name_we_used, opp_rev_json, result, cubes, turns = match_row
-                    
-                    # Format timestamp
-                    try: 
-                        ts_fmt = datetime.datetime.strptime(ts.split('.')[0], "%Y-%m-%d %H:%M:%S").strftime("%y-%m-%d %H:%M")
-                    except: 
-                        ts_fmt = ts
+                    ts_fmt, deck_name_we_used, opp_rev_concat, result, cubes, turns = match_row
                     
                     # Format result
                     cubes_str = f"{cubes}" if cubes is not None else "?"
@@ -4067,24 +3949,18 @@ class SnapTrackerApp:
                     
                     # Process revealed cards
                     revealed_cards_str = "None Recorded"
-                    if opp_rev_json:
-                        try:
-                            cards_list = json.loads(opp_rev_json)
-                            if cards_list:
-                                if self.card_db and self.display_card_names_var.get():
-                                    card_names = []
-                                    for card_id in cards_list:
-                                        if card_id in self.card_db:
-                                            card_names.append(self.card_db[card_id].get('name', card_id))
-                                        else:
-                                            card_names.append(card_id)
-                                    revealed_cards_str = ", ".join(card_names)
+                    if opp_rev_concat:
+                        cards_list = sorted(opp_rev_concat.split('|')) # GROUP_CONCAT order is undefined
+                        if self.card_db and self.display_card_names_var.get():
+                            card_names = []
+                            for card_id in cards_list:
+                                if card_id in self.card_db:
+                                    card_names.append(self.card_db[card_id].get('name', card_id))
                                 else:
-                                    revealed_cards_str = ", ".join(cards_list)
-                            else: 
-                                revealed_cards_str = "None Revealed"
-                        except json.JSONDecodeError: 
-                            revealed_cards_str = "Error parsing cards"
+                                    card_names.append(card_id)
+                            revealed_cards_str = ", ".join(card_names)
+                        else:
+                            revealed_cards_str = ", ".join(cards_list)
                     
                     # Add to history string
                     history_str += f"--- {ts_fmt} ---\nOutcome: {result_str}\nYour Deck: {deck_name_we_used}\nOpponent Revealed: {revealed_cards_str}\n"
@@ -4113,6 +3989,48 @@ class SnapTrackerApp:
         # Schedule next update even if error occurred
         self.root.after(120000, self.update_deck_collection_cache)  # Update every 2 minutes
     
+    def request_tab_refresh(self, tabs=None):
+        """Mark data tabs dirty (all by default) and schedule a coalesced refresh.
+        The visible tab refreshes at the next idle point, hidden ones on first view or
+        one at a time once refresh requests have been quiet for a while."""
+        self.dirty_tabs.update(tabs if tabs is not None else self.tab_loaders)
+        if self.tab_refresh_idle_id is None:
+            self.tab_refresh_idle_id = self.root.after_idle(self._refresh_visible_tab)
+        
+        # Debounce the hidden-tab pass so a burst of requests (e.g. around game start) costs one pass
+        if self.hidden_tab_refresh_id is not None:
+            self.root.after_cancel(self.hidden_tab_refresh_id)
+        self.hidden_tab_refresh_id = self.root.after(HIDDEN_TAB_REFRESH_DELAY_MS, self._refresh_next_hidden_tab)
+    
+    def _refresh_tab(self, tab):
+        self.dirty_tabs.discard(tab)
+        try:
+            self.tab_loaders[tab]()
+        except Exception as e:
+            self.log_error(f"Error refreshing tab {tab}: {e}", traceback.format_exc())
+    
+    def _refresh_visible_tab(self):
+        self.tab_refresh_idle_id = None
+        visible_tab = self.main_notebook.select()
+        if visible_tab in self.dirty_tabs:
+            self._refresh_tab(visible_tab)
+    
+    def _refresh_next_hidden_tab(self):
+        """Refresh one dirty hidden tab per idle slot, so the Tk loop stays responsive between them"""
+        self.hidden_tab_refresh_id = None
+        visible_tab = self.main_notebook.select()
+        hidden_dirty = [tab for tab in self.tab_loaders if tab in self.dirty_tabs and tab != visible_tab]
+        if not hidden_dirty:
+            return
+        self._refresh_tab(hidden_dirty[0])
+        if len(hidden_dirty) > 1:
+            self.hidden_tab_refresh_id = self.root.after_idle(self._refresh_next_hidden_tab)
+    
+    def on_main_tab_changed(self, event=None):
+        """Refresh a data tab that went stale while it was hidden, on first view"""
+        if self.main_notebook.select() in self.dirty_tabs and self.tab_refresh_idle_id is None:
+            self.tab_refresh_idle_id = self.root.after_idle(self._refresh_visible_tab)
+    
     def refresh_all_data(self):
         """Refresh all data in the UI"""
         try:
@@ -4122,6 +4040,7 @@ class SnapTrackerApp:
             self.load_location_stats()
             self.load_deck_performance_data() # New call
             self.update_trends()
+            self.dirty_tabs.clear()
             messagebox.showinfo("Refresh Complete", "All data tabs have been refreshed.")
         except Exception as e:
              messagebox.showerror("Refresh Error", f"An error occurred while refreshing data:\n{e}")
@@ -4136,8 +4055,9 @@ class SnapTrackerApp:
                 if self.game_state_file_path:
                      self.game_state_path_var.set(self.game_state_file_path) # Update settings display
                 else:
-                    self.status_var.set("Error: GameState.json path not found. Retrying...")
+                    self.live_view.set(self.status_var, "Error: GameState.json path not found. Retrying...")
                     self.log_error("GameState.json path not found.")
+                    self.live_view.flush()
                     self.root.after(5000, self.update_data_loop) # Retry after longer delay
                     return
 
@@ -4185,7 +4105,7 @@ class SnapTrackerApp:
                     self.initial_deck_cards_for_current_game = [] # Clear old deck
                     self.playstate_deck_id_last_seen = None
                     self.playstate_read_attempt_count = 0
-                    self.local_remaining_deck_var.set("Deck (Remaining): Capturing...")
+                    self.live_view.set(self.local_remaining_deck_var, "Deck (Remaining): Capturing...")
                     if active_game_id_in_state in self.current_game_events:
                         del self.current_game_events[active_game_id_in_state] # Clear events for new game ID just in case
                 else:
@@ -4240,15 +4160,15 @@ class SnapTrackerApp:
             if game_data.get("error"):
                 error_msg = game_data.get("error", "Unknown error.")
                 full_tb = game_data.get("full_error", "")
-                self.status_var.set(f"Error: {error_msg.strip()}")
+                self.live_view.set(self.status_var, f"Error: {error_msg.strip()}")
                 self.log_error(error_msg.strip(), full_tb)
                 # Maybe reset some UI elements to default/error state
-                self.local_remaining_deck_var.set("Deck (Remaining): Error")
-                self.local_snap_status_var.set("Snap: Error")
-                self.opponent_snap_status_var.set("Snap: Error")
-                self.local_deck_var.set("Deck: ?")
+                self.live_view.set(self.local_remaining_deck_var, "Deck (Remaining): Error")
+                self.live_view.set(self.local_snap_status_var, "Snap: Error")
+                self.live_view.set(self.opponent_snap_status_var, "Snap: Error")
+                self.live_view.set(self.local_deck_var, "Deck: ?")
             else:
-                self.status_var.set(f"OK ({time.strftime('%H:%M:%S')})")
+                self.live_view.set(self.status_var, f"OK ({time.strftime('%H:%M:%S')})")
                 
                 # Clear error if previously shown
                 if self.last_error_displayed_short and not game_data.get("error"):
@@ -4273,22 +4193,22 @@ class SnapTrackerApp:
                             remaining_text = ", ".join(remaining_cards)
 
                     count = len(remaining_cards)
-                    self.local_remaining_deck_var.set(f"({count}) {remaining_text}")
+                    self.live_view.set(self.local_remaining_deck_var, f"({count}) {remaining_text}")
                 elif active_game_id_in_state and not self.initial_deck_cards_for_current_game:
                     if self.playstate_read_attempt_count < 3:
-                        self.local_remaining_deck_var.set("Deck (Remaining): Capturing...")
+                        self.live_view.set(self.local_remaining_deck_var, "Deck (Remaining): Capturing...")
                     else:
-                        self.local_remaining_deck_var.set("Deck (Remaining): Capture Failed")
+                        self.live_view.set(self.local_remaining_deck_var, "Deck (Remaining): Capture Failed")
                 elif not active_game_id_in_state: # No active game ID parsed
-                    self.local_remaining_deck_var.set("Deck (Remaining): N/A")
+                    self.live_view.set(self.local_remaining_deck_var, "Deck (Remaining): N/A")
                 # else: # Case where deck is known but remaining list is None (shouldn't happen often)
-                #     self.local_remaining_deck_var.set("Deck (Remaining): Recalculating...")
+                #     self.live_view.set(self.local_remaining_deck_var, "Deck (Remaining): Recalculating...")
 
                 # Update other UI elements
-                self.local_snap_status_var.set(lp.get("snap_info", "Snap: N/A"))
-                self.opponent_snap_status_var.set(op.get("snap_info", "Snap: N/A"))
-                self.turn_var.set(f"Turn: {gd.get('turn', '?')} / {gd.get('total_turns', '?')}")
-                self.cubes_var.set(f"Cubes: {gd.get('cube_value', '?')}")
+                self.live_view.set(self.local_snap_status_var, lp.get("snap_info", "Snap: N/A"))
+                self.live_view.set(self.opponent_snap_status_var, op.get("snap_info", "Snap: N/A"))
+                self.live_view.set(self.turn_var, f"Turn: {gd.get('turn', '?')} / {gd.get('total_turns', '?')}")
+                self.live_view.set(self.cubes_var, f"Cubes: {gd.get('cube_value', '?')}")
 
                 # Update locations
                 loc_gui_data = gd.get("locations", [{}, {}, {}])
@@ -4299,28 +4219,28 @@ class SnapTrackerApp:
                 for i in range(3):
                     loc_info = loc_gui_data[i] if i < len(loc_gui_data) else {}
                     loc_name = loc_info.get('name', f'Loc {i+1}')
-                    self.location_vars[i]["name"].set(f"{loc_name}")
+                    self.live_view.set(self.location_vars[i]["name"], f"{loc_name}")
                     
                     p1p, p2p = loc_info.get('p1_power', '?'), loc_info.get('p2_power', '?')
                     power_str = f"P: {p1p} (You) - {p2p} (Opp)" if local_is_p1 else f"P: {p1p} (Opp) - {p2p} (You)"
-                    self.location_vars[i]["power"].set(power_str)
+                    self.live_view.set(self.location_vars[i]["power"], power_str)
                     
-                    self.location_vars[i]["local_cards"].set("\n".join(lp_board[i]) if i < len(lp_board) and lp_board[i] else " \n \n ")
-                    self.location_vars[i]["opp_cards"].set("\n".join(op_board[i]) if i < len(op_board) and op_board[i] else " \n \n ")
+                    self.live_view.set(self.location_vars[i]["local_cards"], "\n".join(lp_board[i]) if i < len(lp_board) and lp_board[i] else " \n \n ")
+                    self.live_view.set(self.location_vars[i]["opp_cards"], "\n".join(op_board[i]) if i < len(op_board) and op_board[i] else " \n \n ")
                 
                 # Update player info
-                self.local_player_name_var.set(lp.get("name", "You"))
-                self.local_energy_var.set(f"Energy: {lp.get('energy', '?/?')}")
-                self.local_hand_var.set((", ".join(lp.get("hand", [])) if lp.get("hand") else "Empty"))
-                self.local_deck_var.set(f"Deck: {lp.get('deck_count', '?')}")
-                self.local_graveyard_var.set((", ".join(lp.get("graveyard", [])) if lp.get("graveyard") else "Empty"))
-                self.local_banished_var.set((", ".join(lp.get("banished", [])) if lp.get("banished") else "Empty"))
+                self.live_view.set(self.local_player_name_var, lp.get("name", "You"))
+                self.live_view.set(self.local_energy_var, f"Energy: {lp.get('energy', '?/?')}")
+                self.live_view.set(self.local_hand_var, (", ".join(lp.get("hand", [])) if lp.get("hand") else "Empty"))
+                self.live_view.set(self.local_deck_var, f"Deck: {lp.get('deck_count', '?')}")
+                self.live_view.set(self.local_graveyard_var, (", ".join(lp.get("graveyard", [])) if lp.get("graveyard") else "Empty"))
+                self.live_view.set(self.local_banished_var, (", ".join(lp.get("banished", [])) if lp.get("banished") else "Empty"))
                 
-                self.opponent_name_var.set(current_opponent_name_from_data)
-                self.opponent_energy_var.set(f"Energy: {op.get('energy', '?/?')}")
-                self.opponent_hand_var.set(f"Hand: {op.get('hand_count', '?')} cards")
-                self.opponent_graveyard_var.set((", ".join(op.get("graveyard", [])) if op.get("graveyard") else "Empty"))
-                self.opponent_banished_var.set((", ".join(op.get("banished", [])) if op.get("banished") else "Empty"))
+                self.live_view.set(self.opponent_name_var, current_opponent_name_from_data)
+                self.live_view.set(self.opponent_energy_var, f"Energy: {op.get('energy', '?/?')}")
+                self.live_view.set(self.opponent_hand_var, f"Hand: {op.get('hand_count', '?')} cards")
+                self.live_view.set(self.opponent_graveyard_var, (", ".join(op.get("graveyard", [])) if op.get("graveyard") else "Empty"))
+                self.live_view.set(self.opponent_banished_var, (", ".join(op.get("banished", [])) if op.get("banished") else "Empty"))
                 
                 # Handle end game data
                 end_game_info = game_data.get('end_game_data')
@@ -4332,12 +4252,8 @@ class SnapTrackerApp:
                         self.last_recorded_game_id = game_id_to_record
                         self.log_error(f"Match {game_id_to_record} outcome recorded.", "")
                         
-                        # Refresh data tabs after recording
-                        self.load_history_tab_data()
-                        self.load_card_stats_data()
-                        self.load_matchup_data()
-                        self.load_location_stats()
-                        self.update_trends()
+                        # Refresh data tabs after recording (visible one first, the rest lazily)
+                        self.request_tab_refresh()
 
                         # Clear events only *after* successfully recording
                         if game_id_to_record in self.current_game_events:
@@ -4351,7 +4267,7 @@ class SnapTrackerApp:
                     self.initial_deck_cards_for_current_game = []
                     self.playstate_deck_id_last_seen = None
                     self.playstate_read_attempt_count = 0
-                    self.local_remaining_deck_var.set("Deck (Remaining): N/A")
+                    self.live_view.set(self.local_remaining_deck_var, "Deck (Remaining): N/A")
 
                 elif not end_game_info and self.last_recorded_game_id:
                     # If state flips from recorded back to no end_game_data (e.g., user starts new game quickly)
@@ -4365,9 +4281,12 @@ class SnapTrackerApp:
                 self._update_deck_modal_contents() # Force update checks internally if needed
 
         except Exception as e:
-             self.status_var.set(f"Update Loop Error: {e}")
+             self.live_view.set(self.status_var, f"Update Loop Error: {e}")
              self.log_error(f"Unhandled error in update_data_loop: {e}", traceback.format_exc())
         
+        # Push only the live fields whose text changed this tick
+        self.live_view.flush()
+        
         # Schedule next update
         update_interval = int(self.config.get('Settings', 'update_interval', fallback=1500))
         self.root.after(update_interval, self.update_data_loop)  
@@ -4593,18 +4512,19 @@ class SnapTrackerApp:
                 try:
                     conn = sqlite3.connect(DB_NAME)
                     cursor = conn.cursor()
+                    # Loss cubes are never positive, so negating the rollup sum matches AVG(ABS(...))
                     cursor.execute("""
                         SELECT
-                            COUNT(*) as games,
-                            SUM(CASE WHEN result = 'win' THEN 1 ELSE 0 END) as wins,
-                            SUM(CASE WHEN result = 'loss' THEN 1 ELSE 0 END) as losses,
-                            SUM(cubes_changed) as net_cubes,
-                            AVG(CASE WHEN result = 'win' THEN cubes_changed ELSE NULL END) as avg_win_cubes,
-                            AVG(CASE WHEN result = 'loss' THEN ABS(cubes_changed) ELSE NULL END) as avg_loss_cubes,
-                            SUM(CASE WHEN snap_turn_player > 0 THEN 1 ELSE 0 END) as snapped_games,
-                            SUM(CASE WHEN snap_turn_player > 0 AND result = 'win' THEN 1 ELSE 0 END) as snapped_wins
+                            COALESCE(SUM(games), 0) as games,
+                            SUM(wins) as wins,
+                            SUM(losses) as losses,
+                            SUM(net_cubes) as net_cubes,
+                            SUM(win_cubes) * 1.0 / NULLIF(SUM(win_cube_games), 0) as avg_win_cubes,
+                            -SUM(loss_cubes) * 1.0 / NULLIF(SUM(loss_cube_games), 0) as avg_loss_cubes,
+                            SUM(snapped_games) as snapped_games,
+                            SUM(snapped_wins) as snapped_wins
                         FROM
-                            matches
+                            rollup_deck_season
                         WHERE
                             deck_id = ?
                     """, (deck_id,))
@@ -4731,38 +4651,22 @@ class SnapTrackerApp:
                     if status == 'drawn': fg_color = '#AAAAAA'
                     elif status == 'played': fg_color = '#777777'
 
-                    image_path = os.path.join(CARD_IMAGES_DIR, f"{card_id}.jpg")
                     image_loaded = False
-                    if os.path.exists(image_path):
-                        try:
-                            # Calculate target inner dimensions (slightly smaller than frame)
-                            inner_width = card_width - 6
-                            inner_height = card_height - 6
-
-                            if inner_width > 10 and inner_height > 10: # Only proceed if space is reasonable
-                                pil_image = Image.open(image_path).convert("RGBA")
-
-                                # Apply grayscale/overlay effect based on status BEFORE resizing
-                                if status != 'in_deck':
-                                    pil_image = pil_image.convert('L').convert('RGBA')
-                                    overlay = Image.new('RGBA', pil_image.size, (100, 100, 100, 90)) # Darker overlay
-                                    pil_image = Image.alpha_composite(pil_image, overlay)
-
-                                img_w, img_h = pil_image.size
-                                ratio = min(inner_width / img_w, inner_height / img_h)
-                                new_w, new_h = int(img_w * ratio), int(img_h * ratio)
-
-                                if new_w > 0 and new_h > 0: # Check for valid dimensions
-                                    pil_image = pil_image.resize((new_w, new_h), Image.LANCZOS)
-                                    photo = ImageTk.PhotoImage(pil_image)
+                    try:
+                        # Calculate target inner dimensions (slightly smaller than frame)
+                        inner_width = card_width - 6
+                        inner_height = card_height - 6
 
-                                    img_label = tk.Label(card_frame, image=photo, bg=card_frame['bg'])
-                                    img_label.image = photo
-                                    img_label.pack(expand=True) # Use pack to center naturally
-                                    image_loaded = True
+                        if inner_width > 10 and inner_height > 10: # Only proceed if space is reasonable
+                            photo = self.card_thumbnails.get(card_id, inner_width, inner_height, status)
+                            if photo:
+                                img_label = tk.Label(card_frame, image=photo, bg=card_frame['bg'])
+                                img_label.image = photo
+                                img_label.pack(expand=True) # Use pack to center naturally
+                                image_loaded = True
 
-                        except Exception as img_e:
-                             print(f"Error loading img {card_id}: {img_e}")
+                    except Exception as img_e:
+                         print(f"Error loading img {card_id}: {img_e}")
 
                     if not image_loaded:
                         card_name = self.card_db.get(card_id, {}).get('name', card_id) if self.card_db else card_id
@@ -4850,6 +4754,41 @@ class SnapTrackerApp:
                      except OSError: pass
                  
         print(f"Finished downloading images. Added: {downloaded}, Errors: {errors}")
+        
+        # Prebuild the thumbnails the deck modal and tooltips show, then swap in the new atlas
+        try:
+            if build_thumbnail_atlas() is not None:
+                self.card_thumbnails.atlas = ThumbnailAtlas.load()
+        except (OSError, ValueError) as e:
+            print(f"Error building thumbnail atlas: {e}")
+
+    def rebuild_rollups_command(self):
+        """Command to recompute the aggregate tables behind the stats tabs from the match history."""
+        try:
+            total_games = rebuild_rollups()
+            messagebox.showinfo("Rebuild Complete", f"Statistics tables rebuilt from {total_games} match(es).")
+            self.refresh_all_data()
+        except sqlite3.Error as e:
+            messagebox.showerror("Rebuild Error", f"Database error while rebuilding statistics:\n{e}")
+            self.log_error(f"Error rebuilding rollup tables: {e}", traceback.format_exc())
+
+    def check_rollups_command(self):
+        """Command to verify the aggregate tables against a recompute and offer a rebuild if they drifted."""
+        try:
+            mismatches = check_rollups()
+        except sqlite3.Error as e:
+            messagebox.showerror("Check Error", f"Database error while checking statistics:\n{e}")
+            self.log_error(f"Error checking rollup tables: {e}", traceback.format_exc())
+            return
+        
+        drifted = {table: count for table, count in mismatches.items() if count}
+        if not drifted:
+            messagebox.showinfo("Check Complete", "All statistics tables match the match history.")
+            return
+        
+        details = "\n".join(f"{table}: {count} differing row(s)" for table, count in drifted.items())
+        if messagebox.askyesno("Statistics Out of Date", f"Some statistics tables differ from the match history:\n\n{details}\n\nRebuild them now?"):
+            self.rebuild_rollups_command()
 
     def cleanup_duplicate_events_command(self):
         """Command to clean duplicate match events from the database."""
@@ -4864,48 +4803,14 @@ class SnapTrackerApp:
             return
 
         try:
-            conn = sqlite3.connect(DB_NAME)
-            cursor = conn.cursor()
-
-            # --- Cleanup Strategy ---
-            # 1. Delete rows that are exact duplicates (excluding primary key 'id')
-            # 2. For 'drawn' events, keep only the row with the minimum 'id' for each (game_id, card_def_id) pair.
-
-            # Step 1: Delete exact duplicates based on all relevant columns
-            cursor.execute("""
-                DELETE FROM match_events
-                WHERE id NOT IN (
-                    SELECT MIN(id)
-                    FROM match_events
-                    GROUP BY game_id, turn, event_type, player_type, card_def_id, 
-                             location_index, source_zone, target_zone, details_json
-                )
-            """)
-            exact_duplicates_removed = cursor.rowcount
-            conn.commit()
-
-            # Step 2: Refine 'drawn' events (keep only the first instance per card per game)
-            cursor.execute("""
-                DELETE FROM match_events
-                WHERE event_type = 'drawn' AND player_type = 'local' AND id NOT IN (
-                    SELECT MIN(id)
-                    FROM match_events
-                    WHERE event_type = 'drawn' AND player_type = 'local'
-                    GROUP BY game_id, card_def_id
-                )
-            """)
-            drawn_duplicates_removed = cursor.rowcount
-            conn.commit()
-
-            conn.close()
+            # Exact duplicates cannot be stored any more (uidx_events_dedupe rejects them),
+            # so only redundant 'drawn' events need cleaning: keep the first per card per game.
+            drawn_duplicates_removed = remove_redundant_drawn_events()
 
-            total_removed = exact_duplicates_removed + drawn_duplicates_removed
             messagebox.showinfo(
                 "Cleanup Complete",
                 f"Event cleanup finished.\n"
-                f"- Exact duplicates removed: {exact_duplicates_removed}\n"
-                f"- Redundant 'drawn' events removed: {drawn_duplicates_removed}\n"
-                f"- Total rows removed: {total_removed}"
+                f"- Redundant 'drawn' events removed: {drawn_duplicates_removed}"
             )
             # Refresh relevant views if needed
             self.refresh_all_data()